@@ -132,14 +132,30 @@ def setup_orchestra(settings_module_name):
                  'SynchronousMachineStepScheduler')
     }
 
+    # Scheduler for setting up new projects' Google Drive folders, Slack
+    # groups and first tasks
+    settings.PROJECT_SETUP_SCHEDULER = {
+        'path': ('orchestra.utils.project_setup_scheduler.'
+                 'SynchronousProjectSetupScheduler')
+    }
+
+    # Scheduler for setting up projects created in bulk, which runs
+    # synchronously outside production and staging
+    settings.PROJECT_BULK_SETUP_SCHEDULER = {
+        'path': ('orchestra.utils.project_setup_scheduler.'
+                 'AsynchronousProjectSetupScheduler')
+    }
+
     # Beanstalk dispatcher
-    # Add keys to use AsynchronousMachineStepScheduler
+    # Add keys to use AsynchronousMachineStepScheduler and
+    # AsynchronousProjectSetupScheduler
     settings.BEANSTALK_DISPATCH_SQS_KEY = ''
     settings.BEANSTALK_DISPATCH_SQS_SECRET = ''
     settings.WORK_QUEUE = ''
     if os.environ.get('BEANSTALK_WORKER') == 'True':
         settings.BEANSTALK_DISPATCH_TABLE = {
-            'machine_task_executor': ('orchestra.machine_tasks.execute')
+            'machine_task_executor': ('orchestra.machine_tasks.execute'),
+            'project_setup_executor': ('orchestra.project.set_up_project')
         }
 
     # Email and Notifications
@@ -204,6 +220,17 @@ def setup_orchestra(settings_module_name):
     settings.ORCHESTRA_STAFFBOT_BATCH_FREQUENCY = timedelta(minutes=2)
     settings.ORCHESTRA_STAFFBOT_STAFFING_MIN_TIME = timedelta(minutes=30)
     settings.ORCHESTRA_STAFFBOT_STAFFING_GROUP_ID = None
+    # Optionally seed how StaffBot orders workers who share a staffing
+    # priority, so that a request's candidates can be reproduced when
+    # debugging.
+    settings.ORCHESTRA_STAFFBOT_SHUFFLE_SEED = None
+    # Number of staffing messages StaffBot sends at the same time, and the
+    # minimum time between two messages on each channel.
+    settings.ORCHESTRA_STAFFBOT_DELIVERY_THREADS = 4
+    settings.ORCHESTRA_STAFFBOT_DELIVERY_MIN_INTERVALS = {
+        'email': timedelta(seconds=0),
+        'slack': timedelta(seconds=0),
+    }
 
     # Optionally add a path for a template to support third party scripts
     # (such as Google Analytics)
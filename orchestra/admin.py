@@ -152,6 +152,9 @@ class TaskAssignmentAdmin(AjaxSelectAdmin):
         'worker__user__username')
     list_filter = ('task__step__is_human', 'task__project__workflow_version')
 
+    def get_queryset(self, request):
+        return _defer_changelist_data(request, super().get_queryset(request))
+
     def workflow_version(self, obj):
         return obj.task.project.workflow_version
 
@@ -383,3 +386,13 @@ def linkify(url, text=None, new_window=False):
         target_string = '_blank'
     return format_html(
         '<a href="{}" target="{}">{}</a>', url, target_string, text)
+
+
+def _defer_changelist_data(request, queryset):
+    # List views don't display the large JSON data of task assignments,
+    # so only change views load it. Iterations keep their submitted data
+    # in data blobs, which are only loaded when the data is read.
+    resolver_match = request.resolver_match
+    if resolver_match and resolver_match.url_name.endswith('_changelist'):
+        return queryset.defer_data()
+    return queryset
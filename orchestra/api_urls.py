@@ -4,8 +4,11 @@ from django.urls import re_path
 
 from orchestra.project_api.views import assign_worker_to_task
 from orchestra.project_api.views import create_project
+from orchestra.project_api.views import create_projects
 from orchestra.project_api.views import project_details_url
+from orchestra.project_api.views import project_changes
 from orchestra.project_api.views import project_information
+from orchestra.project_api.views import project_information_stream
 from orchestra.project_api.views import workflow_types
 from orchestra.project_api.views import message_project_team
 from orchestra.project_api.views import TodoApiViewset
@@ -13,8 +16,10 @@ from orchestra.project_api.views import TodoTemplatesList
 from orchestra.project_api.views import create_todos_from_template
 from orchestra.views import TimeEntryDetail
 from orchestra.views import TimeEntryList
+from orchestra.views import dashboard_complete_tasks
 from orchestra.views import dashboard_tasks
 from orchestra.views import get_timer
+from orchestra.views import patch_task_assignment
 from orchestra.views import save_task_assignment
 from orchestra.views import start_timer
 from orchestra.views import status
@@ -31,6 +36,9 @@ urlpatterns = [
     re_path(r'^interface/dashboard_tasks/$',
             dashboard_tasks, name='dashboard_tasks'),
 
+    re_path(r'^interface/dashboard_complete_tasks/$',
+            dashboard_complete_tasks, name='dashboard_complete_tasks'),
+
     re_path(r'^interface/task_assignment_information/$',
             task_assignment_information,
             name='task_assignment_information'),
@@ -38,6 +46,9 @@ urlpatterns = [
     re_path(r'^interface/save_task_assignment/$',
             save_task_assignment,
             name='save_task_assignment'),
+    re_path(r'^interface/patch_task_assignment/$',
+            patch_task_assignment,
+            name='patch_task_assignment'),
 
     re_path(r'^interface/submit_task_assignment/$',
             submit_task_assignment,
@@ -66,9 +77,18 @@ urlpatterns = [
     re_path(r'^project/project_information/$',
             project_information,
             name='project_information'),
+    re_path(r'^project/project_information_stream/$',
+            project_information_stream,
+            name='project_information_stream'),
+    re_path(r'^project/project_changes/$',
+            project_changes,
+            name='project_changes'),
     re_path(r'^project/create_project/$',
             create_project,
             name='create_project'),
+    re_path(r'^project/create_projects/$',
+            create_projects,
+            name='create_projects'),
     re_path(r'^project/workflow_types/$',
             workflow_types,
             name='workflow_types'),
@@ -7,3 +7,4 @@ class OrchestraAppConfig(AppConfig):
 
     def ready(self):
         from orchestra.accounts import signals  # noqa
+        from orchestra import signals  # noqa
@@ -65,7 +65,9 @@ def previously_completed_steps(task, related_steps, **kwargs):
         .filter(step__slug__in=related_steps, project=task.project)
         .select_related('step'))
     for related_task in related_tasks:
-        entry_level_assignment = assignment_history(related_task).first()
+        entry_level_assignment = (assignment_history(related_task)
+                                  .defer_data()
+                                  .first())
         if entry_level_assignment and entry_level_assignment.worker:
             try:
                 return assign_task(entry_level_assignment.worker.id, task.id)
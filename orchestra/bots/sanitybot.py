@@ -24,7 +24,9 @@ def _handle(project, sanity_check, handler):
     usernames = {
         assignment.worker.formatted_slack_username()
         for task in tasks
-        for assignment in task.assignments.all()
+        for assignment in (task.assignments
+                           .defer_data()
+                           .select_related('worker'))
         if assignment and assignment.worker
     }
     message = '{}: {}'.format(' '.join(usernames), handler_message)
@@ -12,6 +12,7 @@ from orchestra.communication.errors import SlackError
 from orchestra.communication.mail import html_from_plaintext
 from orchestra.communication.mail import send_mail
 from orchestra.communication.slack import format_slack_message
+from orchestra.communication.slack import raise_slack_errors
 from orchestra.communication.utils import close_open_staffbot_requests
 from orchestra.core.errors import TaskAssignmentError
 from orchestra.core.errors import TaskStatusError
@@ -258,20 +259,13 @@ class StaffBot(BaseBot):
             settings.ORCHESTRA_URL,
             reverse(reverse_string, kwargs=url_kwargs))
 
-    def get_staffing_request_metadata(self, staffing_request_inquiry):
-        url_kwargs = {
-            'staffing_request_inquiry_id': staffing_request_inquiry.pk
-        }
-        accept_url = self._get_staffing_url(
-            'orchestra:communication:accept_staffing_request_inquiry',
-            url_kwargs)
-        reject_url = self._get_staffing_url(
-            'orchestra:communication:reject_staffing_request_inquiry',
-            url_kwargs)
-
+    def get_staffing_request_details(self, staffbot_request):
+        """
+        Describe a staffing request in the same way for every worker it
+        is sent to.
+        """
         # TODO(joshblum): handle urls if present in the detailed_description to
         # convert for slack
-        staffbot_request = staffing_request_inquiry.request
         detailed_description = (
             staffbot_request.task.get_detailed_description()
         )
@@ -285,13 +279,8 @@ class StaffBot(BaseBot):
         )
         step_description = (
             staffbot_request.task.step.description)
-        user = (staffing_request_inquiry.communication_preference.
-                worker.user)
         return {
-            'user': user,
             'tags': staffbot_request.task.tags.get('tags', []),
-            'accept_url': accept_url,
-            'reject_url': reject_url,
             'role_counter': staffbot_request.required_role_counter,
             'step_description': step_description,
             'workflow_description': workflow_description,
@@ -300,6 +289,33 @@ class StaffBot(BaseBot):
             'available_datetime': staffbot_request.created_at
         }
 
+    def get_staffing_request_metadata(self, staffing_request_inquiry,
+                                      request_details=None):
+        """
+        Describe a staffing request for the worker an inquiry was sent
+        to. `request_details` can be passed to reuse the result of
+        `get_staffing_request_details` across inquiries for one request.
+        """
+        url_kwargs = {
+            'staffing_request_inquiry_id': staffing_request_inquiry.pk
+        }
+        accept_url = self._get_staffing_url(
+            'orchestra:communication:accept_staffing_request_inquiry',
+            url_kwargs)
+        reject_url = self._get_staffing_url(
+            'orchestra:communication:reject_staffing_request_inquiry',
+            url_kwargs)
+
+        if request_details is None:
+            request_details = self.get_staffing_request_details(
+                staffing_request_inquiry.request)
+        user = (staffing_request_inquiry.communication_preference.
+                worker.user)
+        return dict(request_details,
+                    user=user,
+                    accept_url=accept_url,
+                    reject_url=reject_url)
+
     def _get_staffing_request_message(self, staffing_request_inquiry,
                                       template):
         context = self.get_staffing_request_metadata(staffing_request_inquiry)
@@ -318,14 +334,28 @@ class StaffBot(BaseBot):
                   [email],
                   html_message=html_message)
 
-    def _send_staffing_request_by_slack(self, worker, message):
+    def _send_staffing_request_by_slack(self, worker, message,
+                                        raise_errors=False):
+        """
+        Send a staffing message to the worker over Slack. Errors are
+        logged and ignored unless `raise_errors` is set, in which case
+        they are raised, and rate-limited requests raise
+        `SlackRateLimitError` so that they can be retried.
+        """
         if worker.slack_user_id is None:
-            logger.warning('Worker {} does not have a slack id'.format(
-                worker))
+            error_message = 'Worker {} does not have a slack id'.format(
+                worker)
+            if raise_errors:
+                raise SlackError(error_message)
+            logger.warning(error_message)
+            return
+        # Replace any Markdown-style links with Slack-style links.
+        message = MARKDOWN_LINK_REGEX.sub(r'<\g<url>|\g<text>>', message)
+        if raise_errors:
+            with raise_slack_errors():
+                self.slack.chat.post_message(worker.slack_user_id, message)
             return
         try:
-            # Replace any Markdown-style links with Slack-style links.
-            message = MARKDOWN_LINK_REGEX.sub(r'<\g<url>|\g<text>>', message)
             self.slack.chat.post_message(worker.slack_user_id, message)
         except SlackError:
             logger.warning('Invalid slack id {} {}'.format(
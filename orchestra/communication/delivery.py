@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+
+from orchestra.communication.errors import DeliveryError
+from orchestra.communication.errors import SlackRateLimitError
+from orchestra.models import CommunicationPreference
+from orchestra.models import StaffingRequestInquiry
+
+logger = logging.getLogger(__name__)
+
+EMAIL_METHOD = StaffingRequestInquiry.CommunicationMethod.EMAIL.value
+SLACK_METHOD = StaffingRequestInquiry.CommunicationMethod.SLACK.value
+
+DEFAULT_DELIVERY_THREADS = 4
+# Number of times a message is sent before giving up on a channel that
+# keeps rate-limiting us.
+MAX_DELIVERY_ATTEMPTS = 3
+
+
+class ChannelRateLimiter(object):
+    """
+    Spaces out the messages sent over a delivery channel, and holds the
+    channel back when it reports that we are being rate-limited.
+    """
+
+    def __init__(self, min_interval=timedelta(seconds=0)):
+        self.min_interval = min_interval.total_seconds()
+        self._next_send = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until the next message may be sent over the channel.
+        """
+        with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_send)
+            self._next_send = send_at + self.min_interval
+        if send_at > now:
+            time.sleep(send_at - now)
+
+    def pause(self, seconds):
+        """
+        Hold back all messages on the channel for `seconds`.
+        """
+        with self._lock:
+            self._next_send = max(self._next_send,
+                                  time.monotonic() + seconds)
+
+
+def _get_rate_limiters():
+    min_intervals = getattr(
+        settings, 'ORCHESTRA_STAFFBOT_DELIVERY_MIN_INTERVALS', {})
+    return {
+        method: ChannelRateLimiter(
+            min_intervals.get(name, timedelta(seconds=0)))
+        for name, method in (('email', EMAIL_METHOD),
+                             ('slack', SLACK_METHOD))
+    }
+
+
+def _deliver(rate_limiter, send, *args):
+    for attempt in range(MAX_DELIVERY_ATTEMPTS):
+        rate_limiter.wait()
+        try:
+            return send(*args)
+        except SlackRateLimitError as e:
+            if attempt + 1 == MAX_DELIVERY_ATTEMPTS:
+                raise
+            rate_limiter.pause(e.retry_after)
+
+
+def _create_inquiries(staffbot_request, workers, failures):
+    new_task_available_type = (
+        CommunicationPreference.CommunicationType.NEW_TASK_AVAILABLE.value)
+    communication_preferences = {
+        communication_preference.worker_id: communication_preference
+        for communication_preference in (
+            CommunicationPreference.objects
+            .filter(communication_type=new_task_available_type,
+                    worker__in=workers)
+            .select_related('worker__user'))
+    }
+    inquiries = []
+    for worker in workers:
+        communication_preference = communication_preferences.get(worker.id)
+        if communication_preference is None:
+            failures[worker.id].append(DeliveryError(
+                'Worker {} has no preference for new task messages'
+                .format(worker)))
+            continue
+        for communication_method, enabled in (
+                (EMAIL_METHOD, communication_preference.can_email()),
+                (SLACK_METHOD, communication_preference.can_slack())):
+            if enabled:
+                inquiries.append(StaffingRequestInquiry(
+                    communication_preference=communication_preference,
+                    communication_method=communication_method,
+                    request=staffbot_request))
+    return StaffingRequestInquiry.objects.bulk_create(inquiries)
+
+
+def _get_deliveries(staffbot, inquiries):
+    # Messages are rendered up front, since rendering reads from the
+    # database and the delivery threads don't.
+    rate_limiters = _get_rate_limiters()
+    deliveries = []
+    for inquiry in inquiries:
+        worker = inquiry.communication_preference.worker
+        if inquiry.communication_method == EMAIL_METHOD:
+            message = staffbot._get_staffing_request_message(
+                inquiry, 'communication/new_task_available_email.txt')
+            deliveries.append((
+                worker, rate_limiters[EMAIL_METHOD],
+                staffbot._send_staffing_request_by_mail,
+                (worker.user.email, message)))
+        else:
+            message = staffbot._get_staffing_request_message(
+                inquiry, 'communication/new_task_available_slack.txt')
+            deliveries.append((
+                worker, rate_limiters[SLACK_METHOD],
+                staffbot._send_staffing_request_by_slack,
+                (worker, message, True)))
+    return deliveries
+
+
+def deliver_request_inquiries(staffbot, staffbot_request, workers,
+                              max_threads=None):
+    """
+    Send a staffing request to several workers at once.
+
+    The request inquiries for all workers are created in bulk, and the
+    email and Slack messages are sent concurrently by a bounded pool of
+    threads, with each channel rate-limited on its own.
+
+    Args:
+        staffbot (orchestra.bots.staffbot.StaffBot):
+            The bot that renders and sends the messages.
+        staffbot_request (orchestra.models.StaffBotRequest):
+            The request the workers are asked to pick up.
+        workers ([orchestra.models.Worker]):
+            The workers to send the request to.
+        max_threads (int):
+            Maximum number of messages sent at the same time. Defaults to
+            `settings.ORCHESTRA_STAFFBOT_DELIVERY_THREADS`.
+
+    Returns:
+        failures (dict):
+            Maps the IDs of workers whose messages could not be delivered
+            to the errors raised while delivering them.
+    """
+    if max_threads is None:
+        max_threads = getattr(settings, 'ORCHESTRA_STAFFBOT_DELIVERY_THREADS',
+                              DEFAULT_DELIVERY_THREADS)
+    failures = defaultdict(list)
+    inquiries = _create_inquiries(staffbot_request, workers, failures)
+    deliveries = _get_deliveries(staffbot, inquiries)
+    if deliveries:
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            futures = [
+                (worker,
+                 executor.submit(_deliver, rate_limiter, send, *args))
+                for worker, rate_limiter, send, args in deliveries]
+        for worker, future in futures:
+            error = future.exception()
+            if error is not None:
+                failures[worker.id].append(error)
+
+    for worker_id, errors in failures.items():
+        logger.warning(
+            'Could not deliver staffing request %s to worker %s: %s',
+            staffbot_request.id, worker_id, errors)
+    return dict(failures)
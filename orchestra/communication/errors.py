@@ -5,4 +5,16 @@ class SlackFormatError(Exception):
     pass
 
 
+class SlackRateLimitError(Exception):
+
+    def __init__(self, retry_after):
+        super().__init__(
+            'Slack API rate limit, retry after {}s'.format(retry_after))
+        self.retry_after = retry_after
+
+
+class DeliveryError(Exception):
+    pass
+
+
 SlackError = Error
@@ -1,6 +1,9 @@
 import logging
 import random
 import string
+import threading
+
+from contextlib import contextmanager
 
 from django.conf import settings
 from django.utils.text import slugify
@@ -12,13 +15,16 @@ from slacker import BaseAPI
 from slacker import Slacker
 
 from orchestra.communication.errors import SlackFormatError
+from orchestra.communication.errors import SlackRateLimitError
 from orchestra.utils.decorators import run_if
 
 logger = logging.getLogger(__name__)
 
 # Types of responses we can send to slack
 VALID_RESPONSE_TYPES = {'ephemeral', 'in_channel'}
+MAX_SLACK_GROUP_NAME_ATTEMPTS = 10
 _request = BaseAPI._request
+_slack_errors = threading.local()
 
 
 def _silent_request(*args, **kwargs):
@@ -28,14 +34,21 @@ def _silent_request(*args, **kwargs):
     TODO(jrbotros): this silences all errors, but we likely will want to be
     able to surface errors in some cases in the future
     """
+    raise_errors = getattr(_slack_errors, 'raise_errors', False)
     try:
         return _request(*args, **kwargs)
     except SlackError:
+        if raise_errors:
+            raise
         logger.exception('Slack API Error')
     except HTTPError as e:
         status_code = e.response.status_code
-        # If we're being rate-limited, log the exception but don't fail.
+        # If we're being rate-limited, log the exception but don't fail,
+        # unless the caller will back off and retry.
         if status_code == 429:
+            if raise_errors:
+                raise SlackRateLimitError(
+                    int(e.response.headers.get('Retry-After', 1)))
             logger.exception('Slack API rate limit')
         else:
             raise
@@ -44,6 +57,21 @@ def _silent_request(*args, **kwargs):
 BaseAPI._request = _silent_request
 
 
+@contextmanager
+def raise_slack_errors():
+    """
+    Raise errors from Slack API requests made by this thread in the context
+    instead of ignoring them. Rate-limited requests raise
+    `SlackRateLimitError`.
+    """
+    previous = getattr(_slack_errors, 'raise_errors', False)
+    _slack_errors.raise_errors = True
+    try:
+        yield
+    finally:
+        _slack_errors.raise_errors = previous
+
+
 class OrchestraSlackService(object):
     """
     Wrapper slack service to allow easy swapping and mocking out of API.
@@ -85,9 +113,18 @@ def create_project_slack_group(project):
     Create slack channel for project team communication
     """
     slack = OrchestraSlackService()
-    response = slack.conversations.create(
-        _project_slack_group_name(project),
-        is_private=True)
+    taken_names = set()
+    while True:
+        name = _project_slack_group_name(project, taken_names)
+        try:
+            with raise_slack_errors():
+                response = slack.conversations.create(name, is_private=True)
+            break
+        except SlackError as e:
+            if (str(e) != 'name_taken' or
+                    len(taken_names) >= MAX_SLACK_GROUP_NAME_ATTEMPTS):
+                raise
+            taken_names.add(name)
     project.slack_group_id = response.body['channel']['id']
     slack.conversations.set_topic(
         project.slack_group_id, project.short_description)
@@ -150,24 +187,23 @@ def _random_string():
         for idx in range(4))
 
 
-def _project_slack_group_name(project):
+def _project_slack_group_name(project, taken_names=()):
     """
-    Return a unique and readable identifier for project slack groups.
+    Return a readable identifier for project slack groups that is not in
+    `taken_names`.
 
-    Slack group names are capped at 21 characters in length.
+    Slack group names are capped at 21 characters in length. Rather than
+    listing every channel up front, callers pass the names Slack rejected
+    as taken and ask for another one.
     """
     name = None
     # The human-readable portion of the name (16 characters) involves
     # slugifying the project short description.
     descriptor = slugify(project.short_description)[:16].strip('-')
-    slack = OrchestraSlackService()
-    channels = {
-        channel['name']
-        for channel in slack.conversations.list().body['channels']}
     while True:
         # Add 4 characters of randomness (~1.68 million permutations).
         name = '{}-{}'.format(descriptor, _random_string())
-        if name not in channels:
+        if name not in taken_names:
             break
     return name
 
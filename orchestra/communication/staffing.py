@@ -3,18 +3,20 @@ import logging
 
 from annoying.functions import get_object_or_None
 from collections import defaultdict
-from datetime import timedelta
 from django.conf import settings
 from django.urls import reverse
 from django.db import transaction
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import OuterRef
 from django.db.models import Q
 from django.utils import timezone
 from markdown2 import markdown
 
 from orchestra.bots.errors import StaffingResponseException
 from orchestra.bots.staffbot import StaffBot
-from orchestra.core.errors import TaskAssignmentError
-from orchestra.core.errors import TaskStatusError
+from orchestra.communication.delivery import deliver_request_inquiries
+from orchestra.communication.staffing_engine import StaffingEngine
 from orchestra.models import CommunicationPreference
 from orchestra.models import StaffBotRequest
 from orchestra.models import StaffingRequestInquiry
@@ -23,16 +25,9 @@ from orchestra.models import Task
 from orchestra.models import Project
 from orchestra.models import TaskAssignment
 from orchestra.models import Worker
-from orchestra.models import WorkerAvailability
-from orchestra.models import WorkerCertification
-from orchestra.utils.datetime_utils import first_day_of_the_week
-from orchestra.utils.time_tracking import time_entry_hours_worked
 from orchestra.utils.notifications import message_experts_slack_group
 from orchestra.utils.notifications import message_internal_slack_group
 from orchestra.utils.task_lifecycle import assign_task
-from orchestra.utils.task_lifecycle import check_worker_allowed_new_assignment
-from orchestra.utils.task_lifecycle import get_role_from_counter
-from orchestra.utils.task_lifecycle import is_worker_certified_for_task
 from orchestra.utils.task_lifecycle import reassign_assignment
 
 logger = logging.getLogger(__name__)
@@ -62,9 +57,9 @@ def handle_staffing_response(worker, staffing_request_inquiry_id,
         return None
 
     response = (StaffingResponse.objects
-                .filter(request_inquiry=staffing_request_inquiry))
-    if response.exists():
-        response = response.first()
+                .filter(request_inquiry=staffing_request_inquiry)
+                .first())
+    if response is not None:
         if not is_available and response.is_winner:
             raise StaffingResponseException(
                 'Cannot reject after accepting the task')
@@ -102,26 +97,34 @@ def handle_staffing_response(worker, staffing_request_inquiry_id,
 
 
 def check_responses_complete(request):
-    inquiries = (
-        StaffingRequestInquiry.objects.filter(request=request)
-    ).distinct()
-    num_inquired_workers = len(
-        set(inquiries.values_list(
-            'communication_preference__worker__id', flat=True)
-            )
-    )
-    responded_inquiries = inquiries.filter(
-        responses__isnull=False).distinct()
-    num_responded_workers = len(
-        set(responded_inquiries.values_list(
-            'communication_preference__worker__id', flat=True)
-            )
-    )
+    """
+    Close a staffing request once every inquired worker has responded
+    without anyone winning it.
+
+    The inquired and responded workers and the presence of a winner are
+    counted by a single aggregate query, so the check costs the same no
+    matter how many workers were inquired.
 
-    responses = StaffingResponse.objects.filter(
-        request_inquiry__request=request)
-    if (num_responded_workers >= num_inquired_workers and
-            not responses.filter(is_winner=True).exists()):
+    Args:
+        request (orchestra.models.StaffBotRequest):
+            The staffing request to check.
+    """
+    counts = (
+        StaffingRequestInquiry.objects
+        .filter(request=request)
+        .aggregate(
+            num_inquired_workers=Count(
+                'communication_preference__worker', distinct=True),
+            num_responded_workers=Count(
+                'communication_preference__worker',
+                filter=Q(responses__isnull=False),
+                distinct=True),
+            num_winners=Count(
+                'responses',
+                filter=Q(responses__is_winner=True,
+                         responses__is_deleted=False))))
+    if (counts['num_responded_workers'] >= counts['num_inquired_workers'] and
+            not counts['num_winners']):
         request.status = StaffBotRequest.Status.CLOSED.value
         request.save()
 
@@ -141,127 +144,38 @@ def _exclude_inactive_staffbot_requests(request_queryset):
             .exclude(task__status=Task.Status.ABORTED))
 
 
-def _get_worker_allowed_hours():
-    today = timezone.now().date()
-    today_abbreviation = ['mon', 'tues', 'wed', 'thurs', 'fri', 'sat', 'sun'][
-        today.weekday()]
-    # For each Worker, their allowed hours is the smaller of the their
-    # daily (desired) availability and their max hours per day.
-    return {
-        availability.worker.id:
-        min(
-            getattr(
-                availability,
-                'hours_available_{}'.format(today_abbreviation), 0),
-            availability.worker.max_autostaff_hours_per_day)
-        for availability in (
-                WorkerAvailability.objects
-                .filter(week=first_day_of_the_week())
-                .select_related('worker'))
-    }
-
-
 def address_staffing_requests(
         worker_batch_size=settings.ORCHESTRA_STAFFBOT_WORKER_BATCH_SIZE,
-        frequency=settings.ORCHESTRA_STAFFBOT_BATCH_FREQUENCY):
+        frequency=settings.ORCHESTRA_STAFFBOT_BATCH_FREQUENCY,
+        seed=None):
     staffbot = StaffBot()
     cutoff_datetime = timezone.now() - frequency
     requests = _exclude_inactive_staffbot_requests(
         StaffBotRequest.objects
         .filter(Q(last_inquiry_sent__isnull=True) |
                 Q(last_inquiry_sent__lte=cutoff_datetime))
+        .select_related('task__step', 'task__project')
         .order_by('-task__project__priority', 'created_at'))
-    worker_allowed_hours = _get_worker_allowed_hours()
-    for request in requests:
+    if seed is None:
+        seed = getattr(settings, 'ORCHESTRA_STAFFBOT_SHUFFLE_SEED', None)
+    engine = StaffingEngine(requests, seed=seed)
+    for request in engine.requests:
         staff_or_send_request_inquiries(
-            staffbot, request, worker_batch_size, worker_allowed_hours)
-
-
-def _is_worker_assignable(worker, task, required_role):
-    try:
-        check_worker_allowed_new_assignment(worker)
-        if (is_worker_certified_for_task(worker, task,
-                                         required_role,
-                                         require_staffbot_enabled=True)
-                and not task.is_worker_assigned(worker)):
-            return True
-    except TaskStatusError:
-        pass
-    except TaskAssignmentError:
-        pass
-    return False
-
-
-def _can_handle_more_work_today(worker, task, worker_allowed_hours):
-    can_handle_more_hours = False
-    today = timezone.now().date()
-    allowed_hours = worker_allowed_hours.get(worker.id, None)
-    task_hours = task.get_assignable_hours()
-    if allowed_hours is not None and task_hours is not None:
-        # Because we're looking at StaffingResponse objects to
-        # determine assigned tasks for a worker, we don't consider
-        # tasks that were assigned manually without an open StaffBot
-        # request. For example, we ignore tasks staffed by directly
-        # typing a worker's username into the projman interface when
-        # an open StaffBot request does not exist for the task. In
-        # practice, such situations are rare (new tasks tend to be
-        # auto-StaffBotted), and when the situations arise, it's
-        # unclear what the estimate for the assignable hours is.
-        responses = StaffingResponse.objects.filter(
-            request_inquiry__communication_preference__worker=worker,
-            is_winner=True,
-            created_at__gte=today,
-            created_at__lt=today + timedelta(days=1)
-        )
-        # Create a dictionary to deduplicate tasks if a Worker is
-        # reassigned the same task multiple times.
-        hours_assigned = {
-            response.request_inquiry.request.task.id:
-            (response.request_inquiry.request.task.get_assignable_hours(),
-             response.request_inquiry.request.task)
-            for response in responses
-        }
-        hours_assigned = [
-            (hours, task) for (hours, task) in hours_assigned.values()
-            if hours is not None]
-        max_tasks = settings.ORCHESTRA_MAX_AUTOSTAFF_TASKS_PER_DAY
-        # To estimate how much someone worked today, we add:
-        # - the number of assignable hours they were assigned today
-        # - the number of hours they tracked (excluding work completed
-        #   on today's newly assigned work, to avoid double-counting)
-        # We do not attempt to estimate the amount of "unexpected" work,
-        #   like iteration time on an old project the expert has learned
-        #   about over Slack but hasn't yet logged for the day.
-        sum_hours_assigned = sum(hours for (hours, task) in hours_assigned)
-        sum_hours_worked = time_entry_hours_worked(
-            today, worker, excluded_tasks=[
-                task for (hours, task) in hours_assigned])
-        can_handle_more_hours = (
-            (len(hours_assigned) + 1 <= max_tasks)
-            and (sum_hours_assigned
-                 + sum_hours_worked
-                 + task_hours <= allowed_hours))
-    return can_handle_more_hours
-
-
-def _attempt_to_automatically_staff(
-        staffbot, request, worker_certifications, worker_allowed_hours):
+            staffbot, request, worker_batch_size, engine)
+
+
+def _attempt_to_automatically_staff(staffbot, request, worker_ids, engine):
     successfully_staffed = False
-    required_role = get_role_from_counter(request.required_role_counter)
-    attempted_workers = set()
     new_task_available_type = (
         CommunicationPreference.CommunicationType.NEW_TASK_AVAILABLE.value)
     previously_opted_in_method = (
         StaffingRequestInquiry.CommunicationMethod.PREVIOUSLY_OPTED_IN.value)
+    attempted_workers = []
     worker = None
-    for certification in worker_certifications:
-        worker = certification.worker
-        if worker.id in attempted_workers:
-            continue
-        attempted_workers.add(worker.id)
-        if (_is_worker_assignable(worker, request.task, required_role)
-                and _can_handle_more_work_today(
-                    worker, request.task, worker_allowed_hours)):
+    for worker_id in worker_ids:
+        worker = engine.workers[worker_id]
+        attempted_workers.append(worker_id)
+        if engine.can_handle_more_work_today(worker_id, request.task):
             communication_preference = (
                 CommunicationPreference.objects.get(
                     communication_type=new_task_available_type,
@@ -270,13 +184,14 @@ def _attempt_to_automatically_staff(
                 communication_preference=communication_preference,
                 communication_method=previously_opted_in_method,
                 request=request)
-            handle_staffing_response(
+            response = handle_staffing_response(
                 worker, staffing_request_inquiry.id, is_available=True)
+            engine.record_staffing(worker_id, request, response)
             successfully_staffed = True
             break
     logger.info('Autostaff attempt: %s', json.dumps({
         'successfully_staffed': successfully_staffed,
-        'attempted_workers': list(attempted_workers),
+        'attempted_workers': attempted_workers,
         'most_recent_worker': str(worker) if worker else None,
         'most_recent_worker_id': worker.id if worker else None,
         'staffing_request': str(request),
@@ -288,20 +203,13 @@ def _attempt_to_automatically_staff(
 
 
 def _send_request_inquiries(staffbot, request, worker_batch_size,
-                            worker_certifications):
-    inquiries_sent = 0
-    required_role = get_role_from_counter(request.required_role_counter)
-    contacted_workers = set()
-    for certification in worker_certifications:
-        worker = certification.worker
-        if worker.id in contacted_workers:
-            continue
-        contacted_workers.add(worker.id)
-        if _is_worker_assignable(worker, request.task, required_role):
-            staffbot.send_task_to_worker(worker, request)
-            inquiries_sent += 1
-        if inquiries_sent >= worker_batch_size:
-            break
+                            worker_ids, engine):
+    workers = [engine.workers[worker_id]
+               for worker_id in worker_ids[:worker_batch_size]]
+    # Workers whose messages fail to deliver still count towards the
+    # batch, as they would if they ignored the request.
+    deliver_request_inquiries(staffbot, request, workers)
+    inquiries_sent = len(workers)
 
     # check whether all inquiries have been sent out.
     if inquiries_sent < worker_batch_size:
@@ -315,32 +223,22 @@ def _send_request_inquiries(staffbot, request, worker_batch_size,
 
 
 def staff_or_send_request_inquiries(
-        staffbot, request, worker_batch_size, worker_allowed_hours):
+        staffbot, request, worker_batch_size, engine):
+    # Workers are sorted by their staffing priority first, and then
+    # randomly within competing staffing priorities.
+    assignable_worker_ids = engine.assignable_worker_ids(request)
+    worker_ids = [
+        worker_id for worker_id in engine.candidate_worker_ids(request)
+        if worker_id in assignable_worker_ids]
+    available_worker_ids = [
+        worker_id for worker_id in worker_ids
+        if engine.is_available_this_week(worker_id)]
     # Get Workers that haven't already received an inquiry.
-    workers_with_inquiries = (StaffingRequestInquiry.objects.filter(
-        request=request).distinct().values_list(
-            'communication_preference__worker__id', flat=True))
-    required_role = get_role_from_counter(request.required_role_counter)
-
-    # Sort Worker Certifications by their staffing priority first,
-    # and then randomly within competing staffing priorities.
-    worker_certifications = (
-        WorkerCertification
-        .objects
-        .filter(role=required_role,
-                task_class=WorkerCertification.TaskClass.REAL,
-                certification__in=(request.task
-                                   .step.required_certifications.all()))
-        .order_by('-staffing_priority', '?'))
-    available_worker_certifications = (
-        worker_certifications
-        .filter(worker__availabilities__week=first_day_of_the_week()))
-    uninquired_worker_certifications = (
-        worker_certifications
-        .exclude(worker__id__in=workers_with_inquiries))
+    uninquired_worker_ids = [
+        worker_id for worker_id in worker_ids
+        if not engine.is_inquired(worker_id, request)]
     successfully_staffed = _attempt_to_automatically_staff(
-        staffbot, request, available_worker_certifications,
-        worker_allowed_hours)
+        staffbot, request, available_worker_ids, engine)
     sending_inquiries = StaffBotRequest.Status.SENDING_INQUIRIES.value
     # We consider StaffBotRequests that are done sending inquiries
     # when auto-staffing, since it's possible for a worker to have new
@@ -354,42 +252,84 @@ def staff_or_send_request_inquiries(
         _send_request_inquiries(staffbot,
                                 request,
                                 worker_batch_size,
-                                uninquired_worker_certifications)
+                                uninquired_worker_ids,
+                                engine)
 
 
-def get_available_requests(worker):
+def _get_available_inquiries(workers=None):
     # We want to show a worker only requests for which there is no
     # winner or for which they have not already replied.
     worker_provided_responses = StaffingResponse.objects.filter(
-        request_inquiry__communication_preference__worker=worker)
-    remaining_requests = _exclude_inactive_staffbot_requests(
-        StaffBotRequest.objects
-        .filter(inquiries__communication_preference__worker=worker)
-        .exclude(inquiries__responses__in=worker_provided_responses)
-        .distinct())
+        request_inquiry__request=OuterRef('request'),
+        request_inquiry__communication_preference__worker=OuterRef(
+            'communication_preference__worker'))
     inquiries = (
         StaffingRequestInquiry.objects
-        .filter(request__in=remaining_requests)
-        .filter(communication_preference__worker=worker)
-        .order_by('-request__task__project__priority', 'request__created_at'))
+        .filter(request__in=_exclude_inactive_staffbot_requests(
+            StaffBotRequest.objects.all()))
+        .exclude(Exists(worker_provided_responses)))
+    if workers is not None:
+        inquiries = inquiries.filter(
+            communication_preference__worker__in=workers)
+    return inquiries
+
+
+def get_available_requests_by_worker(workers=None):
+    """
+    Return the staffing requests each worker can still respond to.
+
+    The inquiries for all workers are loaded in one query, and each
+    request's description is rendered once no matter how many workers
+    it was sent to.
+
+    Args:
+        workers ([orchestra.models.Worker]):
+            Workers to look up requests for. Defaults to all workers.
+
+    Returns:
+        requests_by_worker (dict):
+            Maps worker IDs to the metadata of their available requests,
+            ordered by project priority and request creation time.
+            Workers without available requests are left out.
+    """
+    inquiries = (
+        _get_available_inquiries(workers)
+        .select_related(
+            'communication_preference__worker__user',
+            'request__task__step',
+            'request__task__project__workflow_version__workflow')
+        .order_by('-request__task__project__priority',
+                  'request__created_at', 'id'))
     # Because we might send multiple request inquiries to the same
     # worker for the same request (e.g., email and slack), we
     # deduplicate the inquiries so that we will return at most one
-    # inquiry's worth of content here.
-    request_ids = set()
-    contexts = []
+    # inquiry's worth of content per worker and request.
+    worker_request_ids = set()
+    request_details = {}
+    requests_by_worker = defaultdict(list)
     staffbot = StaffBot()
+    reject_next = '?next={}'.format(
+        reverse('orchestra:communication:available_staffing_requests'))
     for inquiry in inquiries:
-        if inquiry.request.id in request_ids:
+        worker_id = inquiry.communication_preference.worker_id
+        if (worker_id, inquiry.request_id) in worker_request_ids:
             continue
-        request_ids.add(inquiry.request.id)
-        metadata = staffbot.get_staffing_request_metadata(inquiry)
-        metadata['detailed_description'] = markdown(
-            metadata['detailed_description'], extras=['target-blank-links'])
-        metadata['reject_url'] += '?next={}'.format(
-            reverse('orchestra:communication:available_staffing_requests'))
-        contexts.append(metadata)
-    return contexts
+        worker_request_ids.add((worker_id, inquiry.request_id))
+        if inquiry.request_id not in request_details:
+            details = staffbot.get_staffing_request_details(inquiry.request)
+            details['detailed_description'] = markdown(
+                details['detailed_description'],
+                extras=['target-blank-links'])
+            request_details[inquiry.request_id] = details
+        metadata = staffbot.get_staffing_request_metadata(
+            inquiry, request_details[inquiry.request_id])
+        metadata['reject_url'] += reject_next
+        requests_by_worker[worker_id].append(metadata)
+    return dict(requests_by_worker)
+
+
+def get_available_requests(worker):
+    return get_available_requests_by_worker([worker]).get(worker.id, [])
 
 
 def warn_staffing_team_about_unstaffed_tasks():
@@ -432,10 +372,10 @@ def warn_staffing_team_about_unstaffed_tasks():
 
 def remind_workers_about_available_tasks():
     staffbot = StaffBot()
-    workers = Worker.objects.all()
+    worker_ids = (_get_available_inquiries()
+                  .values('communication_preference__worker'))
+    workers = Worker.objects.filter(id__in=worker_ids).select_related('user')
     for worker in workers:
-        requests = get_available_requests(worker)
         # TODO(kkamalov): send out reminder only if last request was sent
         # at least ORCHESTRA_STAFFBOT_MIN_FOLLOWUP_TIME ago
-        if len(requests):
-            staffbot.send_worker_tasks_available_reminder(worker)
+        staffbot.send_worker_tasks_available_reminder(worker)
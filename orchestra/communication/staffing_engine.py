@@ -0,0 +1,362 @@
+import random
+
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+from orchestra.models import StaffingRequestInquiry
+from orchestra.models import StaffingResponse
+from orchestra.models import Step
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+from orchestra.models import TimeEntry
+from orchestra.models import Worker
+from orchestra.models import WorkerAvailability
+from orchestra.models import WorkerCertification
+from orchestra.utils.datetime_utils import first_day_of_the_week
+from orchestra.utils.eligibility import CertificationEligibilityIndex
+from orchestra.utils.task_lifecycle import get_role_from_counter
+
+DAY_ABBREVIATIONS = ['mon', 'tues', 'wed', 'thurs', 'fri', 'sat', 'sun']
+
+
+def shuffle_within_priority_tiers(candidates, rng=random):
+    """
+    Order candidates by descending staffing priority, and randomly within
+    competing staffing priorities.
+
+    Args:
+        candidates ([(int, object)]):
+            (staffing priority, candidate) pairs.
+        rng (random.Random):
+            The source of randomness used to shuffle each tier.
+
+    Returns:
+        ordered_candidates ([object]):
+            The candidates in staffing order.
+    """
+    tiers = defaultdict(list)
+    for staffing_priority, candidate in candidates:
+        tiers[staffing_priority].append(candidate)
+    ordered_candidates = []
+    for staffing_priority in sorted(tiers, reverse=True):
+        tier = tiers[staffing_priority]
+        rng.shuffle(tier)
+        ordered_candidates.extend(tier)
+    return ordered_candidates
+
+
+class WorkerCapacityLedger(object):
+    """
+    Tracks how much more work each available worker can take on today.
+
+    For every worker with allowed hours today, the ledger holds the
+    assignable hours of the tasks they won today, the number of those
+    tasks, and the hours they tracked today on other work. The totals
+    are updated in place as workers win tasks, so capacity checks are
+    lookups rather than queries.
+    """
+
+    def __init__(self, allowed_hours):
+        """
+        Args:
+            allowed_hours (dict):
+                Maps worker IDs to the number of hours they are allowed
+                to work today.
+        """
+        self.allowed_hours = dict(allowed_hours)
+        self.assigned_hours = {
+            worker_id: 0 for worker_id in self.allowed_hours}
+        self.task_counts = {worker_id: 0 for worker_id in self.allowed_hours}
+        self.worked_time = {
+            worker_id: timedelta(seconds=0)
+            for worker_id in self.allowed_hours}
+        self._won_task_ids = defaultdict(set)
+        self._worked_time_by_task = defaultdict(
+            lambda: defaultdict(lambda: timedelta(seconds=0)))
+
+    @property
+    def worker_ids(self):
+        return self.allowed_hours.keys()
+
+    def add_time_worked(self, worker_id, task_id, time_worked):
+        """
+        Record time a worker tracked today, on `task_id` or on no task
+        if it is None.
+        """
+        if worker_id not in self.allowed_hours:
+            return
+        self._worked_time_by_task[worker_id][task_id] += time_worked
+        if task_id is None or task_id not in self._won_task_ids[worker_id]:
+            self.worked_time[worker_id] += time_worked
+
+    def add_winning_task(self, worker_id, task_id, hours):
+        """
+        Record that a worker won a task today. Tasks without an estimate
+        are ignored, and time tracked on a won task stops counting
+        separately, since its assignable hours already account for it.
+        """
+        if (worker_id not in self.allowed_hours or hours is None
+                or task_id in self._won_task_ids[worker_id]):
+            return
+        self._won_task_ids[worker_id].add(task_id)
+        self.assigned_hours[worker_id] += hours
+        self.task_counts[worker_id] += 1
+        self.worked_time[worker_id] -= (
+            self._worked_time_by_task[worker_id][task_id])
+
+    def can_take(self, worker_id, hours):
+        """
+        Check whether a worker can take on a task estimated to take
+        `hours` today without exceeding their daily task or hour limits.
+        """
+        if worker_id not in self.allowed_hours or hours is None:
+            return False
+        max_tasks = settings.ORCHESTRA_MAX_AUTOSTAFF_TASKS_PER_DAY
+        # To estimate how much someone worked today, we add:
+        # - the number of assignable hours they were assigned today
+        # - the number of hours they tracked (excluding work completed
+        #   on today's newly assigned work, to avoid double-counting)
+        # We do not attempt to estimate the amount of "unexpected" work,
+        #   like iteration time on an old project the expert has learned
+        #   about over Slack but hasn't yet logged for the day.
+        hours_worked = self.worked_time[worker_id].total_seconds() / 3600.0
+        return ((self.task_counts[worker_id] + 1 <= max_tasks)
+                and (self.assigned_hours[worker_id]
+                     + hours_worked
+                     + hours <= self.allowed_hours[worker_id]))
+
+
+class StaffingEngine(object):
+    """
+    Decides a batch of StaffBot requests against in-memory indexes.
+
+    Certifications, availabilities, today's staffing winners and time
+    entries, and existing assignments are loaded once for the batch
+    instead of once per candidate worker. Assignments made while the
+    batch is processed are recorded with `record_staffing` so that later
+    requests in the batch see them, just as they would in the database.
+    """
+
+    def __init__(self, requests, seed=None):
+        """
+        Args:
+            requests ([orchestra.models.StaffBotRequest]):
+                The requests to be decided, with their tasks and steps
+                selected.
+            seed (str):
+                If specified, candidates for each request are shuffled
+                reproducibly from this seed and the request's ID.
+        """
+        self.requests = list(requests)
+        self.seed = seed
+        self.today = timezone.now().date()
+        self._task_hours = {}
+        # Certifications are looked up once per run, so changes made
+        # during the run are seen by the next one.
+        self.certification_eligibility = CertificationEligibilityIndex()
+
+        step_ids = {request.task.step_id for request in self.requests}
+        self.required_certifications = defaultdict(set)
+        for step_id, certification_id in (
+                Step.required_certifications.through.objects
+                .filter(step_id__in=step_ids)
+                .values_list('step_id', 'certification_id')):
+            self.required_certifications[step_id].add(certification_id)
+
+        self._load_certifications()
+        self.workers = Worker.objects.select_related('user').in_bulk(
+            {worker_id
+             for candidates in self.candidates.values()
+             for _, worker_id in candidates})
+        self._load_availabilities()
+
+        task_ids = {request.task_id for request in self.requests}
+        self.assigned_workers = defaultdict(set)
+        self._load_assigned_workers(task_ids)
+        self.rejected_workers = set()
+        self._load_rejected_workers(self.workers.keys())
+
+        self.inquired_workers = defaultdict(set)
+        for request_id, worker_id in (
+                StaffingRequestInquiry.objects
+                .filter(request__in=self.requests)
+                .values_list('request_id',
+                             'communication_preference__worker_id')):
+            self.inquired_workers[request_id].add(worker_id)
+
+        self._load_winning_tasks(self.capacity.worker_ids)
+        for worker_id, task_id, time_worked in (
+                TimeEntry.objects
+                .filter(date=self.today, worker__in=self.capacity.worker_ids)
+                .values_list('worker_id', 'assignment__task_id',
+                             'time_worked')):
+            self.capacity.add_time_worked(worker_id, task_id, time_worked)
+
+    def _load_certifications(self):
+        certification_ids = set().union(
+            *self.required_certifications.values())
+        # Candidates for each (role, certification).
+        self.candidates = defaultdict(list)
+        for worker_id, certification_id, role, staffing_priority in (
+                WorkerCertification.objects
+                .filter(task_class=WorkerCertification.TaskClass.REAL,
+                        certification__in=certification_ids)
+                .order_by('id')
+                .values_list('worker_id', 'certification_id', 'role',
+                             'staffing_priority')):
+            self.candidates[(role, certification_id)].append(
+                (staffing_priority, worker_id))
+
+    def _load_availabilities(self):
+        week = first_day_of_the_week()
+        # Any availability row for the week makes a worker a candidate
+        # for automatic staffing, even one that was deleted.
+        self.available_workers = set(
+            WorkerAvailability.unsafe_objects
+            .filter(week=week, worker__in=self.workers.keys())
+            .values_list('worker_id', flat=True))
+        # A worker's allowed hours is the smaller of their daily
+        # (desired) availability and their max hours per day.
+        hours_field = 'hours_available_{}'.format(
+            DAY_ABBREVIATIONS[self.today.weekday()])
+        self.capacity = WorkerCapacityLedger({
+            worker_id: min(hours_available, max_hours)
+            for worker_id, hours_available, max_hours in (
+                WorkerAvailability.objects
+                .filter(week=week, worker__in=self.workers.keys())
+                .values_list('worker_id', hours_field,
+                             'worker__max_autostaff_hours_per_day'))
+        })
+
+    def _load_assigned_workers(self, task_ids):
+        for task_id in task_ids:
+            self.assigned_workers[task_id] = set()
+        for task_id, worker_id in (
+                TaskAssignment.objects
+                .filter(task__in=task_ids)
+                .values_list('task_id', 'worker_id')):
+            self.assigned_workers[task_id].add(worker_id)
+
+    def _load_rejected_workers(self, worker_ids):
+        if not settings.ORCHESTRA_ENFORCE_NO_NEW_TASKS_DURING_REVIEW:
+            return
+        worker_ids = set(worker_ids)
+        self.rejected_workers -= worker_ids
+        self.rejected_workers.update(
+            TaskAssignment.objects
+            .filter(worker__in=worker_ids,
+                    status=TaskAssignment.Status.PROCESSING,
+                    task__status=Task.Status.POST_REVIEW_PROCESSING)
+            .values_list('worker_id', flat=True))
+
+    def _load_winning_tasks(self, worker_ids):
+        # Because we're looking at StaffingResponse objects to
+        # determine assigned tasks for a worker, we don't consider
+        # tasks that were assigned manually without an open StaffBot
+        # request. For example, we ignore tasks staffed by directly
+        # typing a worker's username into the projman interface when
+        # an open StaffBot request does not exist for the task. In
+        # practice, such situations are rare (new tasks tend to be
+        # auto-StaffBotted), and when the situations arise, it's
+        # unclear what the estimate for the assignable hours is.
+        winning_task_ids = list(
+            StaffingResponse.objects
+            .filter(
+                request_inquiry__communication_preference__worker__in=(
+                    worker_ids),
+                is_winner=True,
+                created_at__gte=self.today,
+                created_at__lt=self.today + timedelta(days=1))
+            .values_list(
+                'request_inquiry__communication_preference__worker_id',
+                'request_inquiry__request__task_id'))
+        tasks = Task.objects.select_related('step').in_bulk(
+            {task_id for _, task_id in winning_task_ids})
+        for worker_id, task_id in winning_task_ids:
+            self.capacity.add_winning_task(
+                worker_id, task_id, self._get_assignable_hours(tasks[task_id]))
+
+    def _get_assignable_hours(self, task):
+        if task.id not in self._task_hours:
+            self._task_hours[task.id] = task.get_assignable_hours()
+        return self._task_hours[task.id]
+
+    def candidate_worker_ids(self, request):
+        """
+        Return the IDs of workers certified for the request's role,
+        sorted by their staffing priority first, and then randomly within
+        competing staffing priorities.
+
+        Args:
+            request (orchestra.models.StaffBotRequest):
+                The request to be staffed.
+
+        Returns:
+            worker_ids ([int]):
+                IDs of candidate workers, without duplicates.
+        """
+        role = get_role_from_counter(request.required_role_counter)
+        candidates = [
+            candidate
+            for certification_id in sorted(self.required_certifications[
+                request.task.step_id])
+            for candidate in self.candidates[(role, certification_id)]]
+        if self.seed is None:
+            rng = random.Random()
+        else:
+            rng = random.Random('{}-{}'.format(self.seed, request.id))
+        worker_ids = []
+        seen_worker_ids = set()
+        for worker_id in shuffle_within_priority_tiers(candidates, rng):
+            if worker_id not in seen_worker_ids:
+                seen_worker_ids.add(worker_id)
+                worker_ids.append(worker_id)
+        return worker_ids
+
+    def is_available_this_week(self, worker_id):
+        return worker_id in self.available_workers
+
+    def is_inquired(self, worker_id, request):
+        return worker_id in self.inquired_workers[request.id]
+
+    def assignable_worker_ids(self, request):
+        """
+        Return the IDs of workers who can be staffed on a request's task:
+        they are certified for the task with StaffBot enabled, have no
+        pending reviewer feedback, and aren't already assigned to it.
+        """
+        eligible_worker_ids = self.certification_eligibility.eligible_workers(
+            request.task.step,
+            get_role_from_counter(request.required_role_counter),
+            require_staffbot_enabled=True)
+        if eligible_worker_ids is None:
+            eligible_worker_ids = self.workers.keys()
+        return (set(eligible_worker_ids)
+                - self.rejected_workers
+                - self.assigned_workers[request.task_id])
+
+    def can_handle_more_work_today(self, worker_id, task):
+        """
+        Check whether a worker has room for `task` today, given their
+        allowed hours, the tasks they won today, and the hours they
+        tracked today.
+        """
+        return self.capacity.can_take(
+            worker_id, self._get_assignable_hours(task))
+
+    def record_staffing(self, worker_id, request, response):
+        """
+        Update the indexes touched by staffing a worker on a request's
+        task, so that later requests in the batch are decided against
+        the current assignments and load.
+        """
+        previous_worker_ids = self.assigned_workers[request.task_id]
+        self._load_assigned_workers([request.task_id])
+        self._load_rejected_workers(
+            previous_worker_ids | self.assigned_workers[request.task_id])
+        if response is not None and response.is_winner:
+            self.capacity.add_winning_task(
+                worker_id, request.task_id,
+                self._get_assignable_hours(request.task))
@@ -0,0 +1,87 @@
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+
+class FakeSlackServer(object):
+    """
+    A local HTTP server that answers Slack `chat.postMessage` requests.
+
+    Messages to `unknown_channels` fail like they would for a missing
+    channel, and the first `rate_limited_requests` requests are answered
+    with HTTP 429 and a `Retry-After` of `retry_after` seconds.
+
+    Use `url_for` in place of `slacker.get_api_url` to send Slack API
+    requests to the server.
+    """
+
+    def __init__(self, unknown_channels=(), rate_limited_requests=0,
+                 retry_after=0):
+        self.unknown_channels = set(unknown_channels)
+        self.rate_limited_requests = rate_limited_requests
+        self.retry_after = retry_after
+        self.messages = []
+        self.num_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), self._get_handler_class())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def url_for(self, method):
+        host, port = self._server.server_address
+        return 'http://{}:{}/api/{}'.format(host, port, method)
+
+    def _respond(self, path, data):
+        with self._lock:
+            self.num_requests += 1
+            if self.num_requests <= self.rate_limited_requests:
+                return 429, {'Retry-After': str(self.retry_after)}, {
+                    'ok': False, 'error': 'ratelimited'}
+            if path != '/api/chat.postMessage':
+                return 200, {}, {'ok': False, 'error': 'unknown_method'}
+            channel = data.get('channel', [None])[0]
+            if channel in self.unknown_channels:
+                return 200, {}, {'ok': False, 'error': 'channel_not_found'}
+            self.messages.append({
+                'channel': channel,
+                'text': data.get('text', [''])[0],
+            })
+            return 200, {}, {'ok': True, 'channel': channel}
+
+    def _get_handler_class(self):
+        fake_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                data = parse_qs(self.rfile.read(length).decode('utf-8'))
+                status, headers, body = fake_server._respond(
+                    urlparse(self.path).path, data)
+                content = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -24,8 +24,11 @@ class MockSlacker(MagicMock):
         self.populate_preexisting_groups()
 
     def populate_preexisting_groups(self):
+        names = {group['name']
+                 for group in MOCK_SLACK_API_DATA['channels'].values()}
         for group_name in PREEXISTING_GROUPS:
-            self.conversations.create(group_name, is_private=True)
+            if group_name.strip('#') not in names:
+                self.conversations.create(group_name, is_private=True)
 
     def get_messages(self, group_id):
         return MOCK_SLACK_API_DATA['channels'][group_id]['messages']
@@ -81,6 +84,9 @@ class BaseAPI(object):
 
 class Conversations(BaseAPI):
     def create(self, group_name, is_private=False):
+        if any(group['name'] == group_name.strip('#')
+               for group in MOCK_SLACK_API_DATA['channels'].values()):
+            raise slacker.Error('name_taken')
         group_id = str(len(MOCK_SLACK_API_DATA['channels']))
         MOCK_SLACK_API_DATA['channels'][group_id] = {
             'id': group_id,
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from slacker import Slacker
+
+from orchestra.bots.staffbot import StaffBot
+from orchestra.communication.delivery import ChannelRateLimiter
+from orchestra.communication.delivery import deliver_request_inquiries
+from orchestra.communication.errors import DeliveryError
+from orchestra.communication.errors import SlackError
+from orchestra.communication.errors import SlackRateLimitError
+from orchestra.communication.tests.helpers.fake_slack_server import \
+    FakeSlackServer
+from orchestra.models import CommunicationPreference
+from orchestra.models import StaffingRequestInquiry
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import CommunicationPreferenceFactory
+from orchestra.tests.helpers.fixtures import StaffBotRequestFactory
+from orchestra.tests.helpers.fixtures import WorkerFactory
+
+
+class DeliverRequestInquiriesTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.staffbot = StaffBot()
+        self.request = StaffBotRequestFactory(
+            task__step__is_human=True)
+        self.workers = [
+            self._create_worker('U{}'.format(index)) for index in range(5)]
+
+    def _create_worker(self, slack_user_id):
+        worker = WorkerFactory(
+            slack_user_id=slack_user_id,
+            user__email='{}@example.com'.format(slack_user_id))
+        CommunicationPreferenceFactory(
+            worker=worker,
+            communication_type=(
+                CommunicationPreference.CommunicationType
+                .NEW_TASK_AVAILABLE.value))
+        return worker
+
+    def _deliver(self, fake_slack, workers, **kwargs):
+        # Talk to the fake server with a real Slack client rather than the
+        # mock that tests use by default.
+        self.staffbot.slack.chat = Slacker('token').chat
+        with patch('slacker.get_api_url', new=fake_slack.url_for):
+            return deliver_request_inquiries(
+                self.staffbot, self.request, workers, **kwargs)
+
+    def _get_emails(self, mock_mail):
+        return sorted(call[0][3][0] for call in mock_mail.call_args_list)
+
+    @patch('orchestra.bots.staffbot.send_mail')
+    def test_deliver_request_inquiries(self, mock_mail):
+        with FakeSlackServer() as fake_slack:
+            failures = self._deliver(fake_slack, self.workers, max_threads=3)
+
+        self.assertEqual(failures, {})
+        inquiries = StaffingRequestInquiry.objects.filter(request=self.request)
+        self.assertEqual(inquiries.count(), 2 * len(self.workers))
+        self.assertEqual(
+            sorted(message['channel'] for message in fake_slack.messages),
+            sorted(worker.slack_user_id for worker in self.workers))
+        self.assertEqual(
+            self._get_emails(mock_mail),
+            sorted(worker.user.email for worker in self.workers))
+        for message in fake_slack.messages:
+            self.assertIn('accept', message['text'])
+
+    @patch('orchestra.bots.staffbot.send_mail')
+    def test_deliver_request_inquiries_rate_limited(self, mock_mail):
+        with FakeSlackServer(rate_limited_requests=2) as fake_slack:
+            failures = self._deliver(fake_slack, self.workers[:2])
+
+        self.assertEqual(failures, {})
+        self.assertEqual(fake_slack.num_requests, 4)
+        self.assertEqual(len(fake_slack.messages), 2)
+
+    @patch('orchestra.bots.staffbot.send_mail')
+    def test_deliver_request_inquiries_keeps_rate_limited(self, mock_mail):
+        with FakeSlackServer(rate_limited_requests=100) as fake_slack:
+            failures = self._deliver(fake_slack, self.workers[:1])
+
+        self.assertEqual(list(failures), [self.workers[0].id])
+        self.assertIsInstance(failures[self.workers[0].id][0],
+                              SlackRateLimitError)
+        self.assertEqual(fake_slack.messages, [])
+        # The email was still sent.
+        self.assertEqual(mock_mail.call_count, 1)
+
+    @patch('orchestra.bots.staffbot.send_mail')
+    def test_deliver_request_inquiries_failures(self, mock_mail):
+        no_slack_worker = self._create_worker(None)
+        no_preference_worker = WorkerFactory(slack_user_id='U100')
+        workers = self.workers + [no_slack_worker, no_preference_worker]
+
+        with FakeSlackServer(unknown_channels={'U0'}) as fake_slack:
+            failures = self._deliver(fake_slack, workers)
+
+        self.assertEqual(
+            set(failures),
+            {self.workers[0].id, no_slack_worker.id, no_preference_worker.id})
+        self.assertIsInstance(failures[self.workers[0].id][0], SlackError)
+        self.assertIsInstance(failures[no_slack_worker.id][0], SlackError)
+        self.assertIsInstance(failures[no_preference_worker.id][0],
+                              DeliveryError)
+        # Failed workers don't stop messages to the rest of the batch.
+        self.assertEqual(
+            sorted(message['channel'] for message in fake_slack.messages),
+            ['U1', 'U2', 'U3', 'U4'])
+        self.assertEqual(mock_mail.call_count, len(self.workers) + 1)
+        self.assertFalse(StaffingRequestInquiry.objects.filter(
+            communication_preference__worker=no_preference_worker).exists())
+
+
+class ChannelRateLimiterTestCase(OrchestraTestCase):
+
+    @patch('orchestra.communication.delivery.time.sleep')
+    @patch('orchestra.communication.delivery.time.monotonic')
+    def test_wait(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        rate_limiter = ChannelRateLimiter(timedelta(seconds=2))
+        rate_limiter.wait()
+        mock_sleep.assert_not_called()
+        rate_limiter.wait()
+        mock_sleep.assert_called_once_with(2)
+
+        mock_sleep.reset_mock()
+        mock_monotonic.return_value = 110
+        rate_limiter.pause(5)
+        rate_limiter.wait()
+        mock_sleep.assert_called_once_with(5)
@@ -1,15 +1,21 @@
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from orchestra.bots.errors import StaffingResponseException
 from orchestra.communication.staffing import get_available_requests
+from orchestra.communication.staffing import \
+    get_available_requests_by_worker
 from orchestra.communication.staffing import handle_staffing_response
 from orchestra.communication.staffing import \
     remind_workers_about_available_tasks
 from orchestra.communication.staffing import address_staffing_requests
+from orchestra.communication.staffing import check_responses_complete
+from orchestra.communication.staffing_engine import StaffingEngine
 from orchestra.communication.staffing import \
     warn_staffing_team_about_unstaffed_tasks
 from orchestra.communication.utils import mark_worker_as_winner
@@ -358,6 +364,98 @@ class StaffingTestCase(OrchestraTestCase):
         self.assertEqual(
             total_inquiries + 1, StaffingRequestInquiry.objects.count())
 
+    @override_settings(ORCHESTRA_MAX_AUTOSTAFF_TASKS_PER_DAY=1)
+    @patch('orchestra.communication.staffing.message_experts_slack_group')
+    def test_address_staffing_requests_within_batch(self, mock_slack):
+        availability = WorkerAvailabilityFactory(worker=self.worker)
+        for day in ['mon', 'tues', 'wed', 'thurs', 'fri', 'sat', 'sun']:
+            setattr(availability, 'hours_available_{}'.format(day), 9)
+        availability.save()
+        self.worker.max_autostaff_hours_per_day = 9
+        self.worker.save()
+        request = StaffBotRequestFactory(task__step__is_human=True)
+        request.task.step.required_certifications.add(self.certification)
+        request.task.step.assignable_hours_function = (
+            self.staffing_request_inquiry.request.task.step
+            .assignable_hours_function)
+        request.task.step.save()
+
+        # The worker is staffed on the older request, which uses up
+        # their tasks for the day, so they are only sent an inquiry
+        # for the newer request in the same batch.
+        address_staffing_requests(worker_batch_size=1,
+                                  frequency=timedelta(minutes=0))
+        self.assertTrue(
+            self.staffing_request_inquiry.request.task
+            .is_worker_assigned(self.worker))
+        self.assertFalse(request.task.is_worker_assigned(self.worker))
+        self.assertEqual(
+            StaffingRequestInquiry.objects.filter(request=request).count(),
+            2)
+
+    @patch('orchestra.communication.staffing.message_experts_slack_group')
+    def test_address_staffing_requests_num_queries(self, mock_slack):
+        def _create_unassignable_workers(num_workers):
+            for _ in range(num_workers):
+                WorkerCertificationFactory(
+                    certification=self.certification,
+                    staffbot_enabled=False)
+
+        _create_unassignable_workers(2)
+        address_staffing_requests(worker_batch_size=1,
+                                  frequency=timedelta(minutes=0))
+        with CaptureQueriesContext(connection) as queries:
+            address_staffing_requests(worker_batch_size=1,
+                                      frequency=timedelta(minutes=0))
+
+        # Deciding a request doesn't take more queries as the number of
+        # candidate workers grows.
+        _create_unassignable_workers(10)
+        self.assertNumQueries(len(queries), address_staffing_requests,
+                              worker_batch_size=1,
+                              frequency=timedelta(minutes=0))
+
+    def test_seeded_candidate_order(self):
+        for _ in range(5):
+            self._create_worker(0)
+        request_id = self.staffing_request_inquiry.request.id
+
+        def _candidate_worker_ids(seed):
+            engine = StaffingEngine(
+                StaffBotRequest.objects.filter(id=request_id)
+                .select_related('task__step'),
+                seed=seed)
+            return engine.candidate_worker_ids(engine.requests[0])
+
+        worker_ids = _candidate_worker_ids('debug')
+        self.assertEqual(len(worker_ids), 6)
+        self.assertEqual(worker_ids, _candidate_worker_ids('debug'))
+
+    def test_winning_tasks_read_once(self):
+        availability = WorkerAvailabilityFactory(worker=self.worker)
+        for day in ['mon', 'tues', 'wed', 'thurs', 'fri', 'sat', 'sun']:
+            setattr(availability, 'hours_available_{}'.format(day), 9)
+        availability.save()
+        self.worker.max_autostaff_hours_per_day = 9
+        self.worker.save()
+        StaffingResponseFactory(request_inquiry=self.staffing_request_inquiry,
+                                is_available=True,
+                                is_winner=True)
+        request = StaffBotRequestFactory(task__step__is_human=True)
+        request.task.step.required_certifications.add(self.certification)
+
+        with CaptureQueriesContext(connection) as queries:
+            engine = StaffingEngine(
+                StaffBotRequest.objects.filter(id=request.id)
+                .select_related('task__step'))
+        winning_queries = [
+            query for query in queries.captured_queries
+            if 'is_winner' in query['sql'] and
+            'orchestra_staffingresponse' in query['sql']]
+        self.assertEqual(len(winning_queries), 1)
+        self.assertEqual(engine.capacity.task_counts[self.worker.id], 1)
+        self.assertEqual(engine.capacity.assigned_hours[self.worker.id], 3)
+
     @patch('orchestra.communication.staffing.message_experts_slack_group')
     def test_handle_staffing_response_all_rejected(self, mock_slack):
         worker2 = WorkerFactory()
@@ -383,6 +481,46 @@ class StaffingTestCase(OrchestraTestCase):
 
         self.assertEqual(mock_slack.call_count, 1)
 
+    @patch('orchestra.communication.staffing.message_experts_slack_group')
+    def test_check_responses_complete(self, mock_slack):
+        request = self.staffing_request_inquiry.request
+        worker2, communication_preference2 = self._create_worker(0)
+        inquiry2 = StaffingRequestInquiryFactory(
+            communication_preference=communication_preference2,
+            request=request)
+        StaffingResponseFactory(
+            request_inquiry=self.staffing_request_inquiry,
+            is_available=False)
+
+        # One worker hasn't responded yet.
+        with self.assertNumQueries(1):
+            check_responses_complete(request)
+        request.refresh_from_db()
+        self.assertEqual(request.status,
+                         StaffBotRequest.Status.SENDING_INQUIRIES.value)
+
+        # A deleted winner doesn't keep the request open.
+        StaffingResponseFactory(
+            request_inquiry=inquiry2, is_available=True, is_winner=True,
+            is_deleted=True)
+        check_responses_complete(request)
+        request.refresh_from_db()
+        self.assertEqual(request.status,
+                         StaffBotRequest.Status.CLOSED.value)
+        self.assertEqual(mock_slack.call_count, 1)
+
+    @patch('orchestra.communication.staffing.message_experts_slack_group')
+    def test_check_responses_complete_has_winner(self, mock_slack):
+        request = self.staffing_request_inquiry.request
+        StaffingResponseFactory(
+            request_inquiry=self.staffing_request_inquiry,
+            is_available=True, is_winner=True)
+        check_responses_complete(request)
+        request.refresh_from_db()
+        self.assertEqual(request.status,
+                         StaffBotRequest.Status.SENDING_INQUIRIES.value)
+        self.assertEqual(mock_slack.call_count, 0)
+
     @patch('orchestra.communication.staffing.message_experts_slack_group')
     def test_get_available_request(self, mock_slack):
         # Close all open requests so new worker doesn't receive them.
@@ -456,6 +594,40 @@ class StaffingTestCase(OrchestraTestCase):
         self.assertEqual(len(get_available_requests(self.worker)), 0)
         self.assertEqual(len(get_available_requests(worker2)), 1)
 
+    @patch('orchestra.communication.staffing.markdown',
+           side_effect=lambda text, extras: text)
+    def test_get_available_requests_by_worker(self, mock_markdown):
+        request = self.staffing_request_inquiry.request
+        workers = [self.worker]
+        for _ in range(3):
+            worker, communication_preference = self._create_worker(0)
+            # Email and Slack inquiries for the same request.
+            for _ in range(2):
+                StaffingRequestInquiryFactory(
+                    communication_preference=communication_preference,
+                    request=request)
+            workers.append(worker)
+        StaffingResponseFactory(
+            request_inquiry=self.staffing_request_inquiry,
+            is_available=False)
+
+        with self.assertNumQueries(1):
+            requests_by_worker = get_available_requests_by_worker()
+        self.assertEqual(set(requests_by_worker),
+                         {worker.id for worker in workers[1:]})
+        for worker in workers[1:]:
+            requests = requests_by_worker[worker.id]
+            self.assertEqual(len(requests), 1)
+            self.assertEqual(requests[0]['user'], worker.user)
+            self.assertEqual(requests[0]['role_counter'],
+                             request.required_role_counter)
+        # The request's description is rendered once for all workers.
+        self.assertEqual(mock_markdown.call_count, 1)
+
+        self.assertEqual(
+            get_available_requests_by_worker(workers[:2]),
+            {workers[1].id: requests_by_worker[workers[1].id]})
+
     @patch('orchestra.communication.staffing.message_internal_slack_group')
     def test_warn_staffing_team_about_unstaffed_tasks(self, mock_slack):
         warn_staffing_team_about_unstaffed_tasks()
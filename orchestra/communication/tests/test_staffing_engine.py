@@ -0,0 +1,70 @@
+import random
+
+from datetime import timedelta
+
+from django.test import override_settings
+
+from orchestra.communication.staffing_engine import WorkerCapacityLedger
+from orchestra.communication.staffing_engine import \
+    shuffle_within_priority_tiers
+from orchestra.tests.helpers import OrchestraTestCase
+
+
+class WorkerCapacityLedgerTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ledger = WorkerCapacityLedger({1: 8, 2: 4})
+
+    def test_unavailable_worker(self):
+        self.assertFalse(self.ledger.can_take(3, 1))
+        self.assertFalse(self.ledger.can_take(1, None))
+        self.assertTrue(self.ledger.can_take(1, 8))
+        self.assertFalse(self.ledger.can_take(1, 9))
+
+    def test_winning_tasks_replace_time_worked(self):
+        self.ledger.add_time_worked(1, None, timedelta(hours=1))
+        self.ledger.add_time_worked(1, 10, timedelta(hours=2))
+        self.assertTrue(self.ledger.can_take(1, 5))
+        self.assertFalse(self.ledger.can_take(1, 6))
+
+        # The 2 hours tracked on task 10 are covered by its estimate.
+        self.ledger.add_winning_task(1, 10, 3)
+        self.assertEqual(self.ledger.task_counts[1], 1)
+        self.assertTrue(self.ledger.can_take(1, 4))
+        self.assertFalse(self.ledger.can_take(1, 5))
+
+        # Winning the same task again doesn't count twice.
+        self.ledger.add_winning_task(1, 10, 3)
+        self.assertEqual(self.ledger.task_counts[1], 1)
+        self.assertTrue(self.ledger.can_take(1, 4))
+
+        # Time tracked on a won task after the fact is ignored as well.
+        self.ledger.add_time_worked(1, 10, timedelta(hours=1))
+        self.assertTrue(self.ledger.can_take(1, 4))
+
+        # Other workers are unaffected.
+        self.assertTrue(self.ledger.can_take(2, 4))
+
+    @override_settings(ORCHESTRA_MAX_AUTOSTAFF_TASKS_PER_DAY=2)
+    def test_max_tasks(self):
+        self.ledger.add_winning_task(2, 10, None)
+        self.ledger.add_winning_task(2, 11, 1)
+        self.assertTrue(self.ledger.can_take(2, 1))
+        self.ledger.add_winning_task(2, 12, 1)
+        self.assertFalse(self.ledger.can_take(2, 1))
+
+
+class ShuffleWithinPriorityTiersTestCase(OrchestraTestCase):
+
+    def test_shuffle_within_priority_tiers(self):
+        candidates = [(priority, (priority, index))
+                      for index in range(20) for priority in (-1, 0, 3)]
+        ordered = shuffle_within_priority_tiers(candidates)
+        self.assertEqual(sorted(ordered, key=lambda c: -c[0]), ordered)
+        self.assertEqual(sorted(ordered), sorted(c for _, c in candidates))
+
+        # A seeded shuffle is reproducible.
+        self.assertEqual(
+            shuffle_within_priority_tiers(candidates, random.Random(1)),
+            shuffle_within_priority_tiers(candidates, random.Random(1)))
@@ -6,6 +6,10 @@ class CreationPolicyError(Exception):
     pass
 
 
+class DashboardCursorError(Exception):
+    pass
+
+
 class IllegalTaskSubmission(Exception):
     pass
 
@@ -14,6 +18,10 @@ class InvalidSlugValue(Exception):
     pass
 
 
+class JSONPatchError(Exception):
+    pass
+
+
 class MachineExecutionError(Exception):
     pass
 
@@ -22,6 +30,10 @@ class ModelSaveError(Exception):
     pass
 
 
+class ProjectChangesCursorError(Exception):
+    pass
+
+
 class ReviewPolicyError(Exception):
     pass
 
@@ -46,6 +58,10 @@ class TaskAssignmentError(Exception):
     pass
 
 
+class TaskDataVersionError(Exception):
+    pass
+
+
 class TaskDependencyError(Exception):
     pass
 
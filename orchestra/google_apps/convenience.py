@@ -130,22 +130,37 @@ def create_folder_with_permissions(parent_id, folder_name, permissions=None):
 def create_project_google_folder(project):
     """
     Create drive folder for project information
+
+    The folder is saved to the project as soon as it exists, and a
+    project's existing folder and scratchpad are reused, so that a call
+    that failed partway through can be retried without creating a second
+    folder.
     """
-    today = date.today().strftime('%Y-%m-%d')
-    parent_id = (project.project_data.get('client_folder_id') or
-                 settings.GOOGLE_PROJECT_ROOT_ID)
-    folder = create_folder_with_permissions(
-        parent_id,
-        ' '.join((today, project.short_description)),
-        [write_with_link_permission])
-    folder_id = folder.get('id')
-    project.project_data['project_folder_id'] = folder_id
-    project.scratchpad_url = create_document_from_template(
-        SCRATCHPAD_TEMPLATE_ID,
-        'Scratchpad',
-        [folder_id],
-        [write_with_link_permission])['alternateLink']
-    project.save()
+    service = Service(settings.GOOGLE_P12_PATH,
+                      settings.GOOGLE_SERVICE_EMAIL)
+    folder_id = project.project_data.get('project_folder_id')
+    if folder_id:
+        folder = {'id': folder_id}
+    else:
+        today = date.today().strftime('%Y-%m-%d')
+        parent_id = (project.project_data.get('client_folder_id') or
+                     settings.GOOGLE_PROJECT_ROOT_ID)
+        folder = service.insert_folder(
+            ' '.join((today, project.short_description)), parent_id)
+        if folder is None:
+            raise GoogleDriveError('Could not create a folder')
+        folder_id = folder.get('id')
+        project.project_data['project_folder_id'] = folder_id
+        project.save()
+    service.add_permission(folder_id, write_with_link_permission)
+
+    if not project.scratchpad_url:
+        project.scratchpad_url = create_document_from_template(
+            SCRATCHPAD_TEMPLATE_ID,
+            'Scratchpad',
+            [folder_id],
+            [write_with_link_permission])['alternateLink']
+        project.save()
     return folder
 
 
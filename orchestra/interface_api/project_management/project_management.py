@@ -9,6 +9,8 @@ from orchestra.communication.slack import OrchestraSlackService
 from orchestra.models import Project
 from orchestra.models import Worker
 from orchestra.project_api.api import get_project_information
+from orchestra.utils.etags import make_etag
+from orchestra.utils.project_changes import get_project_versions
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +52,22 @@ def project_management_information(project_id):
     return project_information
 
 
+def project_management_information_etag(project_id):
+    """
+    Return the ETag of the output of `project_management_information`,
+    or None if the project doesn't exist.
+    """
+    versions = get_project_versions([project_id])
+    if not versions:
+        return None
+    (graph_stamp, version), = versions.values()
+    # NOTE: In-progress iterations are reported as ending at the time of
+    # the request, which is not part of the ETag, so clients holding a
+    # tagged response keep the end time it was served with.
+    return make_etag('project_management', project_id, version,
+                     graph_stamp)
+
+
 def edit_slack_membership(project_id, username, action):
     slack = OrchestraSlackService()
     slack_user_id = Worker.objects.get(user__username=username).slack_user_id
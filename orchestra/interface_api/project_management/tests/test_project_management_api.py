@@ -140,6 +140,33 @@ class ProjectManagementAPITestCase(OrchestraTestCase):
             expected_assignment,
             {k: sample_assignment[k] for k in expected_assignment.keys()})
 
+    def test_project_information_api_etag(self):
+        project = self.projects['project_management_project']
+
+        def request(**headers):
+            return self.api_client.post(
+                reverse('orchestra:orchestra:project_management:'
+                        'project_information'),
+                json.dumps({'project_id': project.id}),
+                content_type='application/json', **headers)
+
+        response = request()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = request(HTTP_IF_NONE_MATCH='W/{}'.format(etag))
+        self.assertEqual(response.status_code, 304)
+
+        project.priority += 1
+        project.save()
+        response = request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            load_encoded_json(response.content)[str(project.id)]['project'][
+                'priority'],
+            project.priority)
+
     def test_reassign_assignment_api(self):
         task = self.tasks['project_management_task']
         # Reassign entry-level assignment to entry-level worker
@@ -270,7 +297,8 @@ class ProjectManagementAPITestCase(OrchestraTestCase):
         task = Task.objects.get(project=project)
         assign_task(self.workers[1].id, task.id)
         complete_and_skip_task(task.id)
-        create_subsequent_tasks(project)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_subsequent_tasks(project)
         self.assertTrue(mock_archive.called)
 
         response = self.api_client.post(
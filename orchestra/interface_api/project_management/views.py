@@ -23,6 +23,7 @@ from orchestra.models import StaffBotRequest
 from orchestra.models import Task
 from orchestra.models import Worker
 from orchestra.project_api.serializers import ProjectSummarySerializer
+from orchestra.utils.etags import conditional_json_response
 from orchestra.utils.load_json import load_encoded_json
 from orchestra.utils.revert import revert_task_to_iteration
 from orchestra.utils.task_lifecycle import assign_task
@@ -60,7 +61,12 @@ def project_information_api(request):
             worker.assignments.filter(task__project=project_id).exists()):
         raise PermissionDenied
     try:
-        return project_management.project_management_information(project_id)
+        return conditional_json_response(
+            request,
+            project_management.project_management_information_etag(
+                project_id),
+            lambda: project_management.project_management_information(
+                project_id))
     except Project.DoesNotExist:
         raise BadRequest('Project not found for the given id.')
 
@@ -175,7 +181,7 @@ def staff_task(request):
         task = Task.objects.get(id=data.get('task_id'))
         request_cause = StaffBotRequest.RequestCause.USER.value
         bot = StaffBot()
-        assignment = current_assignment(task)
+        assignment = current_assignment(task, defer_data=True)
         is_restaff = assignment is not None
         if is_restaff:
             username = assignment.worker.user.username
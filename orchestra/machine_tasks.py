@@ -94,4 +94,4 @@ def execute(project_id, step_slug):
         iteration.end_datetime = timezone.now()
         iteration.save()
 
-        create_subsequent_tasks(project)
+        create_subsequent_tasks(project, completed_step=step)
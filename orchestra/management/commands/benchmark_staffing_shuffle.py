@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orchestra.communication.staffing_engine import \
+    shuffle_within_priority_tiers
+from orchestra.models import Certification
+from orchestra.models import Worker
+from orchestra.models import WorkerCertification
+from orchestra.models import Workflow
+
+
+class Command(BaseCommand):
+    help = ('Compares ordering StaffBot candidates with SQL random ordering '
+            'against shuffling them within priority tiers in the '
+            'application. Synthetic certifications are created in a '
+            'transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[10000, 100000],
+            metavar=('size1', 'size2'),
+            help='Numbers of worker certifications to benchmark with.')
+        parser.add_argument(
+            '--priorities',
+            type=int,
+            default=5,
+            help='Number of distinct staffing priorities.')
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of timed runs for each ordering.')
+
+    def _create_certifications(self, size, num_priorities):
+        workflow = Workflow.objects.create(
+            slug='benchmark-staffing-shuffle',
+            name='Benchmark staffing shuffle',
+            description='Benchmark staffing shuffle',
+            code_directory='benchmark_staffing_shuffle')
+        certification = Certification.objects.create(
+            slug='benchmark', name='Benchmark', description='Benchmark',
+            workflow=workflow)
+        users = User.objects.bulk_create(
+            User(username='benchmark-staffing-shuffle-{}'.format(index))
+            for index in range(size))
+        workers = Worker.objects.bulk_create(
+            Worker(user=user) for user in users)
+        WorkerCertification.objects.bulk_create(
+            WorkerCertification(
+                certification=certification,
+                worker=worker,
+                task_class=WorkerCertification.TaskClass.REAL,
+                role=WorkerCertification.Role.ENTRY_LEVEL,
+                staffing_priority=random.randrange(num_priorities))
+            for worker in workers)
+        return (WorkerCertification.objects
+                .filter(certification=certification,
+                        task_class=WorkerCertification.TaskClass.REAL,
+                        role=WorkerCertification.Role.ENTRY_LEVEL))
+
+    def _time(self, order_candidates, repeat):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            order_candidates()
+            durations.append(time.perf_counter() - start)
+        return statistics.median(durations) * 1000
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                worker_certifications = self._create_certifications(
+                    size, options['priorities'])
+                sql_ms = self._time(
+                    lambda: list(
+                        worker_certifications
+                        .order_by('-staffing_priority', '?')
+                        .values_list('worker_id', flat=True)),
+                    options['repeat'])
+                shuffle_ms = self._time(
+                    lambda: shuffle_within_priority_tiers(
+                        worker_certifications.values_list(
+                            'staffing_priority', 'worker_id')),
+                    options['repeat'])
+                transaction.set_rollback(True)
+            self.stdout.write(
+                '{} certifications: ORDER BY random {:.1f} ms, '
+                'in-app shuffle {:.1f} ms.'.format(size, sql_ms, shuffle_ms))
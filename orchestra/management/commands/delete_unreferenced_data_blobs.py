@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from orchestra.utils.data_blobs import delete_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    help = ('Deletes the data blobs that no iteration refers to anymore, '
+            'e.g., because the iterations were deleted or reverted.')
+
+    def handle(self, *args, **options):
+        num_deleted = delete_unreferenced_blobs()
+        self.stdout.write('Deleted {} data blobs.'.format(num_deleted))
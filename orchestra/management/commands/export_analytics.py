@@ -0,0 +1,143 @@
+import base64
+import csv
+import datetime
+import gzip
+import json
+import os
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from orchestra.models import DataBlob
+from orchestra.models import Iteration
+from orchestra.models import Project
+from orchestra.models import StaffingResponse
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+from orchestra.models import TimeEntry
+
+# Tables are exported children first, so that every row an export
+# refers to through a foreign key is included in the same export or an
+# earlier one.
+EXPORTED_MODELS = (
+    ('staffing_responses', StaffingResponse),
+    ('time_entries', TimeEntry),
+    ('iterations', Iteration),
+    ('data_blobs', DataBlob),
+    ('task_assignments', TaskAssignment),
+    ('tasks', Task),
+    ('projects', Project),
+)
+WATERMARKS_FILENAME = 'watermarks.json'
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _format_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class Command(BaseCommand):
+    help = ('Exports projects, tasks, task assignments, iterations and '
+            'their data blobs, time entries and staffing responses to '
+            'gzipped CSV files for analytics. Binary data is base64 '
+            'encoded. Rows are streamed from the database in chunks, so '
+            'memory use does not grow with table size. Incremental exports '
+            'only include rows created since the previous export.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir',
+            help=('Directory to write the exported files and the '
+                  'watermarks of incremental exports to.'))
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=[table for table, _ in EXPORTED_MODELS],
+            help='Tables to export. If not specified, all are exported.')
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=('Only export rows with an ID above the watermark left '
+                  'by the previous export to the output directory.'))
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows to read from the database at once.')
+
+    def _read_watermarks(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_watermarks(self, path, watermarks):
+        # Replace the file atomically so that an interrupted export
+        # leaves the previous watermarks intact.
+        with open(path + '.tmp', 'w') as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def _export_table(self, table, model, output_dir, watermark, chunk_size):
+        """
+        Export the rows of `model` with an ID above `watermark`, in order
+        of ID, and return the number of rows and the last exported ID.
+        """
+        manager = getattr(model, 'unsafe_objects', model.objects)
+        columns = [field.attname for field in model._meta.concrete_fields]
+        rows = (manager.filter(id__gt=watermark)
+                .order_by('id')
+                .values_list(*columns)
+                .iterator(chunk_size=chunk_size))
+
+        table_dir = os.path.join(output_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        partial_path = os.path.join(table_dir, '{}.csv.gz.tmp'.format(table))
+        num_rows = 0
+        first_id = last_id = None
+        id_index = columns.index('id')
+        with gzip.open(partial_path, 'wt', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([_format_value(value) for value in row])
+                if first_id is None:
+                    first_id = row[id_index]
+                last_id = row[id_index]
+                num_rows += 1
+
+        if num_rows == 0:
+            os.remove(partial_path)
+            return 0, watermark
+        os.replace(partial_path, os.path.join(
+            table_dir, '{}-{}-{}.csv.gz'.format(table, first_id, last_id)))
+        return num_rows, last_id
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        os.makedirs(output_dir, exist_ok=True)
+        watermarks_path = os.path.join(output_dir, WATERMARKS_FILENAME)
+        watermarks = self._read_watermarks(watermarks_path)
+
+        for table, model in EXPORTED_MODELS:
+            if options['tables'] and table not in options['tables']:
+                continue
+            watermark = 0
+            if options['incremental']:
+                watermark = watermarks.get(table, 0)
+            num_rows, last_id = self._export_table(
+                table, model, output_dir, watermark, options['chunk_size'])
+            watermarks[table] = max(last_id, watermarks.get(table, 0))
+            self._write_watermarks(watermarks_path, watermarks)
+            self.stdout.write('Exported {} {} rows.'.format(num_rows, table))
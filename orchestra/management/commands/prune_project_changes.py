@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from orchestra.utils.project_changes import prune_project_changes
+
+
+class Command(BaseCommand):
+    help = ('Deletes project changes older than the retention period. '
+            'Clients whose cursor is older than the oldest remaining change '
+            'have to resync.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help=('Number of days to keep changes for. Defaults to '
+                  'settings.ORCHESTRA_PROJECT_CHANGES_RETENTION_DAYS.'))
+
+    def handle(self, *args, **options):
+        num_deleted = prune_project_changes(retention_days=options['days'])
+        self.stdout.write('Deleted {} project changes.'.format(num_deleted))
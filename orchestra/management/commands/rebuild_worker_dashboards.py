@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orchestra.models import Worker
+from orchestra.models import WorkerDashboard
+from orchestra.utils.dashboard import build_worker_dashboard
+from orchestra.utils.dashboard import rebuild_worker_dashboard
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the materialized worker dashboards and reports '
+            'dashboards that drifted from the live computation.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            nargs='+',
+            type=int,
+            metavar=('id1', 'id2'),
+            help=('IDs of workers whose dashboards to rebuild. If not '
+                  'specified, all dashboards will be rebuilt.'))
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without rebuilding any dashboards.')
+
+    def _has_drifted(self, dashboard, time_now):
+        # Stale dashboards are rebuilt on their next read, so only
+        # dashboards that would be served as-is can drift.
+        if dashboard is None or not dashboard.is_fresh(time_now):
+            return False
+        live = build_worker_dashboard(dashboard.worker)
+        return (dashboard.tasks != live['tasks'] or
+                dashboard.complete_tasks != live['complete_tasks'] or
+                dashboard.reviewer_status != live['reviewer_status'])
+
+    def handle(self, *args, **options):
+        workers = Worker.objects.select_related('user').order_by('id')
+        if options['workers']:
+            workers = workers.filter(id__in=options['workers'])
+        dashboards = {
+            dashboard.worker_id: dashboard
+            for dashboard in WorkerDashboard.objects.filter(
+                worker__in=workers).select_related('worker')}
+
+        num_drifted = 0
+        num_workers = 0
+        for worker in workers:
+            num_workers += 1
+            if self._has_drifted(dashboards.get(worker.id), timezone.now()):
+                num_drifted += 1
+                self.stdout.write(
+                    'Dashboard for worker {} ({}) drifted from the live '
+                    'computation.'.format(worker.id, worker.user.username))
+            if not options['dry_run']:
+                rebuild_worker_dashboard(worker)
+
+        self.stdout.write(
+            '{} {} worker dashboards, {} drifted.'.format(
+                'Checked' if options['dry_run'] else 'Rebuilt',
+                num_workers, num_drifted))
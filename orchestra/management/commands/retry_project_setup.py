@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from orchestra.models import Project
+from orchestra.project import set_up_project
+
+
+class Command(BaseCommand):
+    help = ('Runs the setup of projects whose Google Drive folder, Slack '
+            'group or first tasks failed to be set up. Stages that already '
+            'succeeded are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--projects',
+            nargs='+',
+            type=int,
+            metavar=('id1', 'id2'),
+            help=('IDs of projects to set up. If not specified, all '
+                  'projects whose setup failed will be set up.'))
+        parser.add_argument(
+            '--include-in-progress',
+            action='store_true',
+            help=('Also set up projects whose setup is marked as in '
+                  'progress, e.g., because the process running it died.'))
+
+    def handle(self, *args, **options):
+        statuses = [Project.SetupStatus.FAILED]
+        if options['include_in_progress']:
+            statuses.append(Project.SetupStatus.IN_PROGRESS)
+        projects = Project.objects.filter(setup_status__in=statuses)
+        if options['projects']:
+            projects = projects.filter(id__in=options['projects'])
+
+        setup_statuses = dict(Project.SETUP_STATUS_CHOICES)
+        for project_id in projects.order_by('id').values_list(
+                'id', flat=True):
+            setup_status = set_up_project(
+                project_id,
+                include_in_progress=options['include_in_progress'])
+            if setup_status is None:
+                self.stdout.write(
+                    'Project {} is already being set up.'.format(project_id))
+            else:
+                self.stdout.write('Project {} setup: {}.'.format(
+                    project_id, setup_statuses[setup_status]))
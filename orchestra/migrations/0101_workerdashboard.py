@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:01
+
+import django.db.models.deletion
+import jsonfield.fields
+import orchestra.models.core.mixins
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0100_alter_payrate_hourly_rate_currency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerDashboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tasks', jsonfield.fields.JSONField(default=list)),
+                ('reviewer_status', models.BooleanField(default=False)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('built_version', models.PositiveIntegerField(default=0)),
+                ('valid_until', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard', to='orchestra.worker')),
+            ],
+            bases=(orchestra.models.core.mixins.WorkerDashboardMixin, models.Model),
+        ),
+    ]
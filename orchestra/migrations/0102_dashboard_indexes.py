@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0101_workerdashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['priority', 'start_datetime', 'id'], name='project_dashboard_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskassignment',
+            index=models.Index(fields=['worker', 'status'], name='assignment_worker_status_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0102_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.IntegerField(choices=[(0, 'Project'), (1, 'Task'), (2, 'Task Assignment'), (3, 'Iteration')])),
+                ('object_id', models.IntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='orchestra.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='project_change_feed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0103_projectchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='setup_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='setup_status',
+            field=models.IntegerField(choices=[(0, 'Pending'), (1, 'In Progress'), (2, 'Complete'), (3, 'Failed')], default=2),
+        ),
+    ]
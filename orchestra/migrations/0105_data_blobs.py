@@ -0,0 +1,82 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:44
+
+from collections import defaultdict
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# NOTE: change import or copy into migration if code moves/changes
+from orchestra.utils.data_blobs import decode_data
+from orchestra.utils.data_blobs import encode_data
+
+CHUNK_SIZE = 500
+
+
+def move_submitted_data_to_blobs(apps, schema_editor):
+    DataBlob = apps.get_model('orchestra', 'DataBlob')
+    Iteration = apps.get_model('orchestra', 'Iteration')
+
+    blob_ids = {}
+    iteration_ids = defaultdict(list)
+    for iteration_id, submitted_data in (
+            Iteration.objects
+            .order_by('id')
+            .values_list('id', 'submitted_data')
+            .iterator(chunk_size=CHUNK_SIZE)):
+        if submitted_data == {}:
+            continue
+        digest, compressed_data, size = encode_data(submitted_data)
+        if digest not in blob_ids:
+            blob_ids[digest] = DataBlob.objects.create(
+                digest=digest, data=compressed_data, size=size).id
+        iteration_ids[blob_ids[digest]].append(iteration_id)
+
+    for blob_id, ids in iteration_ids.items():
+        for start in range(0, len(ids), CHUNK_SIZE):
+            (Iteration.objects
+             .filter(id__in=ids[start:start + CHUNK_SIZE])
+             .update(submitted_data_blob_id=blob_id))
+        DataBlob.objects.filter(id=blob_id).update(ref_count=len(ids))
+
+
+def move_submitted_data_from_blobs(apps, schema_editor):
+    DataBlob = apps.get_model('orchestra', 'DataBlob')
+    Iteration = apps.get_model('orchestra', 'Iteration')
+
+    for blob in DataBlob.objects.iterator(chunk_size=CHUNK_SIZE):
+        (Iteration.objects
+         .filter(submitted_data_blob=blob)
+         .update(submitted_data=decode_data(blob.data)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0104_project_setup_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='iteration',
+            name='submitted_data_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='orchestra.datablob'),
+        ),
+        migrations.RunPython(move_submitted_data_to_blobs,
+                             move_submitted_data_from_blobs),
+        migrations.RemoveField(
+            model_name='iteration',
+            name='submitted_data',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0105_data_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskassignment',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
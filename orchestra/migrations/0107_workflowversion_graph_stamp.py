@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0106_taskassignment_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowversion',
+            name='graph_stamp',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:36
+
+import jsonfield.fields
+from django.db import migrations
+from django.db.models import F
+
+
+def invalidate_worker_dashboards(apps, schema_editor):
+    # Existing payloads list complete tasks along with open ones, so
+    # rebuild them on their next read.
+    WorkerDashboard = apps.get_model('orchestra', 'WorkerDashboard')
+    WorkerDashboard.objects.update(version=F('version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orchestra', '0107_workflowversion_graph_stamp'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_dashboard_order_idx',
+        ),
+        migrations.AddField(
+            model_name='workerdashboard',
+            name='complete_tasks',
+            field=jsonfield.fields.JSONField(default=list),
+        ),
+        migrations.RunPython(invalidate_worker_dashboards,
+                             migrations.RunPython.noop),
+    ]
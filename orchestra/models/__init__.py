@@ -10,10 +10,13 @@ from orchestra.models.core.models import Step
 from orchestra.models.core.models import Worker
 from orchestra.models.core.models import WorkerCertification
 from orchestra.models.core.models import WorkerAvailability
+from orchestra.models.core.models import WorkerDashboard
 from orchestra.models.core.models import Project
 from orchestra.models.core.models import Task
 from orchestra.models.core.models import TaskAssignment
+from orchestra.models.core.models import DataBlob
 from orchestra.models.core.models import Iteration
+from orchestra.models.core.models import ProjectChange
 from orchestra.models.core.models import TimeEntry
 from orchestra.models.core.models import TaskTimer
 from orchestra.models.core.models import Todo
@@ -36,10 +39,13 @@ __all__ = [
     'Worker',
     'WorkerCertification',
     'WorkerAvailability',
+    'WorkerDashboard',
     'Project',
     'Task',
     'TaskAssignment',
+    'DataBlob',
     'Iteration',
+    'ProjectChange',
     'TimeEntry',
     'TaskTimer',
     'Todo',
@@ -1,5 +1,7 @@
 from pydoc import locate
 
+from django.db import transaction
+from django.db.models import F
 from django.db.models import Q
 
 from orchestra.core.errors import ModelSaveError
@@ -111,6 +113,17 @@ class WorkerAvailabilityMixin(object):
         return '{} - {}'.format(self.worker.user.username, self.week)
 
 
+class WorkerDashboardMixin(object):
+
+    def is_fresh(self, time_now):
+        return (self.built_version == self.version and
+                (self.valid_until is None or time_now < self.valid_until))
+
+    def __str__(self):
+        return '{} - v{} (built: v{})'.format(
+            self.worker.user.username, self.version, self.built_version)
+
+
 class ProjectMixin(object):
 
     def __str__(self):
@@ -208,7 +221,18 @@ class TaskAssignmentMixin(object):
                 raise ModelSaveError('Worker should not be assigned '
                                      'if worker type is Machine')
 
+        bump_data_version = not self._state.adding
+        if bump_data_version:
+            # Increment the stored version rather than the one this
+            # instance loaded, so that saving a stale instance never
+            # reissues a version handed out by a concurrent patch.
+            self.data_version = F('data_version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = (
+                    set(kwargs['update_fields']) | {'data_version'})
         super().save(*args, **kwargs)
+        if bump_data_version:
+            self.refresh_from_db(fields=['data_version'])
 
     def is_entry_level(self):
         return self.assignment_counter == 0
@@ -221,6 +245,46 @@ class TaskAssignmentMixin(object):
             str(self.task), self.assignment_counter, str(self.worker))
 
 
+class IterationMixin(object):
+
+    @property
+    def submitted_data(self):
+        if not hasattr(self, '_submitted_data'):
+            from orchestra.utils.data_blobs import decode_data
+            self._submitted_data = (
+                {} if self.submitted_data_blob_id is None
+                else decode_data(self.submitted_data_blob.data))
+        return self._submitted_data
+
+    @submitted_data.setter
+    def submitted_data(self, submitted_data):
+        self._submitted_data = submitted_data
+        self._submitted_data_changed = True
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_submitted_data', None)
+        self.__dict__.pop('_submitted_data_changed', None)
+        super().refresh_from_db(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        if not getattr(self, '_submitted_data_changed', False):
+            return super().save(*args, **kwargs)
+
+        from orchestra.utils.data_blobs import release_blob
+        from orchestra.utils.data_blobs import store_data
+        with transaction.atomic():
+            previous_blob_id = self.submitted_data_blob_id
+            # Iterations that haven't been submitted have no data, so
+            # they don't need a blob.
+            self.submitted_data_blob = (
+                None if self._submitted_data == {}
+                else store_data(self._submitted_data))
+            super().save(*args, **kwargs)
+            if previous_blob_id is not None:
+                release_blob(previous_blob_id)
+        self._submitted_data_changed = False
+
+
 class TodoMixin(object):
 
     def __str__(self):
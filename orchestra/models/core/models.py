@@ -5,6 +5,7 @@ from djmoney.models.fields import MoneyField
 from jsonfield import JSONField
 from phonenumber_field.modelfields import PhoneNumberField
 from orchestra.models.core.mixins import CertificationMixin
+from orchestra.models.core.mixins import IterationMixin
 from orchestra.models.core.mixins import TodoListTemplateMixin
 from orchestra.models.core.mixins import TodoListTemplateImportRecordMixin
 from orchestra.models.core.mixins import PayRateMixin
@@ -18,10 +19,12 @@ from orchestra.models.core.mixins import TodoQAMixin
 from orchestra.models.core.mixins import WorkerCertificationMixin
 from orchestra.models.core.mixins import WorkerMixin
 from orchestra.models.core.mixins import WorkerAvailabilityMixin
+from orchestra.models.core.mixins import WorkerDashboardMixin
 from orchestra.models.core.mixins import WorkflowMixin
 from orchestra.models.core.mixins import WorkflowVersionMixin
 from orchestra.utils.datetime_utils import first_day_of_the_week
 from orchestra.utils.models import BaseModel
+from orchestra.utils.models import DataModelManager
 from orchestra.utils.models import ChoicesEnum
 
 # TODO(marcua): Convert ManyToManyFields to django-hstore referencefields or
@@ -78,6 +81,10 @@ class WorkflowVersion(WorkflowVersionMixin, models.Model):
         abort_completion_function (str):
             A JSON blob that identifies an optional function
             to run if a project is aborted.
+        graph_stamp (int):
+            Incremented whenever the version's steps or their
+            dependencies change, so that compiled workflow graphs are
+            rebuilt.
     """
     created_at = models.DateTimeField(default=timezone.now)
     slug = models.CharField(max_length=200)
@@ -87,6 +94,7 @@ class WorkflowVersion(WorkflowVersionMixin, models.Model):
         Workflow, related_name='versions', on_delete=models.CASCADE)
     sanity_checks = JSONField(default={})
     abort_completion_function = JSONField(default={})
+    graph_stamp = models.PositiveIntegerField(default=0)
 
     class Meta:
         app_label = 'orchestra'
@@ -367,6 +375,52 @@ class WorkerAvailability(WorkerAvailabilityMixin, BaseModel):
         ]
 
 
+class WorkerDashboard(WorkerDashboardMixin, models.Model):
+    """
+    A WorkerDashboard materializes the dashboard payload of a worker so
+    that the dashboard can be served with a single read.
+
+    Attributes:
+        worker (orchestra.models.Worker):
+            The worker whose dashboard is materialized.
+        tasks (str):
+            A JSON blob containing the worker's open tasks, as returned
+            by `orchestra.utils.task_lifecycle.tasks_assigned_to_worker`
+            without complete tasks.
+        complete_tasks (str):
+            A JSON blob containing the worker's most recent complete
+            tasks, as returned by `complete_tasks_assigned_to_worker` in
+            `orchestra.utils.task_lifecycle`.
+        reviewer_status (bool):
+            Whether the worker is a reviewer for any real-task
+            certification.
+        version (int):
+            Incremented every time a change that affects the dashboard
+            is made to the worker's tasks, assignments, projects, todos
+            or certifications.
+        built_version (int):
+            The `version` the materialized payload was built from. The
+            payload is stale when `built_version` lags `version`.
+        valid_until (datetime.datetime):
+            The time at which the payload goes stale because a todo's
+            start time passes, or None if the payload never expires.
+        updated_at (datetime.datetime):
+            The time the payload was last built.
+    """
+    worker = models.OneToOneField(
+        Worker, related_name='dashboard', on_delete=models.CASCADE)
+    tasks = JSONField(default=list)
+    complete_tasks = JSONField(default=list)
+    reviewer_status = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
+    built_version = models.PositiveIntegerField(default=0)
+    valid_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'orchestra'
+
+
 class Project(ProjectMixin, models.Model):
     """
     A project is a collection of tasks representing a workflow.
@@ -393,6 +447,12 @@ class Project(ProjectMixin, models.Model):
         slack_group_id (str):
             The project's internal Slack group ID if Slack integration
             is enabled.
+        setup_status (orchestra.models.Project.SetupStatus):
+            Represents the progress of the project's Google Drive folder,
+            Slack group and first tasks, which are set up in the
+            background after the project is created.
+        setup_error (str):
+            The error that stopped the project's setup, if it failed.
     """
     class Status:
         ACTIVE = 0
@@ -406,6 +466,18 @@ class Project(ProjectMixin, models.Model):
         (Status.PAUSED, 'Paused'),
         (Status.COMPLETED, 'Completed'))
 
+    class SetupStatus:
+        PENDING = 0
+        IN_PROGRESS = 1
+        COMPLETE = 2
+        FAILED = 3
+
+    SETUP_STATUS_CHOICES = (
+        (SetupStatus.PENDING, 'Pending'),
+        (SetupStatus.IN_PROGRESS, 'In Progress'),
+        (SetupStatus.COMPLETE, 'Complete'),
+        (SetupStatus.FAILED, 'Failed'))
+
     start_datetime = models.DateTimeField(default=timezone.now)
     status = models.IntegerField(choices=STATUS_CHOICES,
                                  default=Status.ACTIVE)
@@ -421,6 +493,9 @@ class Project(ProjectMixin, models.Model):
         choices=WorkerCertification.TASK_CLASS_CHOICES)
     scratchpad_url = models.URLField(null=True, blank=True)
     slack_group_id = models.CharField(max_length=200, null=True, blank=True)
+    setup_status = models.IntegerField(choices=SETUP_STATUS_CHOICES,
+                                       default=SetupStatus.COMPLETE)
+    setup_error = models.TextField(null=True, blank=True)
 
     class Meta:
         app_label = 'orchestra'
@@ -490,7 +565,13 @@ class TaskAssignment(TaskAssignmentMixin, BaseModel):
             1 represents the task's first reviewer, etc.).
         in_progress_task_data (str):
             A JSON blob containing the worker's input data for the task
-            assignment.
+            assignment. Unlike iteration snapshots, it is stored inline
+            rather than in a data blob: it is the working copy that
+            autosaves overwrite and JSON Patches update in place.
+        data_version (int):
+            Incremented whenever the task assignment is saved, so that
+            changes to `in_progress_task_data` based on an older version
+            can be rejected.
 
     Constraints:
         `task` and `assignment_counter` are taken to be unique_together.
@@ -505,6 +586,14 @@ class TaskAssignment(TaskAssignmentMixin, BaseModel):
         # `is_deleted=True`) and have new undeleted ones still be
         # considered unique.
         # unique_together = ('task', 'assignment_counter')
+        indexes = [
+            # Serves the dashboard's per-worker filters. The complete
+            # tasks cursor orders on project columns across a join, so
+            # it sorts the worker's assignments instead of walking an
+            # index.
+            models.Index(fields=['worker', 'status'],
+                         name='assignment_worker_status_idx'),
+        ]
 
     class Status:
         PROCESSING = 0
@@ -516,6 +605,11 @@ class TaskAssignment(TaskAssignmentMixin, BaseModel):
         (Status.SUBMITTED, 'Submitted'),
         (Status.FAILED, 'Failed'))
 
+    # Fields left out by `TaskAssignment.objects.defer_data()`.
+    DATA_FIELDS = ('in_progress_task_data',)
+
+    objects = DataModelManager()
+
     start_datetime = models.DateTimeField(default=timezone.now)
     worker = models.ForeignKey(Worker,
                                related_name='assignments',
@@ -533,9 +627,39 @@ class TaskAssignment(TaskAssignmentMixin, BaseModel):
     # Opaque field that stores current state of task as per the Step's
     # description
     in_progress_task_data = JSONField(default={}, blank=True)
+    data_version = models.PositiveIntegerField(default=0)
+
+
+class DataBlob(models.Model):
+    """
+    A data blob stores a JSON value once, however many objects refer to
+    it. Blobs are addressed by the digest of their content, so identical
+    values share a blob.
+
+    Attributes:
+        digest (str):
+            SHA-256 hex digest of the value's canonical JSON encoding.
+        data (bytes):
+            The value's canonical JSON encoding, compressed with zlib.
+        size (int):
+            Size in bytes of the uncompressed encoding.
+        ref_count (int):
+            Number of objects referring to the blob. Blobs without
+            references can be deleted.
+        created_at (datetime.datetime):
+            The time the blob was created.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'orchestra'
 
 
-class Iteration(BaseModel):
+class Iteration(IterationMixin, BaseModel):
     """
     Iterations are the contiguous units of a worker's time on task.
 
@@ -553,7 +677,9 @@ class Iteration(BaseModel):
             `PROVIDED_REVIEW` indicates that it was moved back down.
         submitted_data (str):
             A JSON blob containing submitted data for this iteration. Will be
-            None if the iteration is currently in progress.
+            empty if the iteration is currently in progress. Stored in
+            `submitted_data_blob`, which is shared by iterations with the
+            same submitted data.
     """
     class Status:
         PROCESSING = 0
@@ -571,7 +697,61 @@ class Iteration(BaseModel):
         TaskAssignment, related_name='iterations', on_delete=models.CASCADE)
     status = models.IntegerField(
         choices=STATUS_CHOICES, default=Status.PROCESSING)
-    submitted_data = JSONField(default={}, blank=True)
+    # Loaded only when `submitted_data` is read.
+    submitted_data_blob = models.ForeignKey(DataBlob,
+                                            related_name='+',
+                                            on_delete=models.PROTECT,
+                                            null=True,
+                                            blank=True)
+
+
+class ProjectChange(models.Model):
+    """
+    A project change records that an object belonging to a project was
+    saved or deleted, so that clients can sync projects incrementally.
+    Changes are numbered by their ID, which doubles as the cursor of the
+    project changes feed.
+
+    Attributes:
+        project (orchestra.models.Project):
+            The project the changed object belongs to. The project may
+            no longer exist if it was deleted.
+        object_type (orchestra.models.ProjectChange.ObjectType):
+            The model of the changed object.
+        object_id (int):
+            The ID of the changed object.
+        created_at (datetime.datetime):
+            The time the change was made.
+    """
+    class ObjectType:
+        PROJECT = 0
+        TASK = 1
+        TASK_ASSIGNMENT = 2
+        ITERATION = 3
+
+    OBJECT_TYPE_CHOICES = (
+        (ObjectType.PROJECT, 'Project'),
+        (ObjectType.TASK, 'Task'),
+        (ObjectType.TASK_ASSIGNMENT, 'Task Assignment'),
+        (ObjectType.ITERATION, 'Iteration'))
+
+    # Changes outlive deleted projects so that their deletion can be
+    # synced too.
+    project = models.ForeignKey(Project,
+                                related_name='+',
+                                on_delete=models.DO_NOTHING,
+                                db_constraint=False)
+    object_type = models.IntegerField(choices=OBJECT_TYPE_CHOICES)
+    object_id = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'orchestra'
+        indexes = [
+            # Serves the changes feed of a set of projects.
+            models.Index(fields=['project', 'id'],
+                         name='project_change_feed_idx'),
+        ]
 
 
 class TimeEntry(BaseModel):
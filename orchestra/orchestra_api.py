@@ -78,6 +78,27 @@ def create_orchestra_project(client,
     return project_id
 
 
+def create_orchestra_projects(projects):
+    """
+    Create many projects with a single request.
+
+    Args:
+        projects ([dict]):
+            Each project's `workflow_slug`, `workflow_version_slug`,
+            `description`, `priority`, `project_data` and `task_class`
+            (`real` or `training`), as passed to
+            `create_orchestra_project`.
+
+    Returns:
+        results ([dict]):
+            For each project in order, either `{'project_id': project_id}`
+            or `{'error': message}`.
+    """
+    response = _make_api_request('post', 'create_projects',
+                                 data=json.dumps({'projects': projects}))
+    return json.loads(response.text)['results']
+
+
 def get_project_information(project_ids):
     data = {
         'project_ids': project_ids
@@ -87,6 +108,48 @@ def get_project_information(project_ids):
     return json.loads(response.text, object_hook=convert_key_to_int)
 
 
+def iter_project_information(project_ids=None, **filters):
+    """
+    Yield the information of many projects, one project at a time, as the
+    server streams it.
+
+    Args:
+        project_ids ([int]):
+            Optionally only return these projects.
+        **filters:
+            Optional `workflow_slug`, `status`, `started_since` (an ISO 8601
+            string) and `chunk_size` to select projects by and read them
+            in.
+
+    Returns:
+        projects (generator):
+            Yields dicts in the format of `get_project_information` values,
+            with an additional `project_id` key.
+    """
+    data = dict(filters, project_ids=project_ids)
+    response = _make_api_request('post', 'project_information_stream',
+                                 data=json.dumps(data), stream=True)
+    with response:
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line, object_hook=convert_key_to_int)
+
+
+def get_project_changes(cursor=0, project_ids=None, limit=None):
+    """
+    Return the projects, tasks, task assignments and iterations that
+    changed after `cursor`, in the format of
+    `orchestra.project_api.api.get_project_changes`. Pass the returned
+    `cursor` to the next call to sync incrementally.
+    """
+    data = {'cursor': cursor, 'project_ids': project_ids}
+    if limit is not None:
+        data['limit'] = limit
+    response = _make_api_request('post', 'project_changes',
+                                 data=json.dumps(data))
+    return json.loads(response.text, object_hook=convert_key_to_int)
+
+
 def create_todos(todos):
     response = _make_api_request('post', 'todo-api',
                                  headers={'Content-type': 'application/json'},
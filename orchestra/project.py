@@ -1,9 +1,40 @@
+import logging
+from pydoc import locate
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
 from orchestra.communication.slack import create_project_slack_group
+from orchestra.communication.slack import raise_slack_errors
 from orchestra.google_apps.convenience import create_project_google_folder
 from orchestra.models import Project
+from orchestra.models import WorkerCertification
 from orchestra.models import WorkflowVersion
+from orchestra.utils.project_changes import record_project_changes
 from orchestra.utils.task_lifecycle import create_subsequent_tasks
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROJECT_SETUP_SCHEDULER = {
+    'path': ('orchestra.utils.project_setup_scheduler.'
+             'SynchronousProjectSetupScheduler')
+}
+# Setting up a project calls Google Drive and Slack, so projects created
+# in bulk are set up on the work queue by default rather than one after
+# another while the request waits.
+DEFAULT_PROJECT_BULK_SETUP_SCHEDULER = {
+    'path': ('orchestra.utils.project_setup_scheduler.'
+             'AsynchronousProjectSetupScheduler')
+}
+PROJECT_SPEC_FIELDS = ('workflow_slug', 'workflow_version_slug',
+                       'description', 'priority', 'task_class',
+                       'project_data')
+TASK_CLASSES = {
+    'real': WorkerCertification.TaskClass.REAL,
+    'training': WorkerCertification.TaskClass.TRAINING,
+}
+
 
 def create_project_with_tasks(workflow_slug,
                               workflow_version_slug,
@@ -11,7 +42,11 @@ def create_project_with_tasks(workflow_slug,
                               priority,
                               task_class,
                               project_data):
-
+    """
+    Create a project and schedule its setup, which creates its Google
+    Drive folder, Slack group and first tasks once the project is
+    committed. The project's `setup_status` tracks the setup's progress.
+    """
     workflow_version = WorkflowVersion.objects.get(
         slug=workflow_version_slug,
         workflow__slug=workflow_slug)
@@ -20,9 +55,201 @@ def create_project_with_tasks(workflow_slug,
                                      short_description=description,
                                      priority=priority,
                                      project_data=project_data,
-                                     task_class=task_class)
-
-    create_project_google_folder(project)
-    create_project_slack_group(project)
-    create_subsequent_tasks(project)
+                                     task_class=task_class,
+                                     setup_status=Project.SetupStatus.PENDING)
+    transaction.on_commit(lambda: schedule_project_setup(project.id))
     return project
+
+
+def _get_workflow_versions(project_specs):
+    slug_pairs = {
+        (spec['workflow_slug'], spec['workflow_version_slug'])
+        for spec in project_specs
+        if isinstance(spec, dict) and
+        isinstance(spec.get('workflow_slug'), str) and
+        isinstance(spec.get('workflow_version_slug'), str)}
+    if not slug_pairs:
+        return {}
+    lookup = Q()
+    for workflow_slug, version_slug in slug_pairs:
+        lookup |= Q(workflow__slug=workflow_slug, slug=version_slug)
+    return {
+        (workflow_version.workflow.slug, workflow_version.slug):
+        workflow_version
+        for workflow_version in (WorkflowVersion.objects
+                                 .filter(lookup)
+                                 .select_related('workflow'))}
+
+
+def _validate_project_spec(spec, workflow_versions):
+    """
+    Return the error that keeps `spec` from describing a project, or
+    None if it is valid.
+    """
+    if not isinstance(spec, dict):
+        return 'Project must be an object'
+    missing = [field for field in PROJECT_SPEC_FIELDS if field not in spec]
+    if missing:
+        return 'Missing parameters: {}'.format(', '.join(missing))
+    if spec['task_class'] not in TASK_CLASSES:
+        return 'task_class must be one of {}'.format(
+            ', '.join(sorted(TASK_CLASSES)))
+    if not isinstance(spec['priority'], int):
+        return 'priority must be an integer'
+    if not isinstance(spec['project_data'], dict):
+        return 'project_data must be an object'
+    if (spec['workflow_slug'],
+            spec['workflow_version_slug']) not in workflow_versions:
+        return 'Workflow version not found'
+    return None
+
+
+def create_projects_with_tasks(project_specs):
+    """
+    Create many projects at once and schedule their setup, as
+    `create_project_with_tasks` does for a single project. Invalid
+    project specifications are reported and don't keep the valid ones
+    from being created. Setup is scheduled with
+    `settings.PROJECT_BULK_SETUP_SCHEDULER`, which defaults to the work
+    queue.
+
+    Args:
+        project_specs ([dict]):
+            Each project's `workflow_slug`, `workflow_version_slug`,
+            `description`, `priority`, `task_class` (`real` or
+            `training`) and `project_data`.
+
+    Returns:
+        results ([dict]):
+            For each project specification in order, either
+            `{'project_id': project_id}` or `{'error': message}`.
+    """
+    workflow_versions = _get_workflow_versions(project_specs)
+    results = []
+    projects = []
+    for spec in project_specs:
+        error = _validate_project_spec(spec, workflow_versions)
+        if error is not None:
+            results.append({'error': error})
+            continue
+        project = Project(
+            workflow_version=workflow_versions[
+                (spec['workflow_slug'], spec['workflow_version_slug'])],
+            short_description=spec['description'],
+            priority=spec['priority'],
+            project_data=spec['project_data'],
+            task_class=TASK_CLASSES[spec['task_class']],
+            setup_status=Project.SetupStatus.PENDING)
+        projects.append(project)
+        results.append(project)
+
+    with transaction.atomic():
+        projects = Project.objects.bulk_create(projects)
+        # `bulk_create` doesn't send `post_save`, so record the new
+        # projects in the changes feed by hand.
+        record_project_changes(projects)
+    project_ids = [project.id for project in projects]
+    transaction.on_commit(lambda: _schedule_projects_setup(project_ids))
+    return [{'project_id': result.id} if isinstance(result, Project)
+            else result for result in results]
+
+
+def _get_project_setup_scheduler(scheduler_settings):
+    project_setup_scheduler_class = locate(scheduler_settings['path'])
+    kwargs = scheduler_settings.get('kwargs', {})
+    return project_setup_scheduler_class(**kwargs)
+
+
+def _schedule_projects_setup(project_ids):
+    project_setup_scheduler = _get_project_setup_scheduler(
+        getattr(settings, 'PROJECT_BULK_SETUP_SCHEDULER',
+                DEFAULT_PROJECT_BULK_SETUP_SCHEDULER))
+    for project_id in project_ids:
+        project_setup_scheduler.schedule(project_id)
+
+
+def schedule_project_setup(project_id):
+    project_setup_scheduler = _get_project_setup_scheduler(
+        getattr(settings, 'PROJECT_SETUP_SCHEDULER',
+                DEFAULT_PROJECT_SETUP_SCHEDULER))
+    project_setup_scheduler.schedule(project_id)
+
+
+def _set_up_google_folder(project):
+    if (not project.project_data.get('project_folder_id') or
+            not project.scratchpad_url):
+        create_project_google_folder(project)
+
+
+def _set_up_slack_group(project):
+    if not project.slack_group_id:
+        # Surface Slack errors so that the stage is retried rather than
+        # leaving the project without a group.
+        with raise_slack_errors():
+            create_project_slack_group(project)
+
+
+# Stages run in order and each one skips the work that a previous,
+# interrupted run already did, so a failed setup can be run again. They
+# don't run in a transaction, so that the external resources a failed
+# stage created are still recorded on the project when it is retried.
+PROJECT_SETUP_STAGES = (
+    ('google_folder', _set_up_google_folder),
+    ('slack_group', _set_up_slack_group),
+    ('tasks', create_subsequent_tasks),
+)
+
+
+def _update_setup_status(project_id, setup_status, from_statuses=None,
+                         setup_error=None):
+    # Updating only the setup fields keeps stages that change the
+    # project through another instance from being overwritten.
+    projects = Project.objects.filter(id=project_id)
+    if from_statuses is not None:
+        projects = projects.filter(setup_status__in=from_statuses)
+    updated = projects.update(setup_status=setup_status,
+                              setup_error=setup_error)
+    if updated:
+        record_project_changes(Project.objects.filter(id=project_id))
+    return updated
+
+
+def set_up_project(project_id, include_in_progress=False):
+    """
+    Run the setup stages of a project that is pending setup or whose
+    setup failed.
+
+    Args:
+        project_id (int):
+            The ID of the project to set up.
+        include_in_progress (bool):
+            Whether to also set up a project whose setup is marked as in
+            progress, e.g., because the process running it died.
+
+    Returns:
+        setup_status (orchestra.models.Project.SetupStatus):
+            The project's setup status after the run, or None if the
+            project wasn't claimed for setup.
+    """
+    claimable_statuses = [Project.SetupStatus.PENDING,
+                          Project.SetupStatus.FAILED]
+    if include_in_progress:
+        claimable_statuses.append(Project.SetupStatus.IN_PROGRESS)
+    # Claiming the setup atomically keeps concurrent runs from creating
+    # the same external resources twice.
+    if not _update_setup_status(project_id, Project.SetupStatus.IN_PROGRESS,
+                                from_statuses=claimable_statuses):
+        return None
+
+    project = Project.objects.get(id=project_id)
+    for stage, set_up in PROJECT_SETUP_STAGES:
+        try:
+            set_up(project)
+        except Exception as e:
+            logger.exception('Project %s failed setup stage %s',
+                             project_id, stage)
+            _update_setup_status(project_id, Project.SetupStatus.FAILED,
+                                 setup_error='{}: {!r}'.format(stage, e))
+            return Project.SetupStatus.FAILED
+    _update_setup_status(project_id, Project.SetupStatus.COMPLETE)
+    return Project.SetupStatus.COMPLETE
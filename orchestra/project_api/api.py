@@ -1,14 +1,50 @@
 import logging
 from collections import defaultdict
+from datetime import timedelta
 
+from django.conf import settings
+from django.utils import timezone
+
+from orchestra.core.errors import ProjectChangesCursorError
+from orchestra.models import Iteration
 from orchestra.models import Project
-from orchestra.models import Step
+from orchestra.models import ProjectChange
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
 from orchestra.models import WorkflowVersion
+from orchestra.project_api.serializers import IterationSerializer
 from orchestra.project_api.serializers import ProjectSerializer
+from orchestra.project_api.serializers import prefetch_task_tree
+from orchestra.project_api.serializers import TaskAssignmentChangeSerializer
+from orchestra.project_api.serializers import TaskChangeSerializer
 from orchestra.project_api.serializers import TaskSerializer
+from orchestra.utils.etags import make_etag
+from orchestra.utils.project_changes import get_project_versions
+from orchestra.workflow.graph import workflow_graphs
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROJECT_CHUNK_SIZE = 100
+DEFAULT_PROJECT_CHANGES_LIMIT = 500
+DEFAULT_PROJECT_CHANGES_SETTLE_SECONDS = 10
+
+# Maps each type of changed object to its key in the changes feed, the
+# queryset its current state is read from and its serializer.
+CHANGED_OBJECTS = {
+    ProjectChange.ObjectType.PROJECT: (
+        'projects',
+        Project.objects.select_related('workflow_version__workflow'),
+        ProjectSerializer),
+    ProjectChange.ObjectType.TASK: (
+        'tasks', Task.objects.select_related('step'), TaskChangeSerializer),
+    ProjectChange.ObjectType.TASK_ASSIGNMENT: (
+        'assignments', TaskAssignment.objects.all(),
+        TaskAssignmentChangeSerializer),
+    ProjectChange.ObjectType.ITERATION: (
+        'iterations', Iteration.objects.select_related('submitted_data_blob'),
+        IterationSerializer),
+}
+
 
 class MalformedDependencyException(Exception):
     pass
@@ -34,26 +70,201 @@ def get_project_information(project_ids):
         ...
     }
     """
-    projects = Project.objects.select_related(
-        'workflow_version__workflow'
-        ).filter(id__in=project_ids).prefetch_related('tasks')
+    projects = _get_project_information_queryset().filter(id__in=project_ids)
     projects_dict = defaultdict(dict)
+    # Projects often share a workflow version, so sort each version's
+    # steps only once.
+    workflow_version_steps = {}
     for project in projects:
-        project_id = project.id
-        workflow_version = project.workflow_version
-        workflow = workflow_version.workflow
-
-        projects_dict[project_id]['project'] = ProjectSerializer(
-            project).data
-        projects_dict[project_id]['steps'] = get_workflow_steps(
-            workflow.slug, workflow_version.slug)
-        tasks = defaultdict(dict)
-        for task in project.tasks.all():
-            tasks[project.id][task.step.slug] = TaskSerializer(task).data
-        projects_dict[project_id]['tasks'] = tasks.get(project_id, {})
+        projects_dict[project.id] = _serialize_project(
+            project, workflow_version_steps)
     return projects_dict
 
 
+def get_project_information_etag(project_ids):
+    """
+    Return the ETag of the output of `get_project_information` for
+    `project_ids`, which changes whenever that output would.
+    """
+    versions = get_project_versions(project_ids)
+    return make_etag(*sorted(
+        (project_id, version, graph_stamp)
+        for project_id, (graph_stamp, version) in versions.items()))
+
+
+def iter_project_information(project_ids=None, workflow_slug=None,
+                             status=None, started_since=None,
+                             chunk_size=DEFAULT_PROJECT_CHUNK_SIZE):
+    """
+    Serialize many projects, one at a time.
+
+    Projects are read in chunks of `chunk_size` ordered by ID, with each
+    chunk starting after the last ID of the previous one, so memory use
+    does not grow with the number of projects.
+
+    Args:
+        project_ids ([int]):
+            Optionally only serialize these projects.
+        workflow_slug (str):
+            Optionally only serialize projects of this workflow.
+        status (int):
+            Optionally only serialize projects with this status.
+        started_since (datetime.datetime):
+            Optionally only serialize projects started at or after this
+            time.
+        chunk_size (int):
+            Number of projects to read from the database at once.
+
+    Returns:
+        projects (generator):
+            Yields `(project_id, project_information)` tuples in order of
+            project ID, where `project_information` has the format of
+            the values returned by `get_project_information`.
+    """
+    projects = _get_project_information_queryset().order_by('id')
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    if workflow_slug is not None:
+        projects = projects.filter(
+            workflow_version__workflow__slug=workflow_slug)
+    if status is not None:
+        projects = projects.filter(status=status)
+    if started_since is not None:
+        projects = projects.filter(start_datetime__gte=started_since)
+
+    workflow_version_steps = {}
+    last_id = None
+    while True:
+        chunk = projects
+        if last_id is not None:
+            chunk = chunk.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        for project in chunk:
+            yield project.id, _serialize_project(
+                project, workflow_version_steps)
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def get_project_changes(cursor=0, project_ids=None,
+                        limit=DEFAULT_PROJECT_CHANGES_LIMIT,
+                        settle_seconds=None):
+    """
+    Return the projects, tasks, task assignments and iterations that
+    changed after `cursor`.
+
+    Each changed object is returned in its current state, or as None if
+    it was deleted since. Clients sync incrementally by passing the
+    returned `cursor` to their next call, and should call again right
+    away while `has_more` is true.
+
+    Change IDs are assigned when a change is recorded, not when its
+    transaction commits, so a change can become visible after changes
+    with higher IDs. To avoid moving the cursor past such a change,
+    only changes recorded at least `settle_seconds` ago are returned,
+    and the feed stops at the first change that hasn't settled yet. No
+    change is skipped as long as transactions commit within
+    `settle_seconds` of recording their changes.
+
+    Changes are pruned once they are older than
+    `settings.ORCHESTRA_PROJECT_CHANGES_RETENTION_DAYS`. A cursor whose
+    change was pruned is rejected, and its client has to resync by
+    reloading its projects with `get_project_information` and then
+    following the changes from cursor 0, which starts at the oldest
+    remaining change.
+
+    output format:
+    {
+        'cursor': last_change_id,
+        'has_more': more_changes_after_cursor,
+        'projects': {project_id: serialized_project_or_none, ...},
+        'tasks': {task_id: serialized_task_or_none, ...},
+        'assignments': {assignment_id: serialized_assignment_or_none, ...},
+        'iterations': {iteration_id: serialized_iteration_or_none, ...}
+    }
+
+    Args:
+        cursor (int):
+            Only return objects that changed after this cursor. Pass 0 to
+            start from the first change.
+        project_ids ([int]):
+            Optionally only return changes to these projects.
+        limit (int):
+            The maximum number of changes to read at once.
+        settle_seconds (float):
+            Only return changes recorded at least this long ago. Defaults
+            to `settings.ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS`.
+
+    Returns:
+        changes (dict):
+            The changed objects, in the format above.
+
+    Raises:
+        orchestra.core.errors.ProjectChangesCursorError:
+            Changes after `cursor` were pruned.
+    """
+    # Cursors are IDs of returned changes, and changes are pruned in ID
+    # order, so a cursor without any change at or before it is older
+    # than the pruned changes.
+    if cursor and not ProjectChange.objects.filter(id__lte=cursor).exists():
+        raise ProjectChangesCursorError(
+            'Cursor {} has expired, resync from cursor 0'.format(cursor))
+    if settle_seconds is None:
+        settle_seconds = getattr(
+            settings, 'ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS',
+            DEFAULT_PROJECT_CHANGES_SETTLE_SECONDS)
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+    changes = ProjectChange.objects.filter(id__gt=cursor).order_by('id')
+    if project_ids is not None:
+        changes = changes.filter(project_id__in=project_ids)
+    changes = list(changes.values_list(
+        'id', 'object_type', 'object_id', 'created_at')[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    for index, (_, _, _, created_at) in enumerate(changes):
+        if created_at > settled_before:
+            changes = changes[:index]
+            has_more = False
+            break
+
+    changed_ids = defaultdict(set)
+    for _, object_type, object_id, _ in changes:
+        changed_ids[object_type].add(object_id)
+    result = {
+        'cursor': changes[-1][0] if changes else cursor,
+        'has_more': has_more,
+    }
+    for object_type, (key, queryset, serializer_class) in (
+            CHANGED_OBJECTS.items()):
+        object_ids = changed_ids[object_type]
+        result[key] = dict.fromkeys(object_ids)
+        if object_ids:
+            result[key].update(
+                (instance.id, serializer_class(instance).data)
+                for instance in queryset.filter(id__in=object_ids))
+    return result
+
+
+def _get_project_information_queryset():
+    return (Project.objects
+            .select_related('workflow_version__workflow')
+            .prefetch_related(*prefetch_task_tree()))
+
+
+def _serialize_project(project, workflow_version_steps):
+    workflow_version = project.workflow_version
+    if workflow_version.id not in workflow_version_steps:
+        workflow_version_steps[workflow_version.id] = (
+            _get_workflow_version_steps(workflow_version))
+    return {
+        'project': ProjectSerializer(project).data,
+        'steps': workflow_version_steps[workflow_version.id],
+        'tasks': {task.step.slug: TaskSerializer(task).data
+                  for task in project.tasks.all()},
+    }
+
+
 def get_workflow_steps(workflow_slug, version_slug):
     """Get a sorted list of steps for a project.
 
@@ -71,55 +282,39 @@ def get_workflow_steps(workflow_slug, version_slug):
     workflow_version = WorkflowVersion.objects.get(
         slug=version_slug,
         workflow__slug=workflow_slug)
+    return _get_workflow_version_steps(workflow_version)
 
-    # Build a directed graph of the step dependencies
-    # TODO(dhaas): make DB access more efficient.
-    graph = {}
-    for step in workflow_version.steps.all():
-        graph[step.slug] = [dependency.slug for dependency
-                            in step.creation_depends_on.all()]
-    return _traverse_step_graph(graph, workflow_version)
 
+def _get_workflow_version_steps(workflow_version):
+    return _traverse_step_graph(workflow_graphs.get(workflow_version),
+                                workflow_version)
 
-def _traverse_step_graph(graph, workflow_version):
-    queue = []
-    for key, value in graph.items():
-        if value == []:
-            queue.append(key)
 
+def _traverse_step_graph(workflow_graph, workflow_version):
     # TODO(derek): prevent the MalformedDependencyExceptions from being
     # possible by baking protection into the Workflow/Step classes
-    if not len(queue):
+    if workflow_graph.steps and not workflow_graph.topological_order:
         raise MalformedDependencyException("All %s workflow steps have "
                                            "dependencies. There is no start "
                                            "point." % workflow_version.slug)
 
-    # Build the steps list in order using a breadth-first-like traversal of the
-    # step dependency graph
+    # The workflow graph orders steps with Kahn's algorithm. Steps on a
+    # dependency cycle can't be ordered, so they come last.
+    order = list(workflow_graph.topological_order)
+    if len(order) < len(workflow_graph.steps):
+        logger.warning('Workflow version %s has a dependency cycle.',
+                       workflow_version.slug)
+        ordered = set(order)
+        order.extend(number for number in range(len(workflow_graph.steps))
+                     if number not in ordered)
+
     steps = []
-    already_added = set()
-    while len(queue):
-        current_node = queue.pop(0)
-
-        if current_node in already_added:
-            continue
-
-        # TODO(dhaas): make DB access more efficient (one option: cache steps
-        # in the graph).
-        already_added.add(current_node)
-        current_step = Step.objects.get(
-            workflow_version=workflow_version,
-            slug=current_node)
+    for number in order:
+        step = workflow_graph.steps[number]
         steps.append({
-                      'id': current_step.id,
-                      'slug': current_node,
-                      'description': current_step.description,
-                      'is_human': current_step.is_human,
-                      'name': current_step.name})
-
-        for key, dependencies in graph.items():
-            if (current_node in dependencies and
-                    key not in already_added):
-                queue.append(key)
-
+                      'id': step.id,
+                      'slug': step.slug,
+                      'description': step.description,
+                      'is_human': step.is_human,
+                      'name': step.name})
     return steps
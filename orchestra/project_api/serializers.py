@@ -1,4 +1,7 @@
-import datetime
+from django.db.models import F
+from django.db.models import Prefetch
+from django.db.models import Q
+from django.db.models import Sum
 from rest_framework import serializers
 
 from orchestra.models import Iteration
@@ -10,6 +13,46 @@ from orchestra.models import TimeEntry
 from orchestra.models import WorkerCertification
 
 
+def prefetch_task_tree(tasks_lookup='tasks'):
+    """
+    Return the prefetches that let `TaskSerializer` serialize tasks, their
+    assignments and their iterations without further queries.
+
+    Args:
+        tasks_lookup (str):
+            The lookup from the queryset being prefetched to its tasks.
+
+    Returns:
+        prefetches ([django.db.models.Prefetch]):
+            Prefetches to pass to `prefetch_related`.
+    """
+    assignments_lookup = '{}__assignments'.format(tasks_lookup)
+    return [
+        Prefetch(tasks_lookup,
+                 queryset=Task.objects.select_related('step')),
+        Prefetch(assignments_lookup,
+                 queryset=(
+                     TaskAssignment.objects
+                     .select_related('worker__user')
+                     .annotate(total_time_worked=Sum(
+                         'time_entries__time_worked',
+                         filter=Q(time_entries__worker=F('worker'),
+                                  time_entries__is_deleted=False)))
+                     .order_by('assignment_counter'))),
+        Prefetch('{}__iterations'.format(assignments_lookup),
+                 queryset=(Iteration.objects
+                           .select_related('submitted_data_blob')
+                           .order_by('start_datetime', 'id'))),
+    ]
+
+
+def _sorted_assignments(task):
+    # Sorting in Python rather than with `order_by` keeps prefetched
+    # assignments from being queried again.
+    return sorted(task.assignments.all(),
+                  key=lambda assignment: assignment.assignment_counter)
+
+
 class ProjectSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -25,7 +68,8 @@ class ProjectSerializer(serializers.ModelSerializer):
             'scratchpad_url',
             'task_class',
             'status',
-            'slack_group_id'
+            'slack_group_id',
+            'setup_status'
         )
 
     workflow_slug = serializers.SerializerMethodField()
@@ -40,6 +84,10 @@ class ProjectSerializer(serializers.ModelSerializer):
         choices=WorkerCertification.TASK_CLASS_CHOICES)
 
     project_data = serializers.SerializerMethodField()
+    setup_status = serializers.SerializerMethodField()
+
+    def get_setup_status(self, obj):
+        return dict(Project.SETUP_STATUS_CHOICES)[obj.setup_status]
 
     def get_project_data(self, obj):
         """
@@ -103,26 +151,51 @@ class TaskSerializer(serializers.ModelSerializer):
             latest_data (str):
                 A serialized JSON blob containing the latest input data.
         """
-        active_assignment = (obj.assignments
-                             .filter(status=TaskAssignment.Status.PROCESSING))
-        if active_assignment.exists():
-            assignment = active_assignment[0]
+        assignments = _sorted_assignments(obj)
+        active_assignments = [
+            assignment for assignment in assignments
+            if assignment.status == TaskAssignment.Status.PROCESSING]
+        if active_assignments:
+            assignment = active_assignments[0]
+        elif assignments:
+            assignment = assignments[-1]
         else:
-            assignment = (obj.assignments.all()
-                          .order_by('-assignment_counter').first())
-        if not assignment:
             return None
 
         latest_data = assignment.in_progress_task_data
         return latest_data
 
     def get_assignments(self, obj):
-        assignments = TaskAssignmentSerializer(obj.assignments.all()
-                                               .order_by('assignment_counter'),
+        assignments = TaskAssignmentSerializer(_sorted_assignments(obj),
                                                many=True)
         return assignments.data
 
 
+class TaskChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializes a task without its assignments, which the project changes
+    feed reports separately.
+    """
+
+    class Meta:
+        model = Task
+        fields = (
+            'id',
+            'step_slug',
+            'project',
+            'status',
+            'start_datetime'
+        )
+
+    step_slug = serializers.SlugRelatedField(source='step',
+                                             slug_field='slug',
+                                             read_only=True)
+    status = serializers.SerializerMethodField()
+
+    def get_status(self, obj):
+        return dict(Task.STATUS_CHOICES).get(obj.status, None)
+
+
 class TaskAssignmentSerializer(serializers.ModelSerializer):
     recorded_work_time = serializers.SerializerMethodField()
 
@@ -168,7 +241,9 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
 
     def get_iterations(self, obj):
         iterations = IterationSerializer(
-            obj.iterations.order_by('start_datetime'), many=True)
+            sorted(obj.iterations.all(),
+                   key=lambda iteration: iteration.start_datetime),
+            many=True)
         return iterations.data
 
     def get_in_progress_task_data(self, obj):
@@ -181,15 +256,46 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
         return obj.in_progress_task_data
 
     def get_recorded_work_time(self, obj):
-        query = TimeEntry.objects.filter(worker=obj.worker, assignment=obj)
-        if not query:
+        # Assignments loaded through `prefetch_task_tree` come with their
+        # time already summed.
+        if hasattr(obj, 'total_time_worked'):
+            total_time = obj.total_time_worked
+        else:
+            total_time = (
+                TimeEntry.objects
+                .filter(worker=obj.worker, assignment=obj)
+                .aggregate(total_time=Sum('time_worked'))['total_time'])
+        if total_time is None:
             return None
+        return total_time.total_seconds()
 
-        total_time = datetime.timedelta()
-        for t in query:
-            total_time += t.time_worked
 
-        return total_time.total_seconds()
+class TaskAssignmentChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializes a task assignment without its iterations, which the
+    project changes feed reports separately.
+    """
+
+    class Meta:
+        model = TaskAssignment
+        fields = (
+            'id',
+            'start_datetime',
+            'worker',
+            'task',
+            'status',
+            'assignment_counter',
+            'in_progress_task_data'
+        )
+
+    status = serializers.SerializerMethodField()
+    in_progress_task_data = serializers.SerializerMethodField()
+
+    def get_status(self, obj):
+        return dict(TaskAssignment.STATUS_CHOICES).get(obj.status, None)
+
+    def get_in_progress_task_data(self, obj):
+        return obj.in_progress_task_data
 
 
 class TimeEntrySerializer(serializers.ModelSerializer):
@@ -6,11 +6,15 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.urls import reverse
 from django.test import override_settings
+from django.utils import timezone
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APIClient
 
+from orchestra.core.errors import ProjectChangesCursorError
 from orchestra.google_apps.service import Service
+from orchestra.models import Iteration
 from orchestra.models import Project
+from orchestra.models import ProjectChange
 from orchestra.models import Task
 from orchestra.models import Todo
 from orchestra.models import TaskAssignment
@@ -20,7 +24,10 @@ from orchestra.models import WorkerCertification
 from orchestra.todos.serializers import BulkTodoSerializer
 from orchestra.project_api.api import MalformedDependencyException
 from orchestra.project_api.api import get_workflow_steps
+from orchestra.project_api.api import _traverse_step_graph
+from orchestra.project_api.api import get_project_changes
 from orchestra.project_api.api import get_project_information
+from orchestra.project_api.api import iter_project_information
 from orchestra.project_api.auth import OrchestraProjectAPIAuthentication
 from orchestra.project_api.auth import SignedUser
 from orchestra.tests.helpers import OrchestraTestCase
@@ -28,11 +35,13 @@ from orchestra.tests.helpers import EndpointTestCase
 from orchestra.tests.helpers.fixtures import setup_models
 from orchestra.tests.helpers.fixtures import StepFactory
 from orchestra.tests.helpers.fixtures import ProjectFactory
+from orchestra.tests.helpers.fixtures import TaskAssignmentFactory
 from orchestra.tests.helpers.fixtures import TodoFactory
 from orchestra.tests.helpers.fixtures import WorkflowVersionFactory
 from orchestra.tests.helpers.google_apps import mock_create_drive_service
 from orchestra.utils.load_json import load_encoded_json
 from orchestra.utils.task_lifecycle import assign_task
+from orchestra.utils.task_lifecycle import create_subsequent_tasks
 
 
 class ProjectAPITestCase(OrchestraTestCase):
@@ -89,6 +98,7 @@ class ProjectAPITestCase(OrchestraTestCase):
                 'project_data': {},
                 'scratchpad_url': None,
                 'slack_group_id': project.slack_group_id,
+                'setup_status': 'Complete',
                 'priority': 0,
                 'status': 0
             },
@@ -226,6 +236,9 @@ class ProjectAPITestCase(OrchestraTestCase):
         self.assertTrue(slugs.index('stepH') > slugs.index('stepF'))
 
         steps = get_workflow_steps('w4', 'erroneous_workflow_1')
+        # Steps on the cycle come after the steps that can be ordered.
+        self.assertEqual([step['slug'] for step in steps],
+                         ['stepA', 'stepB', 'stepC'])
 
         with self.assertRaises(MalformedDependencyException):
             steps = get_workflow_steps('w5', 'erroneous_workflow_2')
@@ -240,6 +253,261 @@ class ProjectAPITestCase(OrchestraTestCase):
         self.assertTrue(isinstance(a_project_info['tasks'], dict))
         self.assertTrue(isinstance(a_project_info['steps'], list))
 
+    def test_get_project_information_num_queries(self):
+        project_ids = list(Project.objects.values_list('id', flat=True))
+        self.assertGreater(len(project_ids), 1)
+        # Compile the projects' workflow graphs up front.
+        get_project_information(project_ids)
+
+        # Projects, tasks, assignments and iterations, plus the graph
+        # stamp of each workflow version.
+        project_id = (Iteration.objects
+                      .values_list('assignment__task__project', flat=True)
+                      .first())
+        with self.assertNumQueries(5):
+            projects_info = get_project_information([project_id])
+        num_workflow_versions = (Project.objects
+                                 .values('workflow_version')
+                                 .distinct()
+                                 .count())
+        with self.assertNumQueries(4 + num_workflow_versions):
+            projects_info = get_project_information(project_ids)
+        self.assertEqual(set(projects_info), set(project_ids))
+
+    def test_iter_project_information(self):
+        project_ids = sorted(Project.objects.values_list('id', flat=True))
+        projects_info = get_project_information(project_ids)
+        for chunk_size in (1, 2, len(project_ids), len(project_ids) + 1):
+            self.assertEqual(
+                list(iter_project_information(chunk_size=chunk_size)),
+                [(project_id, projects_info[project_id])
+                 for project_id in project_ids])
+
+        project = self.projects['base_test_project']
+        self.assertEqual(
+            [project_id for project_id, _ in iter_project_information(
+                workflow_slug='w1', status=project.status,
+                started_since=project.start_datetime,
+                project_ids=project_ids)],
+            list(Project.objects
+                 .filter(workflow_version__workflow__slug='w1',
+                         status=project.status,
+                         start_datetime__gte=project.start_datetime)
+                 .order_by('id')
+                 .values_list('id', flat=True)))
+
+    def test_project_information_stream(self):
+        project_ids = sorted(Project.objects.values_list('id', flat=True))
+        response = self.api_client.post(
+            '/orchestra/api/project/project_information_stream/',
+            {'project_ids': project_ids[:3], 'chunk_size': 2},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        returned = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [project['project_id'] for project in returned],
+            project_ids[:3])
+        expected = load_encoded_json(self.api_client.post(
+            '/orchestra/api/project/project_information/',
+            {'project_ids': project_ids[:3]},
+            format='json').content)
+        for project in returned:
+            self.assertEqual(
+                project, dict(expected[str(project['project_id'])],
+                              project_id=project['project_id']))
+
+        for data in ({'chunk_size': 0}, {'started_since': 'yesterday'}):
+            response = self.api_client.post(
+                '/orchestra/api/project/project_information_stream/',
+                data, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_project_information_etag(self):
+        project = self.projects['base_test_project']
+        assignment = TaskAssignment.objects.filter(
+            task__project=project).first()
+
+        def request(**headers):
+            return self.api_client.post(
+                '/orchestra/api/project/project_information/',
+                {'project_ids': [project.id]}, format='json', **headers)
+
+        response = request()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with patch('orchestra.project_api.views.get_project_information') \
+                as mock_get_project_information:
+            response = request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        mock_get_project_information.assert_not_called()
+
+        # Recording time on an assignment changes its project's ETag.
+        TimeEntry.objects.create(worker=assignment.worker,
+                                 assignment=assignment,
+                                 date=datetime.date(2016, 4, 4),
+                                 time_worked=datetime.timedelta(hours=1))
+        response = request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+
+        assignment.task.status = Task.Status.POST_REVIEW_PROCESSING
+        assignment.task.save()
+        response = request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def _latest_change_id(self):
+        return ProjectChange.objects.order_by('-id').first().id
+
+    @override_settings(ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS=0)
+    def test_get_project_changes(self):
+        cursor = self._latest_change_id()
+        assignment = TaskAssignmentFactory(
+            task__project__workflow_version=(
+                self.workflow_versions['test_workflow']))
+        task = assignment.task
+        project = task.project
+        iteration = Iteration.objects.create(assignment=assignment)
+
+        changes = get_project_changes(cursor)
+        self.assertEqual(changes['cursor'], self._latest_change_id())
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(list(changes['projects']), [project.id])
+        self.assertEqual(changes['projects'][project.id]['short_description'],
+                         project.short_description)
+        self.assertEqual(list(changes['tasks']), [task.id])
+        self.assertEqual(changes['tasks'][task.id]['status'],
+                         'Awaiting Processing')
+        self.assertNotIn('assignments', changes['tasks'][task.id])
+        self.assertEqual(list(changes['assignments']), [assignment.id])
+        self.assertEqual(changes['assignments'][assignment.id]['task'],
+                         task.id)
+        self.assertEqual(list(changes['iterations']), [iteration.id])
+
+        # Only objects changed after the cursor are returned, in their
+        # current state, and deleted objects are returned as None.
+        cursor = changes['cursor']
+        task.status = Task.Status.PROCESSING
+        task.save()
+        task.save()
+        iteration.delete()
+        changes = get_project_changes(cursor)
+        self.assertEqual(changes['projects'], {})
+        self.assertEqual(changes['tasks'][task.id]['status'], 'Processing')
+        self.assertEqual(changes['assignments'], {})
+        self.assertEqual(changes['iterations'], {iteration.id: None})
+
+        # Clients page through changes with the returned cursor.
+        changes = get_project_changes(cursor, limit=2)
+        self.assertTrue(changes['has_more'])
+        self.assertEqual(list(changes['tasks']), [task.id])
+        self.assertEqual(changes['iterations'], {})
+        changes = get_project_changes(changes['cursor'], limit=2)
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(changes['tasks'], {})
+        self.assertEqual(changes['iterations'], {iteration.id: None})
+
+        other_project = ProjectFactory()
+        changes = get_project_changes(cursor, project_ids=[other_project.id])
+        self.assertEqual(list(changes['projects']), [other_project.id])
+        self.assertEqual(changes['tasks'], {})
+
+    @override_settings(ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS=0)
+    def test_get_project_changes_bulk_created_tasks(self):
+        project = ProjectFactory(
+            workflow_version=self.workflow_versions['crazy_workflow'])
+        cursor = self._latest_change_id()
+        create_subsequent_tasks(project)
+        changes = get_project_changes(cursor, project_ids=[project.id])
+        self.assertEqual(
+            sorted(changes['tasks']),
+            sorted(project.tasks.values_list('id', flat=True)))
+        self.assertTrue(changes['tasks'])
+
+    def test_get_project_changes_settle_window(self):
+        cursor = self._latest_change_id()
+        project = ProjectFactory()
+        other_project = ProjectFactory()
+
+        # Recent changes are held back until they settle.
+        changes = get_project_changes(cursor, settle_seconds=60)
+        self.assertEqual(changes['cursor'], cursor)
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(changes['projects'], {})
+
+        # The feed stops at the first change that hasn't settled, even if
+        # later changes have.
+        settled_at = timezone.now() - datetime.timedelta(minutes=5)
+        recorded = ProjectChange.objects.filter(id__gt=cursor)
+        recorded.filter(project=other_project).update(created_at=settled_at)
+        changes = get_project_changes(cursor, settle_seconds=60)
+        self.assertEqual(changes['cursor'], cursor)
+        self.assertEqual(changes['projects'], {})
+
+        recorded.update(created_at=settled_at)
+        changes = get_project_changes(cursor, settle_seconds=60)
+        self.assertEqual(changes['cursor'], self._latest_change_id())
+        self.assertEqual(sorted(changes['projects']),
+                         [project.id, other_project.id])
+
+    @override_settings(ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS=0)
+    def test_project_changes_expired_cursor(self):
+        ProjectFactory()
+        cursor = self._latest_change_id()
+        ProjectFactory()
+        ProjectChange.objects.filter(id__lte=cursor).delete()
+        with self.assertRaises(ProjectChangesCursorError):
+            get_project_changes(cursor)
+
+        response = self.api_client.post(
+            '/orchestra/api/project/project_changes/',
+            {'cursor': cursor}, format='json')
+        self.assertEqual(response.status_code, 410)
+
+        # Clients resync from the oldest remaining change.
+        changes = get_project_changes(0)
+        self.assertEqual(changes['cursor'], self._latest_change_id())
+
+    @override_settings(ORCHESTRA_PROJECT_CHANGES_SETTLE_SECONDS=0)
+    def test_project_changes(self):
+        cursor = self._latest_change_id()
+        project = ProjectFactory()
+        response = self.api_client.post(
+            '/orchestra/api/project/project_changes/',
+            {'cursor': cursor}, format='json')
+        self.assertEqual(response.status_code, 200)
+        changes = load_encoded_json(response.content)
+        self.assertEqual(changes['cursor'], self._latest_change_id())
+        self.assertEqual(list(changes['projects']), [str(project.id)])
+
+        for data in ({'cursor': -1}, {'cursor': '1'}, {'cursor': True},
+                     {'limit': 0}, {'limit': 'all'},
+                     {'project_ids': project.id},
+                     {'project_ids': [project.id, 'all']}):
+            response = self.api_client.post(
+                '/orchestra/api/project/project_changes/',
+                data, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_get_project_information_sorts_steps_once(self):
+        workflow_version = self.workflow_versions['crazy_workflow']
+        projects = [ProjectFactory(workflow_version=workflow_version)
+                    for _ in range(3)]
+        with patch('orchestra.project_api.api._traverse_step_graph',
+                   wraps=_traverse_step_graph) as mock_traverse:
+            projects_info = get_project_information(
+                [project.id for project in projects])
+        self.assertEqual(mock_traverse.call_count, 1)
+        for project in projects:
+            self.assertEqual(
+                [step['slug'] for step in projects_info[project.id]['steps']],
+                ['stepA', 'stepB', 'stepC', 'stepD', 'stepE', 'stepF',
+                 'stepG', 'stepH'])
+
     @patch.object(
         Service, '_create_drive_service',
         new=mock_create_drive_service)
@@ -248,16 +516,21 @@ class ProjectAPITestCase(OrchestraTestCase):
             Task.objects
             .filter(status=Task.Status.AWAITING_PROCESSING)
             .count())
-        response = self.api_client.post(
-            '/orchestra/api/project/create_project/',
-            {'workflow_slug': 'w1',
-             'workflow_version_slug': 'test_workflow',
-             'description': 'short test description',
-             'priority': 10,
-             'task_class': 'real',
-             'project_data': {}},
-            format='json')
+        # The project's setup runs once the request's transaction commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_client.post(
+                '/orchestra/api/project/create_project/',
+                {'workflow_slug': 'w1',
+                 'workflow_version_slug': 'test_workflow',
+                 'description': 'short test description',
+                 'priority': 10,
+                 'task_class': 'real',
+                 'project_data': {}},
+                format='json')
         self.assertEqual(response.status_code, 200)
+        project_id = load_encoded_json(response.content)['project_id']
+        self.assertEqual(Project.objects.get(id=project_id).setup_status,
+                         Project.SetupStatus.COMPLETE)
 
         self.assertEqual((Task.objects
                           .filter(status=Task.Status.AWAITING_PROCESSING)
@@ -289,6 +562,76 @@ class ProjectAPITestCase(OrchestraTestCase):
                               'message': 'One of the parameters is missing'},
                              400)
 
+    def test_create_projects(self):
+        spec = {'workflow_slug': 'w1',
+                'workflow_version_slug': 'test_workflow',
+                'description': 'bulk test description',
+                'priority': 10,
+                'task_class': 'real',
+                'project_data': {'index': 0}}
+        projects = [
+            spec,
+            dict(spec, task_class='training', project_data={'index': 1}),
+            dict(spec, workflow_version_slug='missing'),
+            dict(spec, task_class='other'),
+            {'workflow_slug': 'w1'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_client.post(
+                '/orchestra/api/project/create_projects/',
+                {'projects': projects}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = load_encoded_json(response.content)['results']
+        self.assertEqual(results[2:], [
+            {'error': 'Workflow version not found'},
+            {'error': 'task_class must be one of real, training'},
+            {'error': ('Missing parameters: workflow_version_slug, '
+                       'description, priority, task_class, project_data')},
+        ])
+
+        created = [Project.objects.get(id=result['project_id'])
+                   for result in results[:2]]
+        self.assertEqual(
+            [(project.project_data, project.task_class,
+              project.setup_status) for project in created],
+            [({'index': 0}, WorkerCertification.TaskClass.REAL,
+              Project.SetupStatus.COMPLETE),
+             ({'index': 1}, WorkerCertification.TaskClass.TRAINING,
+              Project.SetupStatus.COMPLETE)])
+        for project in created:
+            self.assertEqual(
+                list(project.tasks.values_list('step__slug', flat=True)),
+                ['step1'])
+
+        response = self.api_client.post(
+            '/orchestra/api/project/create_projects/',
+            {'projects': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PRODUCTION=True)
+    @patch('orchestra.utils.project_setup_scheduler.schedule_function')
+    def test_create_projects_queues_setup(self, mock_schedule):
+        spec = {'workflow_slug': 'w1',
+                'workflow_version_slug': 'test_workflow',
+                'description': 'bulk test description',
+                'priority': 10,
+                'task_class': 'real',
+                'project_data': {}}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_client.post(
+                '/orchestra/api/project/create_projects/',
+                {'projects': [spec, spec]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        project_ids = [result['project_id'] for result
+                       in load_encoded_json(response.content)['results']]
+        self.assertEqual(
+            [call_args[0][2] for call_args in mock_schedule.call_args_list],
+            project_ids)
+        for project in Project.objects.filter(id__in=project_ids):
+            self.assertEqual(project.setup_status,
+                             Project.SetupStatus.PENDING)
+            self.assertFalse(project.tasks.exists())
+
     def test_workflow_types(self):
         response = self.api_client.get(
             '/orchestra/api/project/workflow_types/', format='json')
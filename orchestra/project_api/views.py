@@ -1,11 +1,18 @@
+import json
 import logging
 from urllib.parse import urlparse
 from urllib.parse import urlunsplit
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from jsonview.exceptions import BadRequest
 from rest_framework import generics
+from rest_framework import status as http_status
+from rest_framework.exceptions import ParseError
 
+from orchestra.core.errors import ProjectChangesCursorError
 from orchestra.core.errors import TaskAssignmentError
 from orchestra.core.errors import WorkerCertificationError
 from orchestra.models import Project
@@ -14,8 +21,16 @@ from orchestra.models import Workflow
 from orchestra.models import Todo
 from orchestra.models import TodoListTemplate
 from orchestra.project import create_project_with_tasks
+from orchestra.project import create_projects_with_tasks
+from orchestra.project_api.api import DEFAULT_PROJECT_CHANGES_LIMIT
+from orchestra.project_api.api import DEFAULT_PROJECT_CHUNK_SIZE
+from orchestra.project_api.api import get_project_changes
 from orchestra.project_api.api import get_project_information
+from orchestra.project_api.api import get_project_information_etag
+from orchestra.project_api.api import iter_project_information
 from orchestra.utils.decorators import api_endpoint
+from orchestra.utils.decorators import streaming_api_endpoint
+from orchestra.utils.etags import conditional_json_response
 from orchestra.utils.load_json import load_encoded_json
 from orchestra.utils.task_lifecycle import assign_task
 from orchestra.utils.notifications import message_experts_slack_group
@@ -28,6 +43,10 @@ from orchestra.todos.api import add_todolist_template
 
 logger = logging.getLogger(__name__)
 
+MAX_PROJECT_CHUNK_SIZE = 1000
+MAX_PROJECT_CHANGES_LIMIT = 5000
+MAX_CREATED_PROJECTS = 500
+
 
 @api_endpoint(methods=['POST'],
               permissions=(IsSignedUser,),
@@ -37,9 +56,79 @@ def project_information(request):
     try:
         data = load_encoded_json(request.body)
         project_ids = data['project_ids']
-        return get_project_information(project_ids)
     except KeyError:
         raise BadRequest('project_ids is required')
+    return conditional_json_response(
+        request, get_project_information_etag(project_ids),
+        lambda: get_project_information(project_ids))
+
+
+@streaming_api_endpoint(methods=['POST'],
+                        permissions=(IsSignedUser,),
+                        logger=logger,
+                        auths=(OrchestraProjectAPIAuthentication,))
+def project_information_stream(request):
+    """
+    Stream the information of many projects as JSON lines, one project
+    per line, in order of project ID. Projects are selected by any
+    combination of `project_ids`, `workflow_slug`, `status` and
+    `started_since`.
+    """
+    data = load_encoded_json(request.body)
+    filters = {
+        'project_ids': data.get('project_ids'),
+        'workflow_slug': data.get('workflow_slug'),
+        'status': data.get('status'),
+        'chunk_size': data.get('chunk_size', DEFAULT_PROJECT_CHUNK_SIZE),
+    }
+    if data.get('started_since') is not None:
+        filters['started_since'] = parse_datetime(data['started_since'])
+        if filters['started_since'] is None:
+            raise ParseError('started_since must be an ISO 8601 datetime')
+    if (not isinstance(filters['chunk_size'], int) or
+            not 0 < filters['chunk_size'] <= MAX_PROJECT_CHUNK_SIZE):
+        raise ParseError('chunk_size must be between 1 and {}'.format(
+            MAX_PROJECT_CHUNK_SIZE))
+
+    lines = (
+        json.dumps(dict(project_information, project_id=project_id),
+                   cls=DjangoJSONEncoder) + '\n'
+        for project_id, project_information
+        in iter_project_information(**filters))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+@api_endpoint(methods=['POST'],
+              permissions=(IsSignedUser,),
+              logger=logger,
+              auths=(OrchestraProjectAPIAuthentication,))
+def project_changes(request):
+    data = load_encoded_json(request.body)
+    cursor = data.get('cursor', 0)
+    project_ids = data.get('project_ids')
+    limit = data.get('limit', DEFAULT_PROJECT_CHANGES_LIMIT)
+    if not _is_integer(cursor) or cursor < 0:
+        raise BadRequest('cursor must be a non-negative integer')
+    if project_ids is not None and (
+            not isinstance(project_ids, list) or
+            not all(_is_integer(project_id) for project_id in project_ids)):
+        raise BadRequest('project_ids must be a list of integers')
+    if (not _is_integer(limit) or
+            not 0 < limit <= MAX_PROJECT_CHANGES_LIMIT):
+        raise BadRequest('limit must be between 1 and {}'.format(
+            MAX_PROJECT_CHANGES_LIMIT))
+    try:
+        return get_project_changes(
+            cursor=cursor, project_ids=project_ids, limit=limit)
+    except ProjectChangesCursorError as e:
+        # The client should reload its projects and sync from cursor 0.
+        return {'error': http_status.HTTP_410_GONE,
+                'message': str(e)}, http_status.HTTP_410_GONE
+
+
+def _is_integer(value):
+    # JSON booleans are loaded as Python booleans, which are integers.
+    return isinstance(value, int) and not isinstance(value, bool)
 
 
 @api_endpoint(methods=['POST'],
@@ -68,6 +157,20 @@ def create_project(request):
     return {'project_id': project.id}
 
 
+@api_endpoint(methods=['POST'],
+              permissions=(IsSignedUser,),
+              logger=logger,
+              auths=(OrchestraProjectAPIAuthentication,))
+def create_projects(request):
+    projects = load_encoded_json(request.body).get('projects')
+    if not isinstance(projects, list):
+        raise BadRequest('projects must be a list')
+    if len(projects) > MAX_CREATED_PROJECTS:
+        raise BadRequest('At most {} projects can be created at once'.format(
+            MAX_CREATED_PROJECTS))
+    return {'results': create_projects_with_tasks(projects)}
+
+
 @api_endpoint(methods=['POST'],
               permissions=(IsSignedUser,),
               logger=logger,
@@ -0,0 +1,95 @@
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from orchestra.models import Iteration
+from orchestra.models import Project
+from orchestra.models import Step
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+from orchestra.models import TimeEntry
+from orchestra.models import Todo
+from orchestra.models import WorkerCertification
+from orchestra.utils.dashboard import invalidate_todo_dashboards
+from orchestra.utils.data_blobs import release_blob
+from orchestra.utils.dashboard import invalidate_worker_dashboards
+from orchestra.utils.project_changes import record_project_changes
+from orchestra.workflow.graph import workflow_graphs
+
+
+# NOTE: Deletions are handled in `pre_delete` where the rows we look up
+# workers through would otherwise be gone (e.g., a deleted project
+# cascades to its tasks and assignments).
+
+@receiver(post_save, sender=TaskAssignment)
+@receiver(pre_delete, sender=TaskAssignment)
+def invalidate_assignment_dashboards(sender, instance, **kwargs):
+    # Other workers on the task move between the pending_review and
+    # pending_processing states when an assignment changes.
+    invalidate_worker_dashboards(worker_ids=[instance.worker_id],
+                                 task_id=instance.task_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def invalidate_task_dashboards(sender, instance, **kwargs):
+    invalidate_worker_dashboards(task_id=instance.id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(pre_delete, sender=Project)
+def invalidate_project_dashboards(sender, instance, **kwargs):
+    invalidate_worker_dashboards(task__project_id=instance.id)
+
+
+@receiver(post_save, sender=Todo)
+@receiver(post_delete, sender=Todo)
+def invalidate_todo_change_dashboards(sender, instance, **kwargs):
+    invalidate_todo_dashboards([instance])
+
+
+@receiver(post_save, sender=WorkerCertification)
+@receiver(post_delete, sender=WorkerCertification)
+def invalidate_certification_dashboards(sender, instance, **kwargs):
+    invalidate_worker_dashboards(worker_ids=[instance.worker_id])
+
+
+@receiver(post_save, sender=Step)
+@receiver(post_delete, sender=Step)
+@receiver(m2m_changed, sender=Step.creation_depends_on.through)
+@receiver(m2m_changed, sender=Step.submission_depends_on.through)
+def invalidate_workflow_graph(sender, instance, **kwargs):
+    workflow_graphs.invalidate(instance.workflow_version_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=TaskAssignment)
+@receiver(post_delete, sender=TaskAssignment)
+@receiver(post_save, sender=Iteration)
+@receiver(post_delete, sender=Iteration)
+def record_project_change(sender, instance, **kwargs):
+    record_project_changes([instance])
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+def record_time_entry_change(sender, instance, **kwargs):
+    # Time entries count towards their assignment's recorded work time.
+    if instance.assignment_id is None:
+        return
+    assignment = (TaskAssignment.unsafe_objects
+                  .filter(id=instance.assignment_id)
+                  .first())
+    if assignment is not None:
+        record_project_changes([assignment])
+
+
+@receiver(post_delete, sender=Iteration)
+def release_submitted_data_blob(sender, instance, **kwargs):
+    if instance.submitted_data_blob_id is not None:
+        release_blob(instance.submitted_data_blob_id)
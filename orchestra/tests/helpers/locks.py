@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.db import connections
+
+LOCKING_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _is_locking(sql):
+    sql = sql.lstrip().upper()
+    return sql.startswith(LOCKING_STATEMENTS) or 'FOR UPDATE' in sql
+
+
+class LockHoldTimer(object):
+    """
+    Measures how long transactions hold row locks: from the first
+    statement of a transaction that locks rows (a write or a
+    `SELECT ... FOR UPDATE`) until the transaction commits. Backends
+    without `SELECT ... FOR UPDATE`, e.g., SQLite, start measuring at
+    the first write.
+
+    Only transactions on the current thread's connection that commit
+    while the timer is active are measured.
+
+    Attributes:
+        hold_times ([float]):
+            The seconds that each committed transaction held its locks.
+    """
+
+    def __init__(self, using='default'):
+        self.connection = connections[using]
+        self.hold_times = []
+        self._lock_start = None
+        self._wrapper = None
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+        self._lock_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.connection.in_atomic_block:
+            # A transaction that was rolled back leaves its start behind.
+            self._lock_start = None
+        elif self._lock_start is None and _is_locking(sql):
+            self._lock_start = time.monotonic()
+            # Callbacks run in order, so this one runs before any side
+            # effects that the transaction deferred until it commits.
+            self.connection.on_commit(self._record_hold_time)
+        return execute(sql, params, many, context)
+
+    def _record_hold_time(self):
+        self.hold_times.append(time.monotonic() - self._lock_start)
+        self._lock_start = None
+
+
+def run_concurrently(functions):
+    """
+    Call `functions` at the same time, each in its own thread and thus
+    with its own database connections.
+
+    Args:
+        functions ([callable]):
+            The functions to call, without arguments.
+
+    Returns:
+        results ([object]):
+            The value that each function returned, in order.
+
+    Raises:
+        Exception:
+            The first exception raised by a function, once all of them
+            have returned.
+    """
+    barrier = threading.Barrier(len(functions))
+    results = [None] * len(functions)
+    errors = [None] * len(functions)
+
+    def run(index, function):
+        try:
+            barrier.wait()
+            results[index] = function()
+        except Exception as e:
+            errors[index] = e
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index, function))
+               for index, function in enumerate(functions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from orchestra.models import Worker
+from orchestra.models import WorkerCertification
+from orchestra.tests.helpers import OrchestraTestCase
+
+
+class BenchmarkStaffingShuffleTestCase(OrchestraTestCase):
+
+    def test_benchmark_staffing_shuffle(self):
+        out = StringIO()
+        call_command('benchmark_staffing_shuffle', '--sizes', '20', '30',
+                     '--repeat', '1', stdout=out)
+        output = out.getvalue()
+        self.assertIn('20 certifications: ORDER BY random', output)
+        self.assertIn('30 certifications: ORDER BY random', output)
+        # Synthetic data is rolled back.
+        self.assertFalse(Worker.objects.exists())
+        self.assertFalse(WorkerCertification.objects.exists())
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from orchestra.models import Project
+from orchestra.models import TimeEntry
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import ProjectFactory
+from orchestra.tests.helpers.fixtures import setup_models
+
+
+class ExportAnalyticsTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        setup_models(self)
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+
+    def _call_command(self, *args):
+        out = StringIO()
+        call_command('export_analytics', self.output_dir.name, *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def _read_table(self, table):
+        rows = []
+        table_dir = os.path.join(self.output_dir.name, table)
+        for filename in sorted(os.listdir(table_dir)):
+            with gzip.open(os.path.join(table_dir, filename), 'rt') as f:
+                rows.extend(csv.DictReader(f))
+        return rows
+
+    def _read_watermarks(self):
+        with open(os.path.join(self.output_dir.name, 'watermarks.json')) as f:
+            return json.load(f)
+
+    def test_export(self):
+        output = self._call_command('--chunk-size', '2')
+        self.assertIn(
+            'Exported {} projects rows.'.format(Project.objects.count()),
+            output)
+
+        projects = self._read_table('projects')
+        self.assertEqual(
+            [int(project['id']) for project in projects],
+            list(Project.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(
+            json.loads(projects[0]['project_data']),
+            Project.objects.order_by('id').first().project_data)
+
+        time_entries = self._read_table('time_entries')
+        time_entry = TimeEntry.objects.get(id=time_entries[0]['id'])
+        self.assertEqual(float(time_entries[0]['time_worked']),
+                         time_entry.time_worked.total_seconds())
+        self.assertEqual(time_entries[0]['worker_id'],
+                         str(time_entry.worker_id))
+        self.assertEqual(self._read_watermarks()['projects'],
+                         Project.objects.order_by('id').last().id)
+
+    def test_incremental_export(self):
+        self._call_command('--tables', 'projects')
+        self.assertEqual(list(self._read_watermarks()), ['projects'])
+
+        output = self._call_command('--tables', 'projects', '--incremental')
+        self.assertIn('Exported 0 projects rows.', output)
+
+        project = ProjectFactory()
+        output = self._call_command('--tables', 'projects', '--incremental')
+        self.assertIn('Exported 1 projects rows.', output)
+        filename = 'projects-{0}-{0}.csv.gz'.format(project.id)
+        self.assertIn(filename, os.listdir(
+            os.path.join(self.output_dir.name, 'projects')))
+        self.assertEqual(self._read_watermarks()['projects'], project.id)
+        self.assertEqual(len(self._read_table('projects')),
+                         Project.objects.count())
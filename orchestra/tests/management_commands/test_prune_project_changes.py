@@ -0,0 +1,49 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from orchestra.models import ProjectChange
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import ProjectFactory
+
+
+class PruneProjectChangesTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for _ in range(3):
+            ProjectFactory()
+        self.change_ids = list(ProjectChange.objects.order_by('id')
+                               .values_list('id', flat=True))
+
+    def _call_command(self, *args):
+        out = StringIO()
+        call_command('prune_project_changes', *args, stdout=out)
+        return out.getvalue()
+
+    def _age_changes(self, change_ids, days):
+        ProjectChange.objects.filter(id__in=change_ids).update(
+            created_at=timezone.now() - timedelta(days=days))
+
+    def test_prune_old_changes(self):
+        self._age_changes(self.change_ids[:-1], 40)
+        self._age_changes(self.change_ids[-1:], 10)
+        self.assertIn('Deleted {} project changes.'.format(
+            len(self.change_ids) - 1), self._call_command())
+        self.assertEqual(
+            list(ProjectChange.objects.values_list('id', flat=True)),
+            self.change_ids[-1:])
+
+        self.assertIn('Deleted 0 project changes.',
+                      self._call_command('--days', '20'))
+        self.assertIn('Deleted 0 project changes.',
+                      self._call_command('--days', '5'))
+
+    def test_latest_change_is_kept(self):
+        self._age_changes(self.change_ids, 40)
+        self._call_command()
+        self.assertEqual(
+            list(ProjectChange.objects.values_list('id', flat=True)),
+            self.change_ids[-1:])
@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from orchestra.models import WorkerDashboard
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import setup_models
+from orchestra.utils.dashboard import get_worker_dashboard
+
+
+class RebuildWorkerDashboardsTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        setup_models(self)
+        self.worker = self.workers[0]
+        self.dashboard = get_worker_dashboard(self.worker)
+        # Corrupt the materialized payload without invalidating it.
+        WorkerDashboard.objects.filter(id=self.dashboard.id).update(tasks=[])
+
+    def _call_command(self, *args, **kwargs):
+        out = StringIO()
+        call_command('rebuild_worker_dashboards', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_dry_run_reports_drift(self):
+        output = self._call_command('--dry-run')
+        self.assertIn('Dashboard for worker {} '.format(self.worker.id),
+                      output)
+        self.assertIn('1 drifted', output)
+        self.dashboard.refresh_from_db()
+        self.assertEqual(self.dashboard.tasks, [])
+
+    def test_rebuild(self):
+        output = self._call_command('--workers', str(self.worker.id))
+        self.assertIn('Rebuilt 1 worker dashboards, 1 drifted.', output)
+        self.dashboard.refresh_from_db()
+        self.assertNotEqual(self.dashboard.tasks, [])
+
+        output = self._call_command()
+        self.assertIn('0 drifted', output)
+        self.assertEqual(WorkerDashboard.objects.count(),
+                         len(self.workers))
@@ -0,0 +1,47 @@
+from django.urls import reverse
+
+from orchestra.models import Iteration
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import TaskAssignmentFactory
+from orchestra.tests.helpers.fixtures import UserFactory
+
+
+class AdminChangelistTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request_client.force_login(
+            UserFactory(is_staff=True, is_superuser=True))
+        self.assignment = TaskAssignmentFactory(
+            in_progress_task_data={'document': 'x' * 1000})
+        self.iteration = Iteration.objects.create(
+            assignment=self.assignment,
+            submitted_data={'document': 'x' * 1000})
+
+    def test_iteration_changelist(self):
+        response = self.request_client.get(
+            reverse('admin:orchestra_iteration_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [iteration.id for iteration
+             in response.context['cl'].result_list],
+            [self.iteration.id])
+
+        response = self.request_client.get(reverse(
+            'admin:orchestra_iteration_change', args=(self.iteration.id,)))
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_assignment_changelist(self):
+        response = self.request_client.get(
+            reverse('admin:orchestra_taskassignment_changelist'))
+        self.assertEqual(response.status_code, 200)
+        result_list = response.context['cl'].result_list
+        self.assertEqual([assignment.id for assignment in result_list],
+                         [self.assignment.id])
+        self.assertEqual(result_list[0].get_deferred_fields(),
+                         {'in_progress_task_data'})
+
+        response = self.request_client.get(reverse(
+            'admin:orchestra_taskassignment_change',
+            args=(self.assignment.id,)))
+        self.assertEqual(response.status_code, 200)
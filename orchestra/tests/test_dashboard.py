@@ -1,4 +1,5 @@
 import json
+from unittest.mock import patch
 
 from django.test import override_settings
 
@@ -12,6 +13,7 @@ from orchestra.tests.helpers.iterations import verify_iterations
 from orchestra.utils.load_json import load_encoded_json
 from orchestra.utils.task_lifecycle import assign_task
 from orchestra.utils.task_lifecycle import create_subsequent_tasks
+from orchestra.utils.task_lifecycle import save_task
 
 
 class DashboardTestCase(OrchestraTransactionTestCase):
@@ -101,6 +103,50 @@ class DashboardTestCase(OrchestraTransactionTestCase):
         self.assertEqual(tags[0]['label'], 'foo')
         self.assertEqual(tags[0]['status'], 'default')
 
+    def test_dashboard_tasks_active_only(self):
+        task = self.tasks['awaiting_processing']
+        assign_task(self.workers[0].id, task.id)
+        task.status = Task.Status.COMPLETE
+        task.save()
+        url = '/orchestra/api/interface/dashboard_tasks/'
+        returned = load_encoded_json(self.clients[0].get(url).content)
+        self.assertIn('complete',
+                      [task['state'] for task in returned['tasks']])
+
+        returned = load_encoded_json(
+            self.clients[0].get(url, {'active_only': 'true'}).content)
+        self.assertGreater(len(returned['tasks']), 0)
+        self.assertNotIn('complete',
+                         [task['state'] for task in returned['tasks']])
+
+    def test_dashboard_complete_tasks(self):
+        url = '/orchestra/api/interface/dashboard_complete_tasks/'
+        assign_task(self.workers[0].id, self.tasks['awaiting_processing'].id)
+        for task in Task.objects.filter(assignments__worker=self.workers[0]):
+            task.status = Task.Status.COMPLETE
+            task.save()
+        num_complete = TaskAssignment.objects.filter(
+            worker=self.workers[0]).count()
+        self.assertGreater(num_complete, 1)
+
+        task_ids = []
+        params = {'page_size': 1}
+        while True:
+            response = self.clients[0].get(url, params)
+            self.assertEqual(response.status_code, 200)
+            returned = load_encoded_json(response.content)
+            self.assertEqual(len(returned['tasks']), 1)
+            task_ids.extend(task['id'] for task in returned['tasks'])
+            if returned['nextCursor'] is None:
+                break
+            params['cursor'] = returned['nextCursor']
+        self.assertEqual(len(task_ids), num_complete)
+
+        response = self.clients[0].get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.clients[0].get(url, {'page_size': 0})
+        self.assertEqual(response.status_code, 400)
+
     def test_entry_level_task_assignment(self):
         task = self.tasks['awaiting_processing']
         assign_task(self.workers[0].id, task.id)
@@ -122,6 +168,37 @@ class DashboardTestCase(OrchestraTransactionTestCase):
             'Processing', 'Processing', False,
             False, {}, self.workers[0])
 
+    def test_task_assignment_information_etag(self):
+        task = self.tasks['awaiting_processing']
+        assign_task(self.workers[0].id, task.id)
+
+        def request(client, **headers):
+            return client.post(
+                '/orchestra/api/interface/task_assignment_information/',
+                json.dumps({'task_id': task.id}),
+                content_type='application/json', **headers)
+
+        response = request(self.clients[0])
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with patch('orchestra.views.get_task_overview_for_worker') \
+                as mock_get_task_overview:
+            response = request(self.clients[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        mock_get_task_overview.assert_not_called()
+
+        # Another worker doesn't share the ETag.
+        self._verify_bad_task_assignment_information(
+            self.clients[2], {'task_id': task.id},
+            'Worker is not associated with task')
+
+        save_task(task.id, {'new': 'data'}, self.workers[0])
+        response = request(self.clients[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            load_encoded_json(response.content)['task']['data'],
+            {'new': 'data'})
+
     def _check_client_dashboard_state(self, client, non_empty_status):
         response = client.get('/orchestra/api/interface/dashboard_tasks/')
         returned = load_encoded_json(response.content)
@@ -215,6 +292,72 @@ class DashboardTestCase(OrchestraTransactionTestCase):
             'Processing', 'Reviewing', True,
             False, reviewer_data, self.workers[1])
 
+    def test_patch_task_assignment(self):
+        task = self.tasks['awaiting_processing']
+        assign_task(self.workers[0].id, task.id)
+        assignment = task.assignments.get(worker=self.workers[0])
+
+        def patch_task_assignment(client, patch, data_version):
+            response = client.post(
+                '/orchestra/api/interface/patch_task_assignment/',
+                json.dumps({'task_id': task.id,
+                            'patch': patch,
+                            'data_version': data_version}),
+                content_type='application/json')
+            return response.status_code, load_encoded_json(response.content)
+
+        # Saving the full data returns the version to patch against.
+        response = self.clients[0].post(
+            '/orchestra/api/interface/save_task_assignment/',
+            json.dumps({'task_id': task.id,
+                        'task_data': {'title': 'Draft', 'sections': []}}),
+            content_type='application/json')
+        data_version = load_encoded_json(response.content)['data_version']
+        assignment.refresh_from_db()
+        self.assertEqual(data_version, assignment.data_version)
+
+        status_code, returned = patch_task_assignment(
+            self.clients[0],
+            [{'op': 'replace', 'path': '/title', 'value': 'Final'},
+             {'op': 'add', 'path': '/sections/-', 'value': 'Intro'}],
+            data_version)
+        self.assertEqual((status_code, returned),
+                         (200, {'data_version': data_version + 1}))
+        self._verify_good_task_assignment_information(
+            self.clients[0], {'task_id': task.id},
+            task.project.short_description,
+            'Processing', 'Processing', False,
+            False, {'title': 'Final', 'sections': ['Intro']},
+            self.workers[0])
+
+        # Patches against an older version are rejected.
+        status_code, returned = patch_task_assignment(
+            self.clients[0],
+            [{'op': 'replace', 'path': '/title', 'value': 'Stale'}],
+            data_version)
+        self.assertEqual(status_code, 409)
+        self.assertEqual(returned['message'],
+                         'Task data has changed since version {}'.format(
+                             data_version))
+
+        # Patches that don't apply leave the data unchanged.
+        status_code, returned = patch_task_assignment(
+            self.clients[0],
+            [{'op': 'replace', 'path': '/title', 'value': 'Other'},
+             {'op': 'remove', 'path': '/missing'}],
+            data_version + 1)
+        self.assertEqual(status_code, 400)
+        self.assertEqual(returned['message'], 'Path not found: /missing')
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.in_progress_task_data,
+                         {'title': 'Final', 'sections': ['Intro']})
+
+        status_code, returned = patch_task_assignment(
+            self.clients[1], [], data_version + 1)
+        self.assertEqual(status_code, 400)
+        self.assertEqual(returned['message'],
+                         'Worker is not associated with task')
+
     def test_submit_entry_level_task_assignment(self):
         task = self.tasks['awaiting_processing']
         assign_task(self.workers[0].id, task.id)
@@ -465,6 +608,7 @@ class DashboardTestCase(OrchestraTransactionTestCase):
         self.assertEqual(response.status_code, 200)
 
         task = Task.objects.get(id=post_data['task_id'])
+        assignment = task.assignments.get(worker=worker)
         returned = load_encoded_json(response.content)
         expected = {
             'project': {'details': project_description,
@@ -474,9 +618,11 @@ class DashboardTestCase(OrchestraTransactionTestCase):
                             Project.STATUS_CHOICES)[task.project.status],
                         'scratchpad_url': None},
             'status': assignment_status,
-            'task': {'data': task_data, 'status': task_status},
+            'task': {'data': task_data,
+                     'data_version': assignment.data_version,
+                     'status': task_status},
             'task_id': task.id,
-            'assignment_id': task.assignments.get(worker=worker).id,
+            'assignment_id': assignment.id,
             'workflow': {
                 'slug': 'w1', 'name': 'Workflow One',
             },
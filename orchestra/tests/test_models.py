@@ -5,6 +5,7 @@ from dateutil.parser import parse
 from orchestra.accounts.signals import orchestra_user_registered
 from orchestra.core.errors import ModelSaveError
 from orchestra.models import PayRate
+from orchestra.models import TaskAssignment
 from orchestra.models import Worker
 from orchestra.models import WorkerCertification
 from orchestra.tests.helpers import OrchestraModelTestCase
@@ -208,6 +209,38 @@ class TaskAssignmentTestCase(OrchestraModelTestCase):
     __unittest_skip__ = False
     model = TaskAssignmentFactory
 
+    def test_defer_data(self):
+        assignment = TaskAssignmentFactory(
+            in_progress_task_data={'document': 'x' * 1000})
+        task = assignment.task
+        deferred = task.assignments.defer_data().get()
+        self.assertEqual(deferred.get_deferred_fields(),
+                         {'in_progress_task_data'})
+        with self.assertNumQueries(1):
+            self.assertEqual(deferred.in_progress_task_data,
+                             {'document': 'x' * 1000})
+
+    def test_with_json_paths(self):
+        assignment = TaskAssignmentFactory(in_progress_task_data={
+            'document': {'title': 'Title', 'sections': ['a', 'b']},
+            'comments': [{'text': 'Comment'}],
+        })
+        projected = (TaskAssignment.objects
+                     .filter(id=assignment.id)
+                     .defer_data()
+                     .with_json_paths('in_progress_task_data',
+                                      title='document.title',
+                                      section='document.sections.1',
+                                      comment='comments.0',
+                                      missing='document.missing')
+                     .get())
+        self.assertEqual(
+            (projected.title, projected.section, projected.comment,
+             projected.missing),
+            ('Title', 'b', {'text': 'Comment'}, None))
+        self.assertEqual(projected.get_deferred_fields(),
+                         {'in_progress_task_data'})
+
 
 class WorkerTestCase(OrchestraModelTestCase):
     __unittest_skip__ = False
@@ -1,13 +1,20 @@
+from io import StringIO
 from unittest.mock import patch
 
+import slacker
+from django.core.management import call_command
 from django.db.models import Q
 from django.test import override_settings
 
 from orchestra.communication.slack import create_project_slack_group
 from orchestra.google_apps.convenience import Service
 from orchestra.google_apps.convenience import create_project_google_folder
+from orchestra.google_apps.errors import GoogleDriveError
 from orchestra.models import Project
 from orchestra.models import Task
+from orchestra.models import WorkerCertification
+from orchestra.project import create_project_with_tasks
+from orchestra.project import set_up_project
 from orchestra.tests.helpers import OrchestraTestCase
 from orchestra.tests.helpers.fixtures import ProjectFactory
 from orchestra.tests.helpers.fixtures import setup_models
@@ -61,7 +68,8 @@ class BasicTaskLifeCycleTestCase(OrchestraTestCase):
         self.assertFalse(mock_slack_archive.called)
 
         complete_and_skip_task(task.id)
-        create_subsequent_tasks(project)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_subsequent_tasks(project)
         project.refresh_from_db()
         self.assertEqual(project.status, Project.Status.COMPLETED)
         self.assertTrue(mock_slack_archive.called)
@@ -81,7 +89,11 @@ class BasicTaskLifeCycleTestCase(OrchestraTestCase):
         task.status = Task.Status.COMPLETE
         task.save()
 
-        create_subsequent_tasks(project)
+        # Running the commit callbacks would otherwise also run the
+        # machine task and leave no incomplete tasks.
+        with patch('orchestra.utils.task_lifecycle.schedule_machine_tasks'), \
+                self.captureOnCommitCallbacks(execute=True):
+            create_subsequent_tasks(project)
         project.refresh_from_db()
         incomplete_tasks = (Task.objects.filter(project=project).exclude(
             Q(status=Task.Status.COMPLETE) |
@@ -111,3 +123,101 @@ class BasicTaskLifeCycleTestCase(OrchestraTestCase):
         self.assertTrue(incomplete_tasks > 0)
         self.assertEqual(project.status, Project.Status.ACTIVE)
         self.assertFalse(mock_slack_archive.called)
+
+
+@override_settings(GOOGLE_APPS=True, ORCHESTRA_SLACK_EXPERTS_ENABLED=True)
+@patch.object(Service, '_create_drive_service',
+              new=mock_create_drive_service)
+class ProjectSetupTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        setup_models(self)
+
+    def _create_project(self, description='Project setup'):
+        with self.captureOnCommitCallbacks(execute=True):
+            project = create_project_with_tasks(
+                'w1', 'test_workflow', description, 10,
+                WorkerCertification.TaskClass.REAL, {})
+        project.refresh_from_db()
+        return project
+
+    def test_set_up_project(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            project = create_project_with_tasks(
+                'w1', 'test_workflow', 'Project setup', 10,
+                WorkerCertification.TaskClass.REAL, {})
+        # Nothing is set up before the project is committed.
+        self.assertEqual(project.setup_status, Project.SetupStatus.PENDING)
+        self.assertFalse(project.tasks.exists())
+
+        for callback in callbacks:
+            callback()
+        project.refresh_from_db()
+        self.assertEqual(project.setup_status, Project.SetupStatus.COMPLETE)
+        self.assertIsNone(project.setup_error)
+        self.assertEqual(project.project_data['project_folder_id'], 1)
+        self.assertEqual(project.scratchpad_url, 'http://a.google.com/link')
+        self.assertIn(project.slack_group_id, self.slack.data['channels'])
+        self.assertEqual(
+            list(project.tasks.values_list('step__slug', flat=True)),
+            ['step1'])
+
+        # A project that is set up isn't set up again.
+        self.assertIsNone(set_up_project(project.id))
+
+    @patch('orchestra.project.create_project_google_folder',
+           wraps=create_project_google_folder)
+    def test_retry_failed_project_setup(self, mock_create_folder):
+        with patch('orchestra.communication.tests.helpers.slack.'
+                   'Conversations.create',
+                   side_effect=slacker.Error('fatal_error')):
+            project = self._create_project()
+        self.assertEqual(project.setup_status, Project.SetupStatus.FAILED)
+        self.assertEqual(project.setup_error,
+                         "slack_group: Error('fatal_error')")
+        self.assertEqual(project.project_data['project_folder_id'], 1)
+        self.assertIsNone(project.slack_group_id)
+        self.assertFalse(project.tasks.exists())
+
+        out = StringIO()
+        call_command('retry_project_setup', stdout=out)
+        self.assertEqual(out.getvalue(),
+                         'Project {} setup: Complete.\n'.format(project.id))
+        project.refresh_from_db()
+        self.assertEqual(project.setup_status, Project.SetupStatus.COMPLETE)
+        self.assertIsNotNone(project.slack_group_id)
+        self.assertEqual(project.tasks.count(), 1)
+        # The folder from the failed run is kept.
+        self.assertEqual(mock_create_folder.call_count, 1)
+
+    @patch.object(Service, 'insert_folder', autospec=True,
+                  side_effect=Service.insert_folder)
+    def test_retry_partial_google_folder_setup(self, mock_insert_folder):
+        with patch('orchestra.google_apps.convenience.'
+                   'create_document_from_template',
+                   side_effect=GoogleDriveError('Copy failed')):
+            project = self._create_project()
+        self.assertEqual(project.setup_status, Project.SetupStatus.FAILED)
+        self.assertEqual(project.setup_error,
+                         "google_folder: GoogleDriveError('Copy failed')")
+        # The folder is recorded even though its scratchpad failed.
+        self.assertEqual(project.project_data['project_folder_id'], 1)
+        self.assertIsNone(project.scratchpad_url)
+
+        self.assertEqual(set_up_project(project.id),
+                         Project.SetupStatus.COMPLETE)
+        project.refresh_from_db()
+        self.assertEqual(project.scratchpad_url, 'http://a.google.com/link')
+        self.assertEqual(mock_insert_folder.call_count, 1)
+
+    def test_set_up_project_taken_slack_group_name(self):
+        self.slack.conversations.create('project-setup-1', is_private=True)
+        random_strings = iter(['1', '1', '2'])
+        with patch('orchestra.communication.slack._random_string',
+                   new=lambda: next(random_strings)):
+            project = self._create_project()
+        self.assertEqual(project.setup_status, Project.SetupStatus.COMPLETE)
+        self.assertEqual(
+            self.slack.data['channels'][project.slack_group_id]['name'],
+            'project-setup-2')
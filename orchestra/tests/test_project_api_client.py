@@ -4,6 +4,7 @@ from unittest.mock import patch
 from django.test import TestCase
 from rest_framework.test import APIClient
 
+from orchestra.models import Project
 from orchestra.models import Todo
 from orchestra.tests.helpers.fixtures import TodoFactory
 from orchestra.tests.helpers.fixtures import TodoListTemplateFactory
@@ -11,6 +12,7 @@ from orchestra.tests.helpers.fixtures import StepFactory
 from orchestra.tests.helpers.fixtures import ProjectFactory
 from orchestra.tests.helpers.fixtures import WorkflowVersionFactory
 from orchestra.project_api.auth import SignedUser
+from orchestra.orchestra_api import create_orchestra_projects
 from orchestra.orchestra_api import create_todos
 from orchestra.orchestra_api import get_todos
 from orchestra.orchestra_api import get_todo_templates
@@ -203,6 +205,41 @@ class TodoTemplatesAPITests(TestCase):
         self.assertEqual(len(result['errors']), 1)
 
 
+class ProjectAPITests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.request_client = APIClient(enforce_csrf_checks=True)
+        self.request_client.force_authenticate(user=SignedUser())
+        self.workflow_version = WorkflowVersionFactory()
+
+    @patch('orchestra.orchestra_api.requests')
+    def test_create_orchestra_projects(self, mock_request):
+        # This converts `requests.post` into DRF's `APIClient.post`
+        # To make it testable
+        def post(url, *args, **kwargs):
+            data = json.loads(kwargs.get('data', ''))
+            return_value = self.request_client.post(url, data, format='json')
+            return_value.text = return_value.content.decode()
+            return return_value
+
+        mock_request.post = post
+        projects = [{
+            'workflow_slug': self.workflow_version.workflow.slug,
+            'workflow_version_slug': self.workflow_version.slug,
+            'description': 'Project {}'.format(x),
+            'priority': x,
+            'task_class': 'real',
+            'project_data': {},
+        } for x in range(3)]
+        results = create_orchestra_projects(projects)
+        self.assertEqual(
+            list(Project.objects.filter(
+                id__in=[result['project_id'] for result in results])
+                .order_by('priority')
+                .values_list('short_description', flat=True)),
+            ['Project 0', 'Project 1', 'Project 2'])
+
+
 class TodoAPITests(TestCase):
     def setUp(self):
         super().setUp()
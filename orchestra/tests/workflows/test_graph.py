@@ -0,0 +1,95 @@
+from django.db.models import F
+
+from orchestra.models import WorkflowVersion
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import setup_models
+from orchestra.workflow.graph import workflow_graphs
+
+
+class WorkflowGraphTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        setup_models(self)
+        self.workflow_version = self.workflow_versions['crazy_workflow']
+
+    def _slugs(self, workflow_graph, numbers):
+        return [workflow_graph.steps[number].slug for number in numbers]
+
+    def test_compiled_workflow_version(self):
+        workflow_graph = workflow_graphs.get(self.workflow_version)
+        self.assertEqual(
+            [step.slug for step in workflow_graph.steps],
+            ['stepA', 'stepB', 'stepC', 'stepD', 'stepE', 'stepF', 'stepG',
+             'stepH'])
+        self.assertEqual(
+            workflow_graph.get_step('stepE'),
+            self.workflow_steps['crazy_workflow']['stepE'])
+        self.assertEqual(
+            [step.slug for step
+             in workflow_graph.get_creation_dependencies('stepE')],
+            ['stepC', 'stepD'])
+        self.assertEqual(
+            self._slugs(workflow_graph, workflow_graph.creation_dependents[
+                workflow_graph.step_indexes['stepF']]),
+            ['stepG', 'stepH'])
+        self.assertEqual(
+            [step.slug for step
+             in workflow_graph.get_creation_prerequisites('stepG')],
+            ['stepA', 'stepB', 'stepC', 'stepD', 'stepE', 'stepF'])
+        self.assertEqual(
+            self._slugs(workflow_graph, workflow_graph.topological_order),
+            ['stepA', 'stepB', 'stepC', 'stepD', 'stepE', 'stepF', 'stepG',
+             'stepH'])
+
+    def test_compiled_workflow_version_cycle(self):
+        workflow_graph = workflow_graphs.get(
+            self.workflow_versions['erroneous_workflow_1'])
+        # Steps on the cycle can't be ordered, but their prerequisites
+        # are still known.
+        self.assertEqual(
+            self._slugs(workflow_graph, workflow_graph.topological_order),
+            ['stepA'])
+        self.assertEqual(
+            [step.slug for step
+             in workflow_graph.get_creation_prerequisites('stepB')],
+            ['stepA', 'stepB', 'stepC'])
+
+    def test_workflow_graph_cache(self):
+        workflow_graph = workflow_graphs.get(self.workflow_version)
+        # Only the stamp is read while it is unchanged, and each lookup
+        # gets its own step objects.
+        with self.assertNumQueries(1):
+            cached = workflow_graphs.get(self.workflow_version.id)
+        self.assertIs(cached.graph, workflow_graph.graph)
+        self.assertIsNot(cached.get_step('stepA'),
+                         workflow_graph.get_step('stepA'))
+        cached.get_step('stepA').user_interface['changed'] = True
+        self.assertNotIn('changed',
+                         workflow_graph.get_step('stepA').user_interface)
+
+        # Changing dependencies drops the compiled graph.
+        steps = self.workflow_steps['crazy_workflow']
+        steps['stepH'].creation_depends_on.add(steps['stepG'])
+        workflow_graph = workflow_graphs.get(self.workflow_version)
+        self.assertEqual(
+            [step.slug for step
+             in workflow_graph.get_creation_dependencies('stepH')],
+            ['stepF', 'stepG'])
+        self.assertEqual(
+            self._slugs(workflow_graph, workflow_graph.topological_order)[-2:],
+            ['stepG', 'stepH'])
+
+        workflow_graphs.invalidate(self.workflow_version.id)
+        self.assertIsNot(workflow_graphs.get(self.workflow_version).graph,
+                         workflow_graph.graph)
+
+    def test_invalidated_by_other_processes(self):
+        workflow_graph = workflow_graphs.get(self.workflow_version)
+
+        # Another process invalidating the graph only changes the stamp
+        # in the database.
+        WorkflowVersion.objects.filter(id=self.workflow_version.id).update(
+            graph_stamp=F('graph_stamp') + 1)
+        self.assertIsNot(workflow_graphs.get(self.workflow_version).graph,
+                         workflow_graph.graph)
@@ -10,6 +10,7 @@ from orchestra.json_schemas.todos import TodoListSchema
 from orchestra.json_schemas.todos import TodoActionListSchema
 from orchestra.utils.mixins import JSONSchemaValidationMixin
 from orchestra.utils.common_helpers import get_step_by_project_id_and_step_slug
+from orchestra.utils.dashboard import invalidate_todo_dashboards
 
 
 class TodoQASerializer(serializers.ModelSerializer):
@@ -51,9 +52,14 @@ class TodoBulkCreateListSerializer(serializers.ListSerializer):
             self.child.Meta.model.objects.bulk_create(result)
         except IntegrityError as e:
             raise ValidationError(e)
+        # Bulk operations don't send save signals.
+        invalidate_todo_dashboards(result)
         return result
 
     def update(self, instances, validated_data):
+        # Todos might be moved to another project or step, so dashboards
+        # are invalidated both before and after the update.
+        invalidate_todo_dashboards(instances)
         result = []
         for instance, data in zip(instances, validated_data):
             result.append(self.child.update(instance, data))
@@ -68,6 +74,7 @@ class TodoBulkCreateListSerializer(serializers.ListSerializer):
         except IntegrityError as e:
             raise ValidationError(e)
 
+        invalidate_todo_dashboards(result)
         return result
 
 
@@ -88,7 +88,9 @@ def notify_todo_created(todo, user):
     recipients = ' & '.join(
         assignment.worker.formatted_slack_username()
         for task in tasks
-        for assignment in task.assignments.all()
+        for assignment in (task.assignments
+                           .defer_data()
+                           .select_related('worker'))
         if assignment and assignment.worker)
     if sender:
         message = '{} has created a new todo `{}` for {}.'.format(
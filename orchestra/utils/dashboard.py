@@ -0,0 +1,168 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models import Min
+from django.db.models import Q
+from django.utils import timezone
+
+from orchestra.models import TaskAssignment
+from orchestra.models import Todo
+from orchestra.models import WorkerDashboard
+from orchestra.utils.task_lifecycle import DASHBOARD_COMPLETE_TASKS_LIMIT
+from orchestra.utils.task_lifecycle import complete_tasks_assigned_to_worker
+from orchestra.utils.task_lifecycle import tasks_assigned_to_worker
+from orchestra.utils.task_lifecycle import worker_has_reviewer_status
+
+
+def _dashboard_valid_until(worker, time_now):
+    """
+    Return the earliest future start time of a pending todo on one of
+    `worker`'s in-progress assignments. Once that time passes, the
+    todo's ordering and the task's active state can change, so the
+    materialized dashboard must be rebuilt.
+    """
+    return (
+        Todo.objects
+        .filter(status=Todo.Status.PENDING.value,
+                start_by_datetime__gt=time_now,
+                project__tasks__step=F('step'),
+                project__tasks__assignments__worker=worker,
+                project__tasks__assignments__status=(
+                    TaskAssignment.Status.PROCESSING))
+        .aggregate(valid_until=Min('start_by_datetime'))['valid_until'])
+
+
+def build_worker_dashboard(worker):
+    """
+    Compute `worker`'s dashboard from the live tables.
+
+    Args:
+        worker (orchestra.models.Worker):
+            The specified worker object.
+
+    Returns:
+        dashboard (dict):
+            The dashboard's `tasks`, `complete_tasks` and
+            `reviewer_status`, serialized the way they are returned to
+            the client, along with the time the dashboard is
+            `valid_until`.
+    """
+    time_now = timezone.now()
+    tasks = tasks_assigned_to_worker(worker, include_complete=False)
+    complete_tasks, _ = complete_tasks_assigned_to_worker(
+        worker, page_size=DASHBOARD_COMPLETE_TASKS_LIMIT)
+    return {
+        # Round-trip through the encoder used by our JSON views so that
+        # the materialized payload is identical to the live one.
+        'tasks': json.loads(json.dumps(tasks, cls=DjangoJSONEncoder)),
+        'complete_tasks': json.loads(
+            json.dumps(complete_tasks, cls=DjangoJSONEncoder)),
+        'reviewer_status': worker_has_reviewer_status(worker),
+        'valid_until': _dashboard_valid_until(worker, time_now),
+    }
+
+
+def rebuild_worker_dashboard(worker):
+    """
+    Rebuild and store the materialized dashboard for `worker`.
+
+    The payload is only stored if the dashboard wasn't invalidated while
+    it was being computed, so a concurrent change is never masked by an
+    older payload.
+
+    Args:
+        worker (orchestra.models.Worker):
+            The specified worker object.
+
+    Returns:
+        dashboard (orchestra.models.WorkerDashboard):
+            The worker's dashboard, holding the freshly built payload.
+    """
+    dashboard, _ = WorkerDashboard.objects.get_or_create(worker=worker)
+    built_version = dashboard.version
+    built = build_worker_dashboard(worker)
+    (WorkerDashboard.objects
+     .filter(id=dashboard.id, version=built_version)
+     .update(built_version=built_version, updated_at=timezone.now(),
+             **built))
+    dashboard.built_version = built_version
+    for field, value in built.items():
+        setattr(dashboard, field, value)
+    return dashboard
+
+
+def get_worker_dashboard(worker, include_complete=True):
+    """
+    Return the materialized dashboard for `worker`, rebuilding it if it
+    is missing or stale.
+
+    Args:
+        worker (orchestra.models.Worker):
+            The specified worker object.
+        include_complete (bool):
+            Whether to read the worker's complete tasks. If False,
+            `complete_tasks` is deferred unless the dashboard had to be
+            rebuilt.
+
+    Returns:
+        dashboard (orchestra.models.WorkerDashboard):
+            The worker's up-to-date dashboard.
+    """
+    dashboards = WorkerDashboard.objects.filter(worker=worker)
+    if not include_complete:
+        dashboards = dashboards.defer('complete_tasks')
+    dashboard = dashboards.first()
+    if dashboard is None or not dashboard.is_fresh(timezone.now()):
+        dashboard = rebuild_worker_dashboard(worker)
+    return dashboard
+
+
+def invalidate_worker_dashboards(worker_ids=None, **assignment_filters):
+    """
+    Mark the dashboards of the specified workers as stale.
+
+    Args:
+        worker_ids ([int]):
+            IDs of workers whose dashboards should be invalidated.
+        **assignment_filters:
+            Lookups on orchestra.models.TaskAssignment (e.g.,
+            `task__project_id=1`). The dashboards of all workers with a
+            matching assignment are invalidated.
+
+    Returns:
+        None
+    """
+    workers_filter = Q()
+    if worker_ids:
+        workers_filter |= Q(worker_id__in=worker_ids)
+    if assignment_filters:
+        # Include deleted assignments, since deleting an assignment
+        # changes the dashboard of the worker it belonged to.
+        workers_filter |= Q(worker__in=(
+            TaskAssignment.unsafe_objects
+            .filter(**assignment_filters)
+            .values('worker_id')))
+    if workers_filter:
+        (WorkerDashboard.objects
+         .filter(workers_filter)
+         .update(version=F('version') + 1))
+
+
+def invalidate_todo_dashboards(todos):
+    """
+    Mark as stale the dashboards of workers assigned to the tasks the
+    given todos belong to.
+
+    Args:
+        todos ([orchestra.models.Todo]):
+            The todos that were modified.
+
+    Returns:
+        None
+    """
+    project_steps = {(todo.project_id, todo.step_id) for todo in todos
+                     if todo.project_id is not None}
+    for project_id, step_id in project_steps:
+        invalidate_worker_dashboards(task__project_id=project_id,
+                                     task__step_id=step_id)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import zlib
+
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import OuterRef
+from jsonfield.encoder import JSONEncoder
+
+from orchestra.models import DataBlob
+from orchestra.models import Iteration
+
+
+def encode_data(data):
+    """
+    Encode a JSON value for storage in a data blob.
+
+    Args:
+        data (object):
+            The JSON value to encode.
+
+    Returns:
+        encoded_data (tuple):
+            The `(digest, compressed_data, size)` of the value's
+            canonical encoding, which doesn't depend on key order.
+    """
+    encoded = json.dumps(data, cls=JSONEncoder, sort_keys=True,
+                         separators=(',', ':')).encode('utf-8')
+    return (hashlib.sha256(encoded).hexdigest(),
+            zlib.compress(encoded),
+            len(encoded))
+
+
+def decode_data(compressed_data):
+    # Some databases return binary fields as a memoryview.
+    return json.loads(zlib.decompress(bytes(compressed_data)).decode('utf-8'))
+
+
+def store_data(data):
+    """
+    Store a JSON value in the blob for its content, creating the blob if
+    no identical value is stored yet, and add a reference to the blob.
+
+    Args:
+        data (object):
+            The JSON value to store.
+
+    Returns:
+        blob (orchestra.models.DataBlob):
+            The blob storing `data`.
+    """
+    digest, compressed_data, size = encode_data(data)
+    with transaction.atomic():
+        # Locking the blob until the reference to it is saved keeps
+        # `delete_unreferenced_blobs` from deleting it in the meantime.
+        blob = (DataBlob.objects.select_for_update()
+                .filter(digest=digest).first())
+        if blob is None:
+            blob, created = DataBlob.objects.get_or_create(
+                digest=digest,
+                defaults={'data': compressed_data, 'size': size,
+                          'ref_count': 1})
+            if created:
+                return blob
+            blob = DataBlob.objects.select_for_update().get(id=blob.id)
+        # Count the reference in the database so that concurrent
+        # references to the same blob aren't lost.
+        DataBlob.objects.filter(id=blob.id).update(
+            ref_count=F('ref_count') + 1)
+    return blob
+
+
+def release_blob(blob_id):
+    """
+    Remove a reference to a blob added by `store_data`.
+    """
+    DataBlob.objects.filter(id=blob_id, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1)
+
+
+def delete_unreferenced_blobs():
+    """
+    Delete the blobs that no longer have references.
+
+    Returns:
+        num_deleted (int):
+            The number of deleted blobs.
+    """
+    num_deleted = 0
+    for blob_id in list(DataBlob.objects
+                        .filter(ref_count=0)
+                        .values_list('id', flat=True)):
+        with transaction.atomic():
+            # Lock the blob and check its count again, as `store_data`
+            # may have added a reference since it was listed.
+            blob = (
+                DataBlob.objects
+                .select_for_update()
+                .filter(id=blob_id, ref_count=0)
+                # Iterations protect the blobs they refer to, so skip
+                # blobs whose count is off.
+                .exclude(Exists(Iteration.unsafe_objects.filter(
+                    submitted_data_blob=OuterRef('id'))))
+                .first())
+            if blob is not None:
+                blob.delete()
+                num_deleted += 1
+    return num_deleted
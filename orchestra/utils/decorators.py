@@ -69,6 +69,24 @@ def api_endpoint(methods, permissions, logger, auths=()):
         return api_endpoint_decorator
 
 
+def streaming_api_endpoint(methods, permissions, logger, auths):
+    """
+    Like `api_endpoint` for programmatic clients, but for views that return
+    a `StreamingHttpResponse`, which `json_view` can't pass through. Errors
+    should be raised as Django REST framework API exceptions.
+    """
+    def streaming_api_endpoint_decorator(func):
+        @csrf_exempt
+        @api_view(methods)
+        @authentication_classes(auths)
+        @permission_classes(permissions)
+        @api_exception_logger(logger)
+        def func_wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        return func_wrapper
+    return streaming_api_endpoint_decorator
+
+
 def run_if(*args):
     """
     Decorator prevents function run if required feature flag is False and
@@ -0,0 +1,75 @@
+from django.db.models import Count
+
+from orchestra.models import Step
+from orchestra.models import WorkerCertification
+
+
+class CertificationEligibilityIndex(object):
+    """
+    Maps (step, role, task class, staffbot_enabled) to the IDs of the
+    workers who hold every certification the step requires.
+
+    Entries are computed on first use and kept for the life of the
+    index, which doesn't see certification changes made after an entry
+    is built. Keep an index only for one staffing run or request.
+    """
+
+    def __init__(self):
+        self._eligible_workers = {}
+
+    def _build(self, step_id, role, task_class, require_staffbot_enabled):
+        required_certification_ids = set(
+            Step.required_certifications.through.objects
+            .filter(step_id=step_id)
+            .values_list('certification_id', flat=True))
+        if not required_certification_ids:
+            return None
+        worker_certifications = (
+            WorkerCertification.objects
+            .filter(role=role,
+                    task_class=task_class,
+                    certification__in=required_certification_ids))
+        if require_staffbot_enabled:
+            worker_certifications = worker_certifications.filter(
+                staffbot_enabled=True)
+        return frozenset(
+            worker_certifications
+            .values('worker_id')
+            .annotate(
+                num_certifications=Count('certification', distinct=True))
+            .filter(num_certifications=len(required_certification_ids))
+            .values_list('worker_id', flat=True))
+
+    def eligible_workers(
+            self, step, role, task_class=WorkerCertification.TaskClass.REAL,
+            require_staffbot_enabled=False):
+        """
+        Return the IDs of workers certified for a step.
+
+        Args:
+            step (orchestra.models.Step):
+                The specified step object.
+            role (orchestra.models.WorkerCertification.Role):
+                The specified role.
+            task_class (orchestra.models.WorkerCertification.TaskClass):
+                The specified task class.
+            require_staffbot_enabled (bool):
+                Whether to require that the `staffbot_enabled` flag be
+                `True`.
+
+        Returns:
+            worker_ids (frozenset):
+                IDs of the certified workers, or None if the step requires
+                no certifications and every worker is certified for it.
+        """
+        key = (step.id, role, task_class, require_staffbot_enabled)
+        if key not in self._eligible_workers:
+            self._eligible_workers[key] = self._build(*key)
+        return self._eligible_workers[key]
+
+    def is_eligible(self, worker_id, step, role,
+                    task_class=WorkerCertification.TaskClass.REAL,
+                    require_staffbot_enabled=False):
+        eligible_workers = self.eligible_workers(
+            step, role, task_class, require_staffbot_enabled)
+        return eligible_workers is None or worker_id in eligible_workers
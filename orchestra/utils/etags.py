@@ -0,0 +1,50 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    """
+    Return a quoted ETag for a response that is fully determined by
+    `parts`, which should be version stamps and request parameters.
+    """
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def _if_none_match(request, etag):
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    # If-None-Match uses weak comparison.
+    return '*' in etags or any(
+        candidate.replace('W/', '', 1) == etag for candidate in etags)
+
+
+def conditional_json_response(request, etag, get_data):
+    """
+    Respond with 304 Not Modified if the client already holds the version
+    of the response identified by `etag`, and otherwise with the data
+    returned by `get_data` tagged with `etag`. Intended for views wrapped
+    in `jsonview.decorators.json_view`, which serializes the data.
+
+    Args:
+        request (django.http.HttpRequest):
+            The request, which may carry an If-None-Match header.
+        etag (str):
+            The quoted ETag of the current response, or None if the
+            response shouldn't be tagged.
+        get_data (callable):
+            Returns the data of the response. Only called if the client
+            doesn't hold the current version of the response.
+
+    Returns:
+        response (django.http.HttpResponseNotModified or tuple):
+            A 304 response, or a `(data, status, headers)` tuple.
+    """
+    if etag is None:
+        return get_data()
+    if _if_none_match(request, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return get_data(), 200, {'ETag': etag}
@@ -0,0 +1,166 @@
+import copy
+
+from orchestra.core.errors import JSONPatchError
+
+
+def _parse_pointer(pointer):
+    """
+    Split a JSON Pointer (RFC 6901) into its unescaped reference tokens.
+    """
+    if not isinstance(pointer, str):
+        raise JSONPatchError('Path must be a string')
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JSONPatchError('Invalid path: {}'.format(pointer))
+    return [token.replace('~1', '/').replace('~0', '~')
+            for token in pointer[1:].split('/')]
+
+
+def _array_index(array, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(array)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise JSONPatchError('Invalid array index: {}'.format(token))
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JSONPatchError('Array index out of range: {}'.format(token))
+    return index
+
+
+def _resolve(document, tokens):
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JSONPatchError('Path not found: {}'.format(token))
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_array_index(document, token)]
+        else:
+            raise JSONPatchError('Path not found: {}'.format(token))
+    return document
+
+
+def _get(document, pointer):
+    return _resolve(document, _parse_pointer(pointer))
+
+
+def _add(document, pointer, value):
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, tokens[-1], allow_end=True),
+                      value)
+    else:
+        raise JSONPatchError('Path not found: {}'.format(pointer))
+    return document
+
+
+def _remove(document, pointer):
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        raise JSONPatchError('Cannot remove the whole document')
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JSONPatchError('Path not found: {}'.format(pointer))
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_array_index(parent, tokens[-1]))
+    raise JSONPatchError('Path not found: {}'.format(pointer))
+
+
+def _add_operation(document, operation):
+    return _add(document, operation['path'],
+                copy.deepcopy(operation['value']))
+
+
+def _remove_operation(document, operation):
+    _remove(document, operation['path'])
+    return document
+
+
+def _replace_operation(document, operation):
+    if _parse_pointer(operation['path']):
+        _remove(document, operation['path'])
+    return _add_operation(document, operation)
+
+
+def _move_operation(document, operation):
+    tokens = _parse_pointer(operation['path'])
+    from_tokens = _parse_pointer(operation['from'])
+    if (len(tokens) > len(from_tokens) and
+            tokens[:len(from_tokens)] == from_tokens):
+        raise JSONPatchError('Cannot move a value into itself')
+    value = (_remove(document, operation['from']) if from_tokens
+             else document)
+    return _add(document, operation['path'], value)
+
+
+def _copy_operation(document, operation):
+    return _add(document, operation['path'],
+                copy.deepcopy(_get(document, operation['from'])))
+
+
+def _test_operation(document, operation):
+    if _get(document, operation['path']) != operation['value']:
+        raise JSONPatchError('Test failed: {}'.format(operation['path']))
+    return document
+
+
+# Maps each operation to its function and its members besides `op`.
+OPERATIONS = {
+    'add': (_add_operation, ('path', 'value')),
+    'remove': (_remove_operation, ('path',)),
+    'replace': (_replace_operation, ('path', 'value')),
+    'move': (_move_operation, ('from', 'path')),
+    'copy': (_copy_operation, ('from', 'path')),
+    'test': (_test_operation, ('path', 'value')),
+}
+
+
+def _apply_operation(document, operation):
+    if not isinstance(operation, dict):
+        raise JSONPatchError('Operation must be an object')
+    if not isinstance(operation.get('op'), str) or (
+            operation['op'] not in OPERATIONS):
+        raise JSONPatchError('Invalid operation: {}'.format(
+            operation.get('op')))
+    apply_operation, members = OPERATIONS[operation['op']]
+    for member in members:
+        if member not in operation:
+            raise JSONPatchError('Operation {} requires {}'.format(
+                operation['op'], member))
+    return apply_operation(document, operation)
+
+
+def apply_json_patch(document, patch):
+    """
+    Apply a JSON Patch (RFC 6902) to a JSON document. The patch is applied
+    atomically: if any operation fails, `document` is left unchanged.
+
+    Args:
+        document (object):
+            The JSON document to patch.
+        patch ([dict]):
+            The operations to apply in order, e.g.,
+            `[{'op': 'replace', 'path': '/title', 'value': 'Title'}]`.
+
+    Returns:
+        patched_document (object):
+            A patched copy of `document`.
+
+    Raises:
+        orchestra.core.errors.JSONPatchError:
+            The patch is malformed or doesn't apply to `document`.
+    """
+    if not isinstance(patch, list):
+        raise JSONPatchError('Patch must be a list of operations')
+    document = copy.deepcopy(document)
+    for operation in patch:
+        document = _apply_operation(document, operation)
+    return document
@@ -2,6 +2,8 @@ from enum import Enum
 
 from django.db import models
 from django.db.models import CASCADE
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Cast
 from django.utils import timezone
 
 
@@ -39,6 +41,57 @@ class DeleteMixin(object):
         self.save()
 
 
+def json_path(field_name, path):
+    """
+    Return an expression for the value at `path` in a JSON field, which
+    the database extracts without sending the rest of the field.
+
+    Args:
+        field_name (str):
+            Name of a `jsonfield.JSONField`, which is stored as text.
+        path (str):
+            Dot-separated keys (or list indexes) to follow from the
+            field's top-level value, e.g., `document.sections.0`.
+
+    Returns:
+        expression (django.db.models.Expression):
+            An expression that evaluates to the decoded value at `path`,
+            or None if the path doesn't exist.
+    """
+    expression = Cast(field_name, models.JSONField())
+    for key in path.split('.'):
+        expression = KeyTransform(key, expression)
+    return expression
+
+
+class DataQuerySet(models.QuerySet):
+    """
+    QuerySet for models with large JSON fields, listed in the model's
+    `DATA_FIELDS`, that many callers don't need to load.
+    """
+
+    def defer_data(self):
+        """
+        Defer loading the model's data fields. Reading a deferred field
+        from an instance queries for it, so only defer data that won't
+        be read.
+        """
+        return self.defer(*self.model.DATA_FIELDS)
+
+    def with_json_paths(self, field_name, **paths):
+        """
+        Annotate each object with the values at `paths` in one of its
+        JSON fields, so that only the parts of the field that are needed
+        are loaded, e.g.,
+        `with_json_paths('in_progress_task_data', title='document.title')`.
+        Combine with `defer_data` or `values` to leave out the rest of
+        the field.
+        """
+        return self.annotate(**{
+            alias: json_path(field_name, path)
+            for alias, path in paths.items()})
+
+
 class BaseModelManager(models.Manager):
     """
     Model manager intended to be used with models with an `is_deleted` field.
@@ -50,6 +103,9 @@ class BaseModelManager(models.Manager):
         return super().get_queryset().filter(is_deleted=False)
 
 
+DataModelManager = BaseModelManager.from_queryset(DataQuerySet)
+
+
 class BaseModel(DeleteMixin, models.Model):
     """
     Abstract base class models which defines created_at and is_deleted fields.
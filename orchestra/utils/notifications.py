@@ -20,8 +20,10 @@ def notify_status_change(
     """
     Notify workers after task has changed state
     """
-    task_assignments = assignment_history(task)
-    current_task_assignment = current_assignment(task)
+    task_assignments = (assignment_history(task)
+                        .defer_data()
+                        .select_related('worker__user'))
+    current_task_assignment = current_assignment(task, defer_data=True)
     current_worker = None
     if current_task_assignment:
         current_worker = current_task_assignment.worker
@@ -0,0 +1,126 @@
+from orchestra.core.errors import TaskDependencyError
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+from orchestra.workflow.graph import workflow_graphs
+
+
+class PrerequisiteDataLoader(object):
+    """
+    Loads the latest assignment data of the tasks that steps of a
+    project depend on, fetching the data of many prerequisite steps with
+    a couple of queries and keeping it for later lookups.
+
+    A loader should only be kept while the project's prerequisite tasks
+    can't change, e.g., for the duration of a `create_subsequent_tasks`
+    pass. Data loaded before a prerequisite task is submitted isn't
+    refreshed.
+
+    Attributes:
+        project (orchestra.models.Project):
+            The project whose tasks are loaded.
+    """
+
+    def __init__(self, project, workflow_graph=None):
+        """
+        Args:
+            project (orchestra.models.Project):
+                The project whose tasks are loaded.
+            workflow_graph (orchestra.workflow.graph.CompiledWorkflowVersion):
+                An already compiled graph of the steps' workflow version.
+                If not provided, it is looked up on first use.
+        """
+        self.project = project
+        # Maps workflow version IDs to their graphs.
+        self._workflow_graphs = {}
+        if workflow_graph is not None:
+            self._workflow_graphs[workflow_graph.workflow_version_id] = (
+                workflow_graph)
+        # Maps step IDs to the prerequisite task's status and the
+        # `in_progress_task_data` of its latest assignment, or to None if
+        # the project has no task for the step.
+        self._task_data = {}
+
+    def _get_prerequisite_steps(self, step):
+        workflow_version_id = step.workflow_version_id
+        if workflow_version_id not in self._workflow_graphs:
+            self._workflow_graphs[workflow_version_id] = workflow_graphs.get(
+                workflow_version_id)
+        return (self._workflow_graphs[workflow_version_id]
+                .get_creation_prerequisites(step.slug))
+
+    def prefetch(self, steps):
+        """
+        Load the prerequisite data of all `steps` at once.
+
+        Args:
+            steps ([orchestra.models.Step]):
+                Steps of the project's workflow version.
+        """
+        step_ids = {prerequisite.id
+                    for step in steps
+                    for prerequisite in self._get_prerequisite_steps(step)}
+        self._load(step_ids - set(self._task_data))
+
+    def _load(self, step_ids):
+        if not step_ids:
+            return
+        tasks = {}
+        task_statuses = {}
+        for task_id, step_id, status in (
+                Task.objects
+                .filter(project=self.project, step_id__in=step_ids)
+                .values_list('id', 'step_id', 'status')):
+            tasks[task_id] = step_id
+            task_statuses[step_id] = status
+        latest_data = {}
+        # Assignments are ordered by counter, so the latest one of each
+        # task is seen last.
+        for task_id, data in (TaskAssignment.objects
+                              .filter(task_id__in=tasks)
+                              .order_by('task_id', 'assignment_counter')
+                              .values_list('task_id',
+                                           'in_progress_task_data')):
+            latest_data[tasks[task_id]] = data
+        for step_id in step_ids:
+            if step_id in task_statuses:
+                self._task_data[step_id] = (task_statuses[step_id],
+                                            latest_data.get(step_id))
+            else:
+                self._task_data[step_id] = None
+
+    def get_previously_completed_task_data(self, step):
+        """
+        Return a dict mapping the slugs of the steps that `step` depends
+        on to the latest assignment data of their tasks.
+
+        Args:
+            step (orchestra.models.Step):
+                A step of the project's workflow version.
+
+        Returns:
+            prerequisites (dict):
+                A dict mapping task prerequisites onto their latest task
+                assignment information.
+
+        Raises:
+            orchestra.models.Task.DoesNotExist:
+                A prerequisite task doesn't exist.
+            orchestra.core.errors.TaskDependencyError:
+                A prerequisite task isn't complete.
+        """
+        prerequisite_steps = self._get_prerequisite_steps(step)
+        self._load({prerequisite.id for prerequisite in prerequisite_steps}
+                   - set(self._task_data))
+
+        prerequisite_data = {}
+        for prerequisite in prerequisite_steps:
+            task_data = self._task_data[prerequisite.id]
+            if task_data is None:
+                raise Task.DoesNotExist(
+                    'Task for step {} does not exist'.format(
+                        prerequisite.slug))
+            status, data = task_data
+            if status != Task.Status.COMPLETE:
+                raise TaskDependencyError('Task depenency is not satisfied')
+            prerequisite_data[prerequisite.slug] = data
+        return prerequisite_data
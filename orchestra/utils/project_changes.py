@@ -0,0 +1,177 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.utils import timezone
+
+from orchestra.models import Iteration
+from orchestra.models import Project
+from orchestra.models import ProjectChange
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+
+DEFAULT_PROJECT_CHANGES_RETENTION_DAYS = 30
+PRUNE_CHUNK_SIZE = 1000
+
+OBJECT_TYPES = {
+    Project: ProjectChange.ObjectType.PROJECT,
+    Task: ProjectChange.ObjectType.TASK,
+    TaskAssignment: ProjectChange.ObjectType.TASK_ASSIGNMENT,
+    Iteration: ProjectChange.ObjectType.ITERATION,
+}
+
+
+def _get_project_id(instance):
+    if isinstance(instance, Project):
+        return instance.id
+    if isinstance(instance, Task):
+        return instance.project_id
+    if isinstance(instance, Iteration):
+        if not Iteration.assignment.is_cached(instance):
+            return (Task.objects
+                    .filter(assignments__id=instance.assignment_id)
+                    .values_list('project_id', flat=True)
+                    .first())
+        instance = instance.assignment
+    if TaskAssignment.task.is_cached(instance):
+        return instance.task.project_id
+    return (Task.objects.filter(id=instance.task_id)
+            .values_list('project_id', flat=True)
+            .first())
+
+
+def record_project_changes(instances):
+    """
+    Record that projects, tasks, task assignments or iterations changed,
+    so that they are picked up by the project changes feed.
+
+    Changes are recorded in the current transaction and are only visible
+    once it commits. Objects whose project can no longer be found (e.g.,
+    assignments deleted along with their project) are skipped, since the
+    change to their project is recorded instead.
+
+    Args:
+        instances ([django.db.models.Model]):
+            The changed objects.
+
+    Returns:
+        changes ([orchestra.models.ProjectChange]):
+            The recorded changes.
+    """
+    changes = []
+    for instance in instances:
+        project_id = _get_project_id(instance)
+        if project_id is None:
+            continue
+        changes.append(ProjectChange(
+            project_id=project_id,
+            object_type=OBJECT_TYPES[type(instance)],
+            object_id=instance.id))
+    return ProjectChange.objects.bulk_create(changes)
+
+
+def _last_change_id(project_ref):
+    return Subquery(ProjectChange.objects
+                    .filter(project_id=OuterRef(project_ref))
+                    .order_by('-id')
+                    .values('id')[:1])
+
+
+def get_project_versions(project_ids):
+    """
+    Return a version stamp for each project that changes whenever the
+    project, its tasks, their assignments (including time recorded on
+    them) or iterations, or its workflow version's steps change.
+
+    Args:
+        project_ids ([int]):
+            The IDs of the projects to look up.
+
+    Returns:
+        versions (dict):
+            Maps the ID of each existing project to a
+            `(graph_stamp, version)` tuple, where `graph_stamp` is that of
+            the project's workflow version. `version` is None for
+            projects that haven't changed since changes were first
+            recorded.
+    """
+    return {
+        project_id: (graph_stamp, version)
+        for project_id, graph_stamp, version
+        in (Project.objects
+            .filter(id__in=project_ids)
+            .annotate(version=_last_change_id('id'))
+            .values_list('id', 'workflow_version__graph_stamp',
+                         'version'))}
+
+
+def get_task_version(task_id):
+    """
+    Return a version stamp for a task that changes whenever its project
+    changes, in the sense of `get_project_versions`.
+
+    Args:
+        task_id (int):
+            The ID of the task to look up.
+
+    Returns:
+        version (tuple):
+            A `(project_id, graph_stamp, version)` tuple, or None if the
+            task doesn't exist.
+    """
+    return (Task.objects
+            .filter(id=task_id)
+            .annotate(version=_last_change_id('project_id'))
+            .values_list('project_id',
+                         'step__workflow_version__graph_stamp',
+                         'version')
+            .first())
+
+
+def prune_project_changes(retention_days=None):
+    """
+    Delete the changes recorded more than `retention_days` ago, oldest
+    first. The latest change is always kept, so that the cursor of an
+    up-to-date client stays valid.
+
+    Changes are pruned in ID order, so a client whose cursor is older
+    than the oldest remaining change missed pruned changes and has to
+    resync (see `orchestra.project_api.api.get_project_changes`).
+
+    Args:
+        retention_days (int):
+            How long to keep changes. Defaults to
+            `settings.ORCHESTRA_PROJECT_CHANGES_RETENTION_DAYS`.
+
+    Returns:
+        num_deleted (int):
+            The number of changes deleted.
+    """
+    if retention_days is None:
+        retention_days = getattr(
+            settings, 'ORCHESTRA_PROJECT_CHANGES_RETENTION_DAYS',
+            DEFAULT_PROJECT_CHANGES_RETENTION_DAYS)
+    latest_id = ProjectChange.objects.aggregate(
+        latest_id=Max('id'))['latest_id']
+    if latest_id is None:
+        return 0
+    prune_through = (
+        ProjectChange.objects
+        .filter(id__lt=latest_id,
+                created_at__lt=(timezone.now() -
+                                timedelta(days=retention_days)))
+        .aggregate(prune_through=Max('id'))['prune_through'])
+    num_deleted = 0
+    while prune_through is not None:
+        # Deleting in chunks keeps each transaction short.
+        change_ids = list(ProjectChange.objects
+                          .filter(id__lte=prune_through)
+                          .order_by('id')
+                          .values_list('id', flat=True)[:PRUNE_CHUNK_SIZE])
+        if not change_ids:
+            break
+        num_deleted += ProjectChange.objects.filter(
+            id__in=change_ids).delete()[0]
+    return num_deleted
@@ -0,0 +1,24 @@
+from beanstalk_dispatch.client import schedule_function
+from django.conf import settings
+
+from orchestra.project import set_up_project
+
+
+class ProjectSetupScheduler(object):
+    def schedule(self, project_id):
+        raise NotImplementedError()
+
+
+class SynchronousProjectSetupScheduler(ProjectSetupScheduler):
+    def schedule(self, project_id):
+        set_up_project(project_id)
+
+
+class AsynchronousProjectSetupScheduler(ProjectSetupScheduler):
+    def schedule(self, project_id):
+        if not settings.PRODUCTION and not settings.STAGING:
+            scheduler = SynchronousProjectSetupScheduler()
+            scheduler.schedule(project_id)
+        else:
+            schedule_function(settings.WORK_QUEUE, 'project_setup_executor',
+                              project_id)
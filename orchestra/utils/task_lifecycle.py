@@ -1,3 +1,5 @@
+import base64
+import json
 import logging
 import random
 from pydoc import locate
@@ -6,11 +8,18 @@ from django.conf import settings
 from django.db import connection
 from django.db import transaction
 from django.db.models import Case
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import F
 from django.db.models import When
+from django.db.models import OuterRef
 from django.db.models import Q
 from django.db.models import Value
 from django.db.models import IntegerField
+from django.db.models import Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 from orchestra.communication.slack import add_worker_to_project_team
@@ -18,10 +27,11 @@ from orchestra.communication.slack import archive_project_slack_group
 from orchestra.communication.utils import mark_worker_as_winner
 from orchestra.core.errors import AssignmentPolicyError
 from orchestra.core.errors import CreationPolicyError
+from orchestra.core.errors import DashboardCursorError
 from orchestra.core.errors import IllegalTaskSubmission
 from orchestra.core.errors import ReviewPolicyError
 from orchestra.core.errors import TaskAssignmentError
-from orchestra.core.errors import TaskDependencyError
+from orchestra.core.errors import TaskDataVersionError
 from orchestra.core.errors import TaskStatusError
 from orchestra.core.errors import ProjectStatusError
 from orchestra.core.errors import WorkerCertificationError
@@ -33,11 +43,17 @@ from orchestra.models import TaskAssignment
 from orchestra.models import Worker
 from orchestra.models import WorkerCertification
 from orchestra.todos.api import add_todolist_template
+from orchestra.utils.etags import make_etag
+from orchestra.utils.json_patch import apply_json_patch
 from orchestra.utils.notifications import notify_status_change
 from orchestra.utils.notifications import notify_project_status_change
+from orchestra.utils.prerequisites import PrerequisiteDataLoader
+from orchestra.utils.project_changes import get_task_version
+from orchestra.utils.project_changes import record_project_changes
 from orchestra.utils.task_properties import assignment_history
 from orchestra.utils.task_properties import current_assignment
 from orchestra.utils.task_properties import get_latest_iteration
+from orchestra.workflow.graph import workflow_graphs
 
 logger = logging.getLogger(__name__)
 
@@ -248,8 +264,15 @@ def assign_task(worker_id, task_id, staffing_request_inquiry=None):
         assignment=assignment,
         start_datetime=assignment.start_datetime)
 
-    add_worker_to_project_team(worker, task.project)
-    notify_status_change(task, previous_status, staffing_request_inquiry)
+    # Slack and email I/O waits for the assignment to commit, so that the
+    # rows it changed aren't kept locked while waiting on the network.
+    transaction.on_commit(
+        lambda: add_worker_to_project_team(worker, task.project),
+        robust=True)
+    transaction.on_commit(
+        lambda: notify_status_change(
+            task, previous_status, staffing_request_inquiry),
+        robust=True)
     mark_worker_as_winner(worker, task, required_role_counter,
                           staffing_request_inquiry)
     return task
@@ -291,6 +314,10 @@ def reassign_assignment(worker_id, assignment_id,
     if assignment.task.is_worker_assigned(worker):
         raise TaskAssignmentError('Worker already assigned to this task.')
 
+    # Signals only see the new worker, so the previous worker's
+    # dashboard is invalidated explicitly.
+    from orchestra.utils.dashboard import invalidate_worker_dashboards
+    invalidate_worker_dashboards(worker_ids=[assignment.worker_id])
     assignment.worker = worker
     assignment.save()
 
@@ -405,6 +432,7 @@ def get_task_assignment_details(task_assignment):
         'assignment_id': task_assignment.id,
         'task': {
             'data': task_assignment.in_progress_task_data,
+            'data_version': task_assignment.data_version,
             'status': (dict(Task.STATUS_CHOICES)
                        [task_assignment.task.status])
         },
@@ -450,194 +478,398 @@ def get_task_overview_for_worker(task_id, worker):
     return task_assignment_details
 
 
-def tasks_assigned_to_worker(worker):
+def get_task_overview_etag(task_id, worker):
     """
-    Get all the tasks associated with `worker`.
+    Return the ETag of the output of `get_task_overview_for_worker`,
+    which changes whenever that output would.
 
     Args:
+        task_id (int):
+            The ID of the desired task object.
         worker (orchestra.models.Worker):
             The specified worker object.
 
     Returns:
-        tasks_assigned (dict):
-            A dict with information about the worker's tasks, used in
-            displaying the Orchestra dashboard.
+        etag (str):
+            The quoted ETag, or None if the task doesn't exist.
     """
-    valid_task_assignments = TaskAssignment.objects.exclude(
-        task__status=Task.Status.ABORTED)
-
-    # get all active task assignments for a user
-    active_task_assignments = (
-        valid_task_assignments
-        .filter(
-            worker=worker,
-            status=TaskAssignment.Status.PROCESSING)
-        .exclude(
-            task__project__status__in=[Project.Status.PAUSED,
-                                       Project.Status.COMPLETED])
-        .order_by('-task__project__priority',
-                  'task__project__start_datetime'))
-
-    inactive_task_assignments = (
-        valid_task_assignments
-        .filter(
-            worker=worker,
-            status=TaskAssignment.Status.SUBMITTED
-        )
-        .exclude(
-            task__status=Task.Status.COMPLETE)
-        .exclude(
-            task__project__status__in=[Project.Status.PAUSED,
-                                       Project.Status.COMPLETED])
-        .order_by('-task__project__priority',
-                  'task__project__start_datetime'))
-
-    inactive_processing_task_assignments = []
-    inactive_review_task_assignments = []
-    for task_assignment in inactive_task_assignments:
-        if (
-                valid_task_assignments
-                .filter(
-                    status=TaskAssignment.Status.PROCESSING,
-                    task__id=task_assignment.task.id,
-                    assignment_counter__lt=task_assignment.assignment_counter)
-                .exists()):
-            inactive_processing_task_assignments.append(task_assignment)
+    task_version = get_task_version(task_id)
+    if task_version is None:
+        return None
+    # The overview includes the task's prerequisites, so it changes
+    # along with the rest of the project.
+    project_id, graph_stamp, version = task_version
+    return make_etag(task_id, worker.id, worker.is_project_admin(), version,
+                     graph_stamp)
+
+
+DASHBOARD_COMPLETE_TASKS_LIMIT = 200
+DASHBOARD_COMPLETE_PAGE_SIZE = 50
+DASHBOARD_ACTIVE_STATES = ('returned', 'in_progress', 'paused')
+
+
+def _dashboard_todo_filter():
+    # TODO(aditya): Temporarily we are filtering out todos
+    # with section values. Remove this comment once we
+    # figure out a long term logic.
+    non_template_todo_filter = Q(template__isnull=True)
+    no_section_todo_filter = Q(section__isnull=True) | Q(section='')
+    return non_template_todo_filter & no_section_todo_filter
+
+
+def _todos_for_project_steps(project_step_pairs):
+    """
+    Return the dashboard-visible todos attached to the given
+    (project, step) pairs.
+
+    Args:
+        project_step_pairs (set):
+            A set of `(project_id, step_id)` tuples.
+
+    Returns:
+        todos (django.db.models.QuerySet):
+            Todos attached to the projects and steps of the given pairs.
+    """
+    # Filtering on the projects and steps separately selects a superset
+    # of the requested pairs, which callers discard by keying their
+    # results on (project_id, step_id).
+    project_ids = {project_id for project_id, _ in project_step_pairs}
+    step_ids = {step_id for _, step_id in project_step_pairs}
+    return Todo.objects.filter(_dashboard_todo_filter(),
+                               project_id__in=project_ids,
+                               step_id__in=step_ids)
+
+
+def get_next_todos(project_step_pairs, time_now):
+    """
+    Find the next pending todo for each (project, step) pair in a single
+    query by ranking todos within each pair.
+
+    Args:
+        project_step_pairs (set):
+            A set of `(project_id, step_id)` tuples.
+        time_now (datetime.datetime):
+            The time against which todo start dates are compared.
+
+    Returns:
+        next_todos (dict):
+            A dict mapping `(project_id, step_id)` onto the next pending
+            orchestra.models.Todo, omitting pairs with no pending todos.
+    """
+    if not project_step_pairs:
+        return {}
+    todo_order = Case(
+        When(start_by_datetime__gt=time_now, then=Value(3)),
+        When(due_datetime=None, then=Value(2)),
+        default=Value(1),
+        output_field=IntegerField())
+    next_todos = (
+        _todos_for_project_steps(project_step_pairs)
+        .filter(status=Todo.Status.PENDING.value)
+        .annotate(todo_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('project_id'), F('step_id')],
+            order_by=[todo_order.asc(),
+                      F('due_datetime').asc(),
+                      F('start_by_datetime').asc(),
+                      F('created_at').desc()]))
+        .filter(todo_rank=1)
+        .only('project_id', 'step_id', 'title',
+              'start_by_datetime', 'due_datetime'))
+    return {(todo.project_id, todo.step_id): todo for todo in next_todos}
+
+
+def get_todo_counts(project_step_pairs):
+    """
+    Count the todos (complete or incomplete) for each (project, step)
+    pair in a single aggregate query.
+
+    Args:
+        project_step_pairs (set):
+            A set of `(project_id, step_id)` tuples.
+
+    Returns:
+        todo_counts (dict):
+            A dict mapping `(project_id, step_id)` onto the number of
+            todos, omitting pairs with no todos.
+    """
+    if not project_step_pairs:
+        return {}
+    todo_counts = (
+        _todos_for_project_steps(project_step_pairs)
+        .order_by()
+        .values('project_id', 'step_id')
+        .annotate(num_todos=Count('id')))
+    return {(row['project_id'], row['step_id']): row['num_todos']
+            for row in todo_counts}
+
+
+def _dashboard_state(task_assignment):
+    """
+    Return the dashboard states an assignment belongs to, mirroring the
+    bucket definitions of `tasks_assigned_to_worker`.
+    """
+    task = task_assignment.task
+    project_status = task.project.status
+    states = []
+    if task_assignment.status == TaskAssignment.Status.PROCESSING:
+        if project_status == Project.Status.PAUSED:
+            states.append('paused')
+        elif project_status != Project.Status.COMPLETED:
+            if task.status == Task.Status.POST_REVIEW_PROCESSING:
+                states.append('returned')
+            else:
+                states.append('in_progress')
+    elif (task_assignment.status == TaskAssignment.Status.SUBMITTED and
+          task.status != Task.Status.COMPLETE and
+          project_status not in (Project.Status.PAUSED,
+                                 Project.Status.COMPLETED)):
+        if task_assignment.has_earlier_processing_assignment:
+            states.append('pending_processing')
         else:
-            inactive_review_task_assignments.append(task_assignment)
+            states.append('pending_review')
+    return states
 
-    # TODO(marcua): Do a better job of paginating than cutting off to the most
-    # recent 200 tasks.
-    complete_task_assignments = (
-        valid_task_assignments
+
+def _format_todo_datetime(todo_datetime):
+    return (todo_datetime.strftime('%Y-%m-%dT%H:%M:%SZ')
+            if todo_datetime else '')
+
+
+def _dashboard_task_assignments():
+    return (
+        TaskAssignment.objects
+        .exclude(task__status=Task.Status.ABORTED)
+        .select_related('task__step__workflow_version', 'task__project')
+        .defer('in_progress_task_data'))
+
+
+def _complete_task_assignments(worker):
+    return (
+        _dashboard_task_assignments()
         .filter(Q(worker=worker) &
                 (Q(task__status=Task.Status.COMPLETE) |
                  Q(task__project__status=Project.Status.COMPLETED)))
         .order_by('-task__project__priority',
-                  '-task__project__start_datetime')[:200])
-
-    paused_task_assignments = (
-        valid_task_assignments
-        .filter(
-            worker=worker,
-            status=TaskAssignment.Status.PROCESSING,
-            task__project__status=Project.Status.PAUSED)
+                  '-task__project__start_datetime',
+                  '-id'))
+
+
+def _dashboard_task(task_assignment, state,
+                    next_todo_dict=None, should_be_active=False):
+    task = task_assignment.task
+    return {
+        'id': task.id,
+        'assignment_id': task_assignment.id,
+        'step': task.step.name,
+        'project': task.step.workflow_version.name,
+        'detail': task.project.short_description,
+        'priority': task.project.priority,
+        'state': state,
+        'assignment_start_datetime': task_assignment.start_datetime,
+        'next_todo_dict': next_todo_dict or {},
+        'should_be_active': should_be_active,
+        'tags': task.tags.get('tags', [])
+    }
+
+
+def encode_dashboard_cursor(task_assignment):
+    """
+    Encode the position of `task_assignment` in a worker's complete
+    tasks as an opaque cursor.
+    """
+    project = task_assignment.task.project
+    position = [project.priority,
+                project.start_datetime.isoformat(),
+                task_assignment.id]
+    return base64.urlsafe_b64encode(
+        json.dumps(position).encode()).decode()
+
+
+def decode_dashboard_cursor(cursor):
+    """
+    Decode a cursor created by `encode_dashboard_cursor`.
+
+    Returns:
+        position (tuple):
+            The project priority, project start datetime, and assignment ID
+            of the last task on the previous page.
+
+    Raises:
+        orchestra.core.errors.DashboardCursorError:
+            The cursor is malformed.
+    """
+    try:
+        priority, start_datetime, assignment_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()))
+        start_datetime = parse_datetime(start_datetime)
+        if start_datetime is None:
+            raise ValueError('Invalid datetime')
+        return int(priority), start_datetime, int(assignment_id)
+    except (TypeError, ValueError) as e:
+        raise DashboardCursorError('Invalid cursor: {}'.format(e))
+
+
+def complete_tasks_assigned_to_worker(
+        worker, cursor=None, page_size=DASHBOARD_COMPLETE_PAGE_SIZE):
+    """
+    Get a page of the complete tasks associated with `worker`.
+
+    Pages are ordered by project priority, project start datetime and
+    assignment ID (all descending) and are fetched by seeking past the
+    `cursor` rather than by offset, so later pages are as cheap as the
+    first one.
+
+    Args:
+        worker (orchestra.models.Worker):
+            The specified worker object.
+        cursor (str):
+            The cursor returned with the previous page, or None for the
+            first page.
+        page_size (int):
+            The maximum number of tasks to return.
+
+    Returns:
+        tasks (list):
+            Dashboard information about the page's tasks, in the format
+            returned by `tasks_assigned_to_worker`.
+        next_cursor (str):
+            The cursor for the next page, or None if this is the last
+            page.
+
+    Raises:
+        orchestra.core.errors.DashboardCursorError:
+            The cursor is malformed.
+    """
+    task_assignments = _complete_task_assignments(worker)
+    if cursor is not None:
+        priority, start_datetime, assignment_id = (
+            decode_dashboard_cursor(cursor))
+        task_assignments = task_assignments.filter(
+            Q(task__project__priority__lt=priority) |
+            Q(task__project__priority=priority,
+              task__project__start_datetime__lt=start_datetime) |
+            Q(task__project__priority=priority,
+              task__project__start_datetime=start_datetime,
+              id__lt=assignment_id))
+
+    # Fetch an extra row to find out whether there is a next page.
+    page = list(task_assignments[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_dashboard_cursor(page[-1])
+    return ([_dashboard_task(task_assignment, 'complete')
+             for task_assignment in page],
+            next_cursor)
+
+
+def tasks_assigned_to_worker(worker, include_complete=True):
+    """
+    Get all the tasks associated with `worker`.
+
+    The dashboard is built with a fixed number of queries regardless of
+    how many assignments `worker` has: one for the worker's open
+    assignments, one for their most recent complete assignments, and one
+    each for the next pending todo and the todo count of every active
+    (project, step) pair.
+
+    Args:
+        worker (orchestra.models.Worker):
+            The specified worker object.
+        include_complete (bool):
+            Whether to include the worker's most recent complete tasks.
+            Use `complete_tasks_assigned_to_worker` to page through all
+            of them.
+
+    Returns:
+        tasks_assigned (dict):
+            A dict with information about the worker's tasks, used in
+            displaying the Orchestra dashboard.
+    """
+    earlier_processing_assignments = (
+        TaskAssignment.objects
+        .exclude(task__status=Task.Status.ABORTED)
+        .filter(task=OuterRef('task'),
+                status=TaskAssignment.Status.PROCESSING,
+                assignment_counter__lt=OuterRef('assignment_counter')))
+    open_task_assignments = (
+        _dashboard_task_assignments()
+        .filter(worker=worker,
+                status__in=[TaskAssignment.Status.PROCESSING,
+                            TaskAssignment.Status.SUBMITTED])
+        .exclude(task__project__status=Project.Status.COMPLETED)
+        .annotate(has_earlier_processing_assignment=Exists(
+            earlier_processing_assignments))
         .order_by('-task__project__priority',
-                  'task__project__start_datetime'))
+                  'task__project__start_datetime',
+                  'id'))
 
     task_assignments_overview = {
-        'returned': (
-            active_task_assignments
-            .filter(task__status=Task.Status.POST_REVIEW_PROCESSING)),
-        'in_progress': (
-            active_task_assignments
-            .exclude(task__status=Task.Status.POST_REVIEW_PROCESSING)),
-        'pending_review': inactive_review_task_assignments,
-        'pending_processing': inactive_processing_task_assignments,
-        'paused': paused_task_assignments,
-        'complete': complete_task_assignments}
+        'returned': [],
+        'in_progress': [],
+        'pending_review': [],
+        'pending_processing': [],
+        'paused': []}
+    for task_assignment in open_task_assignments:
+        for state in _dashboard_state(task_assignment):
+            task_assignments_overview[state].append(task_assignment)
+
+    active_project_steps = {
+        (task_assignment.task.project_id, task_assignment.task.step_id)
+        for state in DASHBOARD_ACTIVE_STATES
+        for task_assignment in task_assignments_overview[state]}
+    time_now = timezone.now()
+    next_todos = get_next_todos(active_project_steps, time_now)
+    todo_counts = get_todo_counts(active_project_steps)
 
     tasks_assigned = []
-    time_now = timezone.now()
-    pending_todos_filter = Q(status=Todo.Status.PENDING.value)
-    non_template_todo_filter = Q(template__isnull=True)
-    no_section_todo_filter = Q(section__isnull=True) | Q(section='')
     for state, task_assignments in iter(task_assignments_overview.items()):
+        if state not in DASHBOARD_ACTIVE_STATES:
+            tasks_assigned.extend(
+                _dashboard_task(task_assignment, state)
+                for task_assignment in task_assignments)
+            continue
         for task_assignment in task_assignments:
-            step = task_assignment.task.step
-            workflow_version = step.workflow_version
-            next_todo_title = None
+            task = task_assignment.task
+            project_step = (task.project_id, task.step_id)
+            next_todo = next_todos.get(project_step)
             next_todo_dict = {}
-            should_be_active = False
-            if state in ('returned', 'in_progress', 'paused'):
-                # TODO(aditya): Temporarily we are filtering out todos
-                # with section values. Remove this comment once we
-                # figure out a long term logic.
-                next_todo = (
-                    task_assignment.task.todos
-                    .filter(
-                        pending_todos_filter &
-                        non_template_todo_filter &
-                        no_section_todo_filter
-                    ).annotate(
-                        todo_order=Case(
-                            When(
-                                start_by_datetime__gt=time_now,
-                                then=Value(3)),
-                            When(
-                                due_datetime=None,
-                                then=Value(2)),
-                            default=Value(1),
-                            output_field=IntegerField()
-                        )
-                    )
-                    .order_by(
-                        'todo_order',
-                        'due_datetime',
-                        'start_by_datetime',
-                        '-created_at'
-                    )
-                    .first())
-
-                if next_todo:
-                    next_todo_title = next_todo.title
-                    start_str = (
-                        next_todo.start_by_datetime.strftime(
-                            '%Y-%m-%dT%H:%M:%SZ'
-                        ) if next_todo.start_by_datetime else ''
-                    )
-                    due_str = (
-                        next_todo.due_datetime.strftime(
-                            '%Y-%m-%dT%H:%M:%SZ'
-                        ) if next_todo.due_datetime else ''
-                    )
-                    next_todo_dict = {
-                        'title': next_todo.title,
-                        'start_by_datetime': start_str,
-                        'due_datetime': due_str
-                    }
-                # TODO(aditya): Temporarily we are filtering out todos
-                # with section values. Remove this comment once we
-                # figure out a long term logic.
-                num_non_template_todos = (
-                    task_assignment.task.todos
-                    .filter(
-                        non_template_todo_filter &
-                        no_section_todo_filter
-                    ).count())
-                # If a task has no todos (complete or incomplete)
-                # assigned to it, then by default the task would be
-                # marked as pending. When a task is first created and
-                # picked up by a worker, it will thus be in pending
-                # state, which is confusing behavior. We thus treat a
-                # task with zero todos as active. After a task has one
-                # or more todos assigned to it, its active/pending
-                # state is determined by the presence of incomplete
-                # todos.
-                task_started = (
-                    next_todo_title is not None
-                    and (
-                        next_todo.start_by_datetime is None
-                        or next_todo.start_by_datetime <= time_now
-                    )
+            if next_todo:
+                next_todo_dict = {
+                    'title': next_todo.title,
+                    'start_by_datetime': _format_todo_datetime(
+                        next_todo.start_by_datetime),
+                    'due_datetime': _format_todo_datetime(
+                        next_todo.due_datetime)
+                }
+            # If a task has no todos (complete or incomplete)
+            # assigned to it, then by default the task would be
+            # marked as pending. When a task is first created and
+            # picked up by a worker, it will thus be in pending
+            # state, which is confusing behavior. We thus treat a
+            # task with zero todos as active. After a task has one
+            # or more todos assigned to it, its active/pending
+            # state is determined by the presence of incomplete
+            # todos.
+            task_started = (
+                next_todo is not None
+                and (
+                    next_todo.start_by_datetime is None
+                    or next_todo.start_by_datetime <= time_now
                 )
-                should_be_active = (
-                    state != 'paused' and
-                    ((num_non_template_todos == 0)
-                     or task_started))
-            tasks_assigned.append({
-                'id': task_assignment.task.id,
-                'assignment_id': task_assignment.id,
-                'step': step.name,
-                'project': workflow_version.name,
-                'detail': task_assignment.task.project.short_description,
-                'priority': task_assignment.task.project.priority,
-                'state': state,
-                'assignment_start_datetime': task_assignment.start_datetime,
-                'next_todo_dict': next_todo_dict,
-                'should_be_active': should_be_active,
-                'tags': task_assignment.task.tags.get('tags', [])
-            })
+            )
+            should_be_active = (
+                state != 'paused' and
+                (todo_counts.get(project_step, 0) == 0
+                 or task_started))
+            tasks_assigned.append(_dashboard_task(
+                task_assignment, state, next_todo_dict, should_be_active))
+
+    if include_complete:
+        complete_tasks, _ = complete_tasks_assigned_to_worker(
+            worker, page_size=DASHBOARD_COMPLETE_TASKS_LIMIT)
+        tasks_assigned.extend(complete_tasks)
     return tasks_assigned
 
 
@@ -774,7 +1006,8 @@ def save_task(task_id, task_data, worker):
             The worker saving the task.
 
     Returns:
-        None
+        data_version (int):
+            The assignment's data version after the save.
 
     Raises:
         orchestra.core.errors.TaskAssignmentError:
@@ -795,6 +1028,67 @@ def save_task(task_id, task_data, worker):
 
     assignment.in_progress_task_data = task_data
     assignment.save()
+    return assignment.data_version
+
+
+def patch_task(task_id, patch, data_version, worker):
+    """
+    Apply a JSON Patch (RFC 6902) to the latest data of a task
+    assignment. Rather than locking the assignment, the patch is only
+    written if the data is still at `data_version`, so concurrent saves
+    make all but one patch fail instead of waiting on each other.
+
+    Args:
+        task_id (int):
+            The ID of the task to save.
+        patch ([dict]):
+            The JSON Patch operations to apply to the task data.
+        data_version (int):
+            The data version the patch was made against.
+        worker (orchestra.models.Worker):
+            The worker saving the task.
+
+    Returns:
+        data_version (int):
+            The assignment's data version after the patch.
+
+    Raises:
+        orchestra.core.errors.TaskAssignmentError:
+            The provided worker is not assigned to the given task or the
+            assignment is in a non-processing state.
+        orchestra.core.errors.TaskDataVersionError:
+            The task data changed since `data_version`.
+        orchestra.core.errors.JSONPatchError:
+            The patch is malformed or doesn't apply to the task data.
+    """
+    assignment = (TaskAssignment.objects
+                  .filter(task_id=task_id, worker=worker)
+                  .select_related('task')
+                  .first())
+    if assignment is None:
+        raise TaskAssignmentError('Worker is not associated with task')
+    if assignment.status != TaskAssignment.Status.PROCESSING:
+        raise TaskAssignmentError('Worker is not allowed to save')
+    if assignment.data_version != data_version:
+        raise TaskDataVersionError('Task data has changed since version {}'
+                                   .format(data_version))
+
+    task_data = apply_json_patch(assignment.in_progress_task_data, patch)
+    with transaction.atomic():
+        updated = (TaskAssignment.objects
+                   .filter(id=assignment.id,
+                           status=TaskAssignment.Status.PROCESSING,
+                           data_version=data_version)
+                   .update(in_progress_task_data=task_data,
+                           data_version=data_version + 1))
+        if not updated:
+            raise TaskDataVersionError(
+                'Task data has changed since version {}'.format(
+                    data_version))
+        # `update` doesn't send `post_save`, so record the change in the
+        # changes feed by hand.
+        record_project_changes([assignment])
+    return data_version + 1
 
 
 def _are_desired_steps_completed_on_project(desired_steps,
@@ -806,9 +1100,8 @@ def _are_desired_steps_completed_on_project(desired_steps,
     since the caller sometimes has one but not the other.
 
     Args:
-        desired_steps (django.db.models.QuerySet):
-            A queryset of orchestra.models.Step objects to check for
-            completion.
+        desired_steps ([orchestra.models.Step]):
+            The steps to check for completion.
         project (orchestra.models.Project):
             The project to check for desired step completion,
             optionally passed in instead of a list of completed tasks.
@@ -824,14 +1117,16 @@ def _are_desired_steps_completed_on_project(desired_steps,
     Raises:
         Exception: Either project or completed_tasks must be provided.
     """
+    if completed_tasks is None and project is None:
+        raise Exception('Must provide either project or completed_tasks')
+    desired_step_slugs = set(step.slug for step in desired_steps)
+    if not desired_step_slugs:
+        return True
     if completed_tasks is None:
-        if project is None:
-            raise Exception('Must provide either project or completed_tasks')
         completed_tasks = Task.objects.filter(status=Task.Status.COMPLETE,
                                               project=project)
     completed_step_slugs = set(completed_tasks.values_list('step__slug',
                                                            flat=True))
-    desired_step_slugs = set(desired_steps.values_list('slug', flat=True))
     return not (desired_step_slugs - completed_step_slugs)
 
 
@@ -871,8 +1166,10 @@ def submit_task(task_id, task_data, iteration_status, worker):
 
     task = Task.objects.select_related('step', 'project').get(id=task_id)
     step = task.step
-    if not _are_desired_steps_completed_on_project(step.submission_depends_on,
-                                                   project=task.project):
+    workflow_graph = workflow_graphs.get(step.workflow_version_id)
+    if not _are_desired_steps_completed_on_project(
+            workflow_graph.get_submission_dependencies(step.slug),
+            project=task.project):
         raise IllegalTaskSubmission('Submission prerequisites are not '
                                     'complete.')
 
@@ -880,12 +1177,14 @@ def submit_task(task_id, task_data, iteration_status, worker):
         raise TaskStatusError('Task already completed')
 
     # Use select_for_update to prevent concurrency issues with save_task.
-    # See https://github.com/b12io/orchestra/issues/2.
-    assignments = (TaskAssignment.objects.select_for_update()
-                                 .filter(worker=worker, task=task))
+    # See https://github.com/b12io/orchestra/issues/2. The lock is held
+    # until the submission commits, so everything below it should only
+    # change state; side effects are deferred with `on_commit`.
+    assignments = list(TaskAssignment.objects.select_for_update()
+                                             .filter(worker=worker, task=task))
 
     # Worker can belong to only one assignment for a given task.
-    if not assignments.count() == 1:
+    if not len(assignments) == 1:
         raise TaskAssignmentError(
             'Task assignment with worker is in broken state.')
 
@@ -925,13 +1224,15 @@ def submit_task(task_id, task_data, iteration_status, worker):
                                          assignment.in_progress_task_data,
                                          submit_datetime)
     elif task.status == Task.Status.COMPLETE:
-        create_subsequent_tasks(task.project)
+        create_subsequent_tasks(task.project, completed_step=step)
 
-    notify_status_change(task, previous_status)
+    transaction.on_commit(
+        lambda: notify_status_change(task, previous_status), robust=True)
     return task
 
 
-def get_previously_completed_task_data(step, project):
+def get_previously_completed_task_data(step, project,
+                                       prerequisite_loader=None):
     """
     Returns a dict mapping task prerequisites onto their
     latest task assignment information.  The dict is of the form:
@@ -940,30 +1241,17 @@ def get_previously_completed_task_data(step, project):
     Args:
         step (orchestra.models.Step): The specified step object.
         project (orchestra.models.Project): The specified project object.
+        prerequisite_loader (PrerequisiteDataLoader):
+            A loader for `project` that holds data already loaded for
+            other steps. If not provided, the data is loaded afresh.
     Returns:
         prerequisites (dict):
             A dict mapping task prerequisites onto their latest task
             assignment information.
     """
-    # Find all prerequisite steps in graph
-    to_visit = list(step.creation_depends_on.all())
-    prerequisite_steps = set(to_visit)
-    while to_visit:
-        current_step = to_visit.pop()
-        for step in current_step.creation_depends_on.all():
-            if step not in prerequisite_steps:
-                to_visit.append(step)
-                prerequisite_steps.add(step)
-
-    prerequisite_data = {}
-    for step in prerequisite_steps:
-        required_task = Task.objects.get(step=step, project=project)
-
-        if required_task.status != Task.Status.COMPLETE:
-            raise TaskDependencyError('Task depenency is not satisfied')
-        assignment = assignment_history(required_task).last()
-        prerequisite_data[step.slug] = assignment.in_progress_task_data
-    return prerequisite_data
+    if prerequisite_loader is None:
+        prerequisite_loader = PrerequisiteDataLoader(project)
+    return prerequisite_loader.get_previously_completed_task_data(step)
 
 
 def update_related_assignment_status(task, assignment_counter, data,
@@ -987,6 +1275,9 @@ def update_related_assignment_status(task, assignment_counter, data,
     assignment = (TaskAssignment.objects
                   .get(task=task,
                        assignment_counter=assignment_counter))
+    # The submitted snapshot is shared through its iteration's data
+    # blob, but the assignment gets its own copy, since it is edited in
+    # place from now on.
     assignment.in_progress_task_data = data
     assignment.status = TaskAssignment.Status.PROCESSING
     assignment.save()
@@ -1049,13 +1340,10 @@ def set_project_status(project_id, status):
     status_choices = dict(Project.STATUS_CHOICES)
     if status == status_choices[Project.Status.PAUSED]:
         project.status = Project.Status.PAUSED
-        notify_project_status_change(project)
     elif status == status_choices[Project.Status.ACTIVE]:
         project.status = Project.Status.ACTIVE
-        notify_project_status_change(project)
     elif status == status_choices[Project.Status.COMPLETED]:
         project.status = Project.Status.COMPLETED
-        notify_project_status_change(project)
     elif status == status_choices[Project.Status.ABORTED]:
         raise ProjectStatusError((
             'Try aborting the project with set_project_status. '
@@ -1063,9 +1351,11 @@ def set_project_status(project_id, status):
     else:
         raise ProjectStatusError('Invalid project status.')
     project.save()
+    transaction.on_commit(
+        lambda: notify_project_status_change(project), robust=True)
 
 
-def _check_creation_policy(step, project):
+def _check_creation_policy(step, project, prerequisite_loader=None):
     """
     Check the creation policy of the given step, which will determine whether
     to create the task.
@@ -1073,6 +1363,7 @@ def _check_creation_policy(step, project):
     Args:
         step (orchestra.models.Step)
         project (orchestra.models.Project)
+        prerequisite_loader (PrerequisiteDataLoader)
     Returns:
         success (boolean) if the task should be created.
     Raises:
@@ -1085,7 +1376,8 @@ def _check_creation_policy(step, project):
     policy_kwargs = policy.get('kwargs', {})
     try:
         policy_function = locate(policy_path)
-        prerequisite_data = get_previously_completed_task_data(step, project)
+        prerequisite_data = get_previously_completed_task_data(
+            step, project, prerequisite_loader=prerequisite_loader)
         project_data = project.project_data
         return policy_function(
             prerequisite_data, project_data, **policy_kwargs)
@@ -1144,9 +1436,29 @@ def schedule_machine_tasks(project, steps):
         machine_step_scheduler.schedule(project.id, step.slug)
 
 
+def _get_steps_to_create(project, workflow_graph, candidate_steps,
+                         task_statuses):
+    completed_step_ids = set(
+        step_id for step_id, status in task_statuses.items()
+        if status == Task.Status.COMPLETE)
+    ready_steps = [
+        step for step in candidate_steps
+        if step.id not in task_statuses and
+        all(dependency.id in completed_step_ids for dependency
+            in workflow_graph.get_creation_dependencies(step.slug))]
+    # Load the prerequisite data of every ready step at once, so that
+    # their creation policies don't each query for it.
+    prerequisite_loader = PrerequisiteDataLoader(
+        project, workflow_graph=workflow_graph)
+    prerequisite_loader.prefetch(ready_steps)
+    return [step for step in ready_steps
+            if _check_creation_policy(
+                step, project, prerequisite_loader=prerequisite_loader)]
+
+
 # TODO(kkamalov): make a periodic job that runs this function periodically
 @transaction.atomic
-def create_subsequent_tasks(project):
+def create_subsequent_tasks(project, completed_step=None):
     """
     Create tasks for a given project whose dependencies have been
     completed.
@@ -1154,57 +1466,64 @@ def create_subsequent_tasks(project):
     Args:
         project (orchestra.models.Project):
             The project for which to create tasks.
+        completed_step (orchestra.models.Step):
+            A step whose task was just completed. If provided, only the
+            steps that directly depend on it are considered for creation;
+            otherwise every step of the workflow version is.
 
     Returns:
         project (orchestra.models.Project):
             The modified project object.
     """
-    workflow_version = project.workflow_version
-    all_steps = workflow_version.steps.all().order_by('id')
-
-    # get all completed tasks associated with a given project
-    completed_tasks = Task.objects.filter(status=Task.Status.COMPLETE,
-                                          project=project)
-    completed_step_slugs = set(completed_tasks.values_list('step__slug',
-                                                           flat=True))
+    workflow_graph = workflow_graphs.get(project.workflow_version_id)
+    if completed_step is None:
+        candidate_steps = workflow_graph.steps
+    else:
+        candidate_steps = [
+            workflow_graph.steps[number] for number
+            in workflow_graph.creation_dependents[
+                workflow_graph.step_indexes[completed_step.slug]]]
+
+    # Look up the status of every existing task in the project at once.
+    task_statuses = dict(Task.objects.filter(project=project)
+                         .values_list('step_id', 'status'))
+    steps_to_create = _get_steps_to_create(
+        project, workflow_graph, candidate_steps, task_statuses)
+    # create new tasks and task_assignments
+    tasks = Task.objects.bulk_create(
+        Task(step=step,
+             project=project,
+             status=Task.Status.AWAITING_PROCESSING)
+        for step in steps_to_create)
+    # `bulk_create` doesn't send `post_save`, so record the new tasks in
+    # the changes feed by hand.
+    record_project_changes(tasks)
 
-    end_project = False
     machine_tasks_to_schedule = []
-    for step in all_steps:
-        end_project = end_project or (
-            step.slug in completed_step_slugs and step.completion_ends_project)
-
-        if step.slug in completed_step_slugs or Task.objects.filter(
-                project=project, step=step).exists():
-            continue
-
-        if _are_desired_steps_completed_on_project(
-                step.creation_depends_on, completed_tasks=completed_tasks):
-            if _check_creation_policy(step, project):
-                # create new task and task_assignment
-                task = Task(step=step,
-                            project=project,
-                            status=Task.Status.AWAITING_PROCESSING)
-                task.save()
-
-                # Apply todolist templates to Task
-                for template in task.step.todolist_templates_to_apply.all():
-                    add_todolist_template(template.slug, project.id, step.slug)
+    for task in tasks:
+        step = task.step
+        # Apply todolist templates to Task
+        for template in step.todolist_templates_to_apply.all():
+            add_todolist_template(template.slug, project.id, step.slug)
 
-                _preassign_workers(task, AssignmentPolicyType.ENTRY_LEVEL)
+        _preassign_workers(task, AssignmentPolicyType.ENTRY_LEVEL)
 
-                if not step.is_human:
-                    machine_tasks_to_schedule.append(step)
+        if not step.is_human:
+            machine_tasks_to_schedule.append(step)
 
     if len(machine_tasks_to_schedule) > 0:
         connection.on_commit(lambda: schedule_machine_tasks(
             project, machine_tasks_to_schedule))
 
-    incomplete_tasks = (Task.objects.filter(project=project)
-                        .exclude(Q(status=Task.Status.COMPLETE) |
-                                 Q(status=Task.Status.ABORTED)))
+    end_project = any(
+        step.completion_ends_project for step in workflow_graph.steps
+        if task_statuses.get(step.id) == Task.Status.COMPLETE)
+    num_incomplete_tasks = len(tasks) + sum(
+        1 for status in task_statuses.values()
+        if status not in (Task.Status.COMPLETE, Task.Status.ABORTED))
 
-    if end_project or incomplete_tasks.count() == 0:
+    if end_project or num_incomplete_tasks == 0:
         if project.status != Project.Status.COMPLETED:
             set_project_status(project.id, 'Completed')
-            archive_project_slack_group(project)
+            transaction.on_commit(
+                lambda: archive_project_slack_group(project), robust=True)
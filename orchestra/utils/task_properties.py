@@ -19,13 +19,16 @@ def assignment_history(task):
     return task.assignments.order_by('assignment_counter')
 
 
-def current_assignment(task):
+def current_assignment(task, defer_data=False):
     """
     Return the in-progress assignment for `task`.
 
     Args:
         task (orchestra.models.Task):
             The specified task object.
+        defer_data (bool):
+            Whether to defer loading the assignment's
+            `in_progress_task_data`, for callers that don't read it.
 
     Returns:
         current_assignment (orchestra.models.TaskAssignment):
@@ -34,6 +37,9 @@ def current_assignment(task):
     assignments = assignment_history(task)
     processing = task.assignments.filter(
         status=TaskAssignment.Status.PROCESSING)
+    if defer_data:
+        assignments = assignments.defer_data()
+        processing = processing.defer_data()
     if not processing.exists():
         return assignments.last()
     else:
@@ -70,4 +76,5 @@ def all_workers(task):
         all_workers ([orchestra.models.Worker]):
             A list of all workers involved with `task`.
     """
-    return [assignment.worker for assignment in assignment_history(task).all()]
+    return [assignment.worker for assignment
+            in assignment_history(task).defer_data().select_related('worker')]
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+from orchestra.models import Iteration
+from orchestra.models import Task
+from orchestra.models import TaskAssignment
+from orchestra.models import WorkerDashboard
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import setup_models
+from orchestra.tests.helpers.fixtures import TodoFactory
+from orchestra.utils.dashboard import build_worker_dashboard
+from orchestra.utils.dashboard import get_worker_dashboard
+from orchestra.utils.task_lifecycle import assign_task
+from orchestra.utils.task_lifecycle import set_project_status
+from orchestra.utils.task_lifecycle import submit_task
+
+
+class WorkerDashboardTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        setup_models(self)
+        self.worker = self.workers[6]
+        self.task = self.tasks['awaiting_processing']
+
+    def _states(self, dashboard):
+        return {t['id']: t['state'] for t in dashboard.tasks}
+
+    def _assert_matches_live(self, dashboard):
+        live = build_worker_dashboard(self.worker)
+        self.assertEqual(dashboard.tasks, live['tasks'])
+        self.assertEqual(dashboard.complete_tasks, live['complete_tasks'])
+        self.assertEqual(dashboard.reviewer_status, live['reviewer_status'])
+
+    def test_fresh_dashboard_is_single_read(self):
+        dashboard = get_worker_dashboard(self.worker)
+        self._assert_matches_live(dashboard)
+        with self.assertNumQueries(1):
+            get_worker_dashboard(self.worker)
+
+    def test_dashboard_without_complete_tasks(self):
+        assign_task(self.worker.id, self.task.id)
+        assignment = TaskAssignment.objects.get(task=self.task,
+                                                worker=self.worker)
+        assignment.status = TaskAssignment.Status.SUBMITTED
+        assignment.save()
+        self.task.status = Task.Status.COMPLETE
+        self.task.save()
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertNotIn(self.task.id, self._states(dashboard))
+        self.assertIn(self.task.id,
+                      [t['id'] for t in dashboard.complete_tasks])
+
+        with self.assertNumQueries(1):
+            dashboard = get_worker_dashboard(self.worker,
+                                             include_complete=False)
+        self.assertEqual(dashboard.get_deferred_fields(), {'complete_tasks'})
+
+    def test_dashboard_updated_on_transitions(self):
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertNotIn(self.task.id, self._states(dashboard))
+
+        assign_task(self.worker.id, self.task.id)
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertEqual(self._states(dashboard)[self.task.id],
+                         'in_progress')
+        self._assert_matches_live(dashboard)
+
+        set_project_status(self.task.project.id, 'Paused')
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertEqual(self._states(dashboard)[self.task.id], 'paused')
+
+        set_project_status(self.task.project.id, 'Active')
+        todo = TodoFactory(project=self.task.project, step=self.task.step,
+                           title='a todo')
+        dashboard = get_worker_dashboard(self.worker)
+        task_dashboard = next(
+            t for t in dashboard.tasks if t['id'] == self.task.id)
+        self.assertEqual(task_dashboard['next_todo_dict']['title'],
+                         'a todo')
+
+        todo.title = 'a renamed todo'
+        todo.save()
+        dashboard = get_worker_dashboard(self.worker)
+        task_dashboard = next(
+            t for t in dashboard.tasks if t['id'] == self.task.id)
+        self.assertEqual(task_dashboard['next_todo_dict']['title'],
+                         'a renamed todo')
+
+        with patch('orchestra.utils.task_lifecycle._is_review_needed',
+                   return_value=True):
+            submit_task(self.task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                        self.worker)
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertEqual(self._states(dashboard)[self.task.id],
+                         'pending_review')
+        self._assert_matches_live(dashboard)
+
+    def test_dashboard_expires_when_todo_starts(self):
+        assign_task(self.worker.id, self.task.id)
+        start_by_datetime = timezone.now() + timedelta(hours=1)
+        TodoFactory(project=self.task.project, step=self.task.step,
+                    start_by_datetime=start_by_datetime)
+        dashboard = get_worker_dashboard(self.worker)
+        self.assertEqual(dashboard.valid_until, start_by_datetime)
+        self.assertTrue(dashboard.is_fresh(timezone.now()))
+        self.assertFalse(dashboard.is_fresh(start_by_datetime))
+
+    def test_concurrent_invalidation_not_masked(self):
+        dashboard = get_worker_dashboard(self.worker)
+        original_build = build_worker_dashboard
+
+        def build_and_invalidate(worker):
+            built = original_build(worker)
+            # Simulate a change that lands while the dashboard is built.
+            assign_task(self.worker.id, self.task.id)
+            return built
+
+        WorkerDashboard.objects.filter(id=dashboard.id).update(version=5)
+        with patch('orchestra.utils.dashboard.build_worker_dashboard',
+                   side_effect=build_and_invalidate):
+            get_worker_dashboard(self.worker)
+        dashboard.refresh_from_db()
+        self.assertFalse(dashboard.is_fresh(timezone.now()))
+        self.assertIn(self.task.id,
+                      self._states(get_worker_dashboard(self.worker)))
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from orchestra.models import DataBlob
+from orchestra.models import Iteration
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import TaskAssignmentFactory
+from orchestra.utils.data_blobs import delete_unreferenced_blobs
+from orchestra.utils.data_blobs import store_data
+
+
+class DataBlobsTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.assignment = TaskAssignmentFactory()
+
+    def _ref_counts(self):
+        return dict(DataBlob.objects.values_list('id', 'ref_count'))
+
+    def test_identical_data_shares_blob(self):
+        data = {'document': 'x' * 1000, 'title': 'Title'}
+        first = Iteration.objects.create(assignment=self.assignment,
+                                         submitted_data=data)
+        second = Iteration.objects.create(
+            assignment=self.assignment,
+            submitted_data={'title': 'Title', 'document': 'x' * 1000})
+        processing = Iteration.objects.create(assignment=self.assignment)
+
+        self.assertEqual(first.submitted_data_blob_id,
+                         second.submitted_data_blob_id)
+        self.assertIsNone(processing.submitted_data_blob_id)
+        self.assertEqual(self._ref_counts(),
+                         {first.submitted_data_blob_id: 2})
+        blob = DataBlob.objects.get()
+        self.assertLess(len(blob.data), blob.size)
+
+        second = Iteration.objects.get(id=second.id)
+        self.assertEqual(second.submitted_data, data)
+        self.assertEqual(Iteration.objects.get(id=processing.id)
+                         .submitted_data, {})
+
+    def test_reference_counting(self):
+        first = Iteration.objects.create(assignment=self.assignment,
+                                         submitted_data={'version': 1})
+        second = Iteration.objects.create(assignment=self.assignment,
+                                          submitted_data={'version': 1})
+        first_blob_id = first.submitted_data_blob_id
+
+        # Saving without changing the data keeps its reference.
+        first.end_datetime = first.start_datetime
+        first.save()
+        self.assertEqual(self._ref_counts(), {first_blob_id: 2})
+
+        first.submitted_data = {'version': 2}
+        first.save()
+        second_blob_id = first.submitted_data_blob_id
+        self.assertEqual(self._ref_counts(),
+                         {first_blob_id: 1, second_blob_id: 1})
+
+        # Reverted iterations have no data.
+        second.submitted_data = {}
+        second.save()
+        self.assertEqual(self._ref_counts(),
+                         {first_blob_id: 0, second_blob_id: 1})
+
+        first.delete(actually_delete=True)
+        self.assertEqual(self._ref_counts(),
+                         {first_blob_id: 0, second_blob_id: 0})
+
+    def test_delete_unreferenced_blobs(self):
+        kept = Iteration.objects.create(assignment=self.assignment,
+                                        submitted_data={'kept': True})
+        released = Iteration.objects.create(assignment=self.assignment,
+                                            submitted_data={'kept': False})
+        released.submitted_data = {}
+        released.save()
+
+        self.assertEqual(delete_unreferenced_blobs(), 1)
+        self.assertEqual(list(DataBlob.objects.values_list('id', flat=True)),
+                         [kept.submitted_data_blob_id])
+
+        # Blobs still referred to are kept even if their count is off.
+        DataBlob.objects.update(ref_count=0)
+        out = StringIO()
+        call_command('delete_unreferenced_data_blobs', stdout=out)
+        self.assertIn('Deleted 0 data blobs.', out.getvalue())
+        self.assertEqual(Iteration.objects.get(id=kept.id).submitted_data,
+                         {'kept': True})
+
+    def test_store_data_references_unreferenced_blob(self):
+        released = Iteration.objects.create(assignment=self.assignment,
+                                            submitted_data={'kept': True})
+        blob_id = released.submitted_data_blob_id
+        released.submitted_data = {}
+        released.save()
+        self.assertEqual(self._ref_counts(), {blob_id: 0})
+
+        # A blob that is referenced again before its deletion is kept.
+        self.assertEqual(store_data({'kept': True}).id, blob_id)
+        self.assertEqual(delete_unreferenced_blobs(), 0)
+        self.assertEqual(self._ref_counts(), {blob_id: 1})
@@ -0,0 +1,69 @@
+from orchestra.models import WorkerCertification
+from orchestra.tests.helpers import OrchestraTestCase
+from orchestra.tests.helpers.fixtures import CertificationFactory
+from orchestra.tests.helpers.fixtures import StepFactory
+from orchestra.tests.helpers.fixtures import WorkerCertificationFactory
+from orchestra.tests.helpers.fixtures import WorkerFactory
+from orchestra.utils.eligibility import CertificationEligibilityIndex
+
+
+class CertificationEligibilityIndexTestCase(OrchestraTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.certifications = [CertificationFactory() for _ in range(2)]
+        self.step = StepFactory(slug='eligibility-step')
+        self.step.required_certifications.add(*self.certifications)
+        self.workers = [WorkerFactory() for _ in range(3)]
+        for worker in self.workers[:2]:
+            for certification in self.certifications:
+                WorkerCertificationFactory(
+                    worker=worker, certification=certification)
+        # The last worker only holds one of the required certifications.
+        WorkerCertificationFactory(
+            worker=self.workers[2], certification=self.certifications[0])
+        self.entry_level = WorkerCertification.Role.ENTRY_LEVEL
+        self.index = CertificationEligibilityIndex()
+
+    def _eligible_workers(self, **kwargs):
+        return self.index.eligible_workers(
+            self.step, self.entry_level, **kwargs)
+
+    def test_eligible_workers(self):
+        self.assertEqual(self._eligible_workers(),
+                         {self.workers[0].id, self.workers[1].id})
+        self.assertEqual(
+            self.index.eligible_workers(
+                self.step, WorkerCertification.Role.REVIEWER),
+            set())
+        self.assertIsNone(
+            self.index.eligible_workers(
+                StepFactory(slug='uncertified-step'), self.entry_level))
+
+        # Entries are reused for the life of the index.
+        with self.assertNumQueries(0):
+            self._eligible_workers()
+
+    def test_new_index_sees_certification_changes(self):
+        self.assertEqual(
+            self._eligible_workers(require_staffbot_enabled=True),
+            {self.workers[0].id, self.workers[1].id})
+
+        worker_certification = WorkerCertification.objects.get(
+            worker=self.workers[0], certification=self.certifications[0])
+        worker_certification.staffbot_enabled = False
+        worker_certification.save()
+        self.step.required_certifications.remove(self.certifications[1])
+
+        # An index keeps the entries it built.
+        self.assertEqual(
+            self._eligible_workers(require_staffbot_enabled=True),
+            {self.workers[0].id, self.workers[1].id})
+
+        self.index = CertificationEligibilityIndex()
+        self.assertEqual(
+            self._eligible_workers(require_staffbot_enabled=True),
+            {self.workers[1].id, self.workers[2].id})
+        self.assertEqual(
+            self._eligible_workers(),
+            {self.workers[0].id, self.workers[1].id, self.workers[2].id})
@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from orchestra.core.errors import JSONPatchError
+from orchestra.utils.json_patch import apply_json_patch
+
+
+class JSONPatchTestCase(SimpleTestCase):
+
+    def test_operations(self):
+        document = {'title': 'Draft', 'sections': ['a', 'c'],
+                    'meta': {'a/b': 1, 'm~n': 2}}
+        patched = apply_json_patch(document, [
+            {'op': 'test', 'path': '/title', 'value': 'Draft'},
+            {'op': 'replace', 'path': '/title', 'value': 'Final'},
+            {'op': 'add', 'path': '/sections/1', 'value': 'b'},
+            {'op': 'add', 'path': '/sections/-', 'value': 'd'},
+            {'op': 'remove', 'path': '/meta/a~1b'},
+            {'op': 'move', 'from': '/meta/m~0n', 'path': '/count'},
+            {'op': 'copy', 'from': '/sections/0', 'path': '/first'},
+        ])
+        self.assertEqual(patched, {
+            'title': 'Final', 'sections': ['a', 'b', 'c', 'd'],
+            'meta': {}, 'count': 2, 'first': 'a'})
+        # The document itself is left unchanged.
+        self.assertEqual(document['title'], 'Draft')
+        self.assertEqual(
+            apply_json_patch(document,
+                             [{'op': 'replace', 'path': '', 'value': []}]),
+            [])
+
+    def test_invalid_patches(self):
+        document = {'sections': ['a'], 'title': 'Draft'}
+        invalid_patches = {
+            'Patch must be a list of operations': {'op': 'add'},
+            'Operation must be an object': ['add'],
+            'Invalid operation: delete': [{'op': 'delete', 'path': '/a'}],
+            'Operation add requires value': [{'op': 'add', 'path': '/a'}],
+            'Operation move requires from': [{'op': 'move', 'path': '/a'}],
+            'Invalid path: title': [{'op': 'remove', 'path': 'title'}],
+            'Path not found: /missing': [
+                {'op': 'replace', 'path': '/missing', 'value': 1}],
+            'Array index out of range: 1': [
+                {'op': 'remove', 'path': '/sections/1'}],
+            'Invalid array index: 01': [
+                {'op': 'add', 'path': '/sections/01', 'value': 'b'}],
+            'Cannot move a value into itself': [
+                {'op': 'move', 'from': '/sections', 'path': '/sections/0'}],
+            'Test failed: /title': [
+                {'op': 'test', 'path': '/title', 'value': 'Final'}],
+        }
+        for message, patch in invalid_patches.items():
+            with self.assertRaisesMessage(JSONPatchError, message):
+                apply_json_patch(document, patch)
@@ -51,7 +51,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
 
         # Entry-level worker picks up task
         self.assertEqual(task.status, Task.Status.AWAITING_PROCESSING)
-        task = assign_task(self.workers[0].id, task.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = assign_task(self.workers[0].id, task.id)
         self.assertTrue(task.is_worker_assigned(self.workers[0]))
 
         # Notification should be sent to entry-level worker
@@ -69,8 +70,10 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         with patch('orchestra.utils.task_lifecycle._is_review_needed',
                    return_value=True):
             # Entry-level worker submits task
-            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
-                               self.workers[0])
+            with self.captureOnCommitCallbacks(execute=True):
+                task = submit_task(task.id, {},
+                                   Iteration.Status.REQUESTED_REVIEW,
+                                   self.workers[0])
 
         self.assertEqual(task.status, Task.Status.PENDING_REVIEW)
         # Notification should be sent to entry-level worker
@@ -86,7 +89,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # Reviewer picks up task
-        task = assign_task(self.workers[1].id, task.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = assign_task(self.workers[1].id, task.id)
         self.assertEqual(task.status, Task.Status.REVIEWING)
         # No notification should be sent
         self.assertEqual(len(self.mail.inbox), 0)
@@ -96,8 +100,9 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # Reviewer rejects task
-        task = submit_task(task.id, {}, Iteration.Status.PROVIDED_REVIEW,
-                           self.workers[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            task = submit_task(task.id, {}, Iteration.Status.PROVIDED_REVIEW,
+                               self.workers[1])
         self.assertEqual(task.status, Task.Status.POST_REVIEW_PROCESSING)
         # Notification should be sent to original worker
         self.assertEqual(len(self.mail.inbox), 1)
@@ -112,8 +117,9 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # Entry-level worker resubmits task
-        task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
-                           self.workers[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                               self.workers[0])
         self.assertEqual(task.status, Task.Status.REVIEWING)
         # Notification should be sent to reviewer
         self.assertEqual(len(self.mail.inbox), 1)
@@ -130,8 +136,10 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         # First reviewer accepts task
         with patch('orchestra.utils.task_lifecycle._is_review_needed',
                    return_value=True):
-            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
-                               self.workers[1])
+            with self.captureOnCommitCallbacks(execute=True):
+                task = submit_task(task.id, {},
+                                   Iteration.Status.REQUESTED_REVIEW,
+                                   self.workers[1])
         self.assertEqual(task.status, Task.Status.PENDING_REVIEW)
         # Notification should be sent to first reviewer
         self.assertEqual(len(self.mail.inbox), 1)
@@ -146,7 +154,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # Second reviewer picks up task
-        task = assign_task(self.workers[3].id, task.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = assign_task(self.workers[3].id, task.id)
         self.assertEqual(task.status, Task.Status.REVIEWING)
         # No notification should be sent
         self.assertEqual(len(self.mail.inbox), 0)
@@ -156,8 +165,9 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # Second reviewer rejects task
-        task = submit_task(task.id, {}, Iteration.Status.PROVIDED_REVIEW,
-                           self.workers[3])
+        with self.captureOnCommitCallbacks(execute=True):
+            task = submit_task(task.id, {}, Iteration.Status.PROVIDED_REVIEW,
+                               self.workers[3])
         self.assertEqual(task.status, Task.Status.POST_REVIEW_PROCESSING)
         # Notification should be sent to first reviewer
         self.assertEqual(len(self.mail.inbox), 1)
@@ -172,8 +182,9 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         self.assertEqual(len(experts_slack_messages), 0)
 
         # First reviewer resubmits task
-        task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
-                           self.workers[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                               self.workers[1])
         self.assertEqual(task.status, Task.Status.REVIEWING)
         # Notification should be sent to second reviewer
         self.assertEqual(len(self.mail.inbox), 1)
@@ -190,8 +201,10 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         # Second reviewer accepts task; task is complete
         with patch('orchestra.utils.task_lifecycle._is_review_needed',
                    return_value=False):
-            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
-                               self.workers[3])
+            with self.captureOnCommitCallbacks(execute=True):
+                task = submit_task(task.id, {},
+                                   Iteration.Status.REQUESTED_REVIEW,
+                                   self.workers[3])
         self.assertEqual(task.status, Task.Status.COMPLETE)
 
         # Notification should be sent to all workers on task
@@ -211,7 +224,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
         status_choices = dict(Project.STATUS_CHOICES)
         paused_status = status_choices[Project.Status.PAUSED]
 
-        set_project_status(task.project.id, paused_status)
+        with self.captureOnCommitCallbacks(execute=True):
+            set_project_status(task.project.id, paused_status)
         task.project.refresh_from_db()
         _validate_slack_messages('has been paused.')
         self.assertEqual(len(internal_slack_messages), 0)
@@ -221,7 +235,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
 
         # Unpause the project
         active_status = status_choices[Project.Status.ACTIVE]
-        set_project_status(task.project.id, active_status)
+        with self.captureOnCommitCallbacks(execute=True):
+            set_project_status(task.project.id, active_status)
         task.project.refresh_from_db()
         _validate_slack_messages('has been reactivated.')
         self.assertEqual(len(internal_slack_messages), 0)
@@ -260,9 +275,8 @@ class BasicNotificationsTestCase(OrchestraTestCase):
                 getattr(fake_random_string, 'num_calls', 0) + 1)
             return str(fake_random_string.num_calls)
 
-        for group_name in ('ketchup-3-sales-1', 'bongo-bash723581-3',
-                           'bongo-bash723581-4'):
-            self.slack.conversations.create(group_name, is_private=True)
+        taken_names = {'ketchup-3-sales-1', 'bongo-bash723581-3',
+                       'bongo-bash723581-4'}
 
         project = self.projects['reject_rev_proj']
 
@@ -300,4 +314,6 @@ class BasicNotificationsTestCase(OrchestraTestCase):
                     ('what a treat!', 'what-a-treat-9'),
                     ("Sally's Plumbing Emporium", 'sallys-plumbing-10')):
                 project.short_description = short_description
-                self.assertEqual(_project_slack_group_name(project), group_id)
+                self.assertEqual(
+                    _project_slack_group_name(project, taken_names),
+                    group_id)
@@ -1,16 +1,23 @@
+import time
+from unittest import skipUnless
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from dateutil.parser import parse
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db import transaction
 
 from orchestra.core.errors import AssignmentPolicyError
 from orchestra.core.errors import CreationPolicyError
+from orchestra.core.errors import DashboardCursorError
 from orchestra.core.errors import IllegalTaskSubmission
 from orchestra.core.errors import ModelSaveError
 from orchestra.core.errors import ReviewPolicyError
 from orchestra.core.errors import TaskAssignmentError
+from orchestra.core.errors import TaskDataVersionError
+from orchestra.core.errors import TaskDependencyError
 from orchestra.core.errors import TaskStatusError
 from orchestra.core.errors import WorkerCertificationError
 from orchestra.models import Iteration
@@ -27,13 +34,19 @@ from orchestra.tests.helpers.fixtures import TodoFactory
 from orchestra.tests.helpers.fixtures import ProjectFactory
 from orchestra.tests.helpers.fixtures import setup_models
 from orchestra.tests.helpers.fixtures import WorkflowVersionFactory
+from orchestra.tests.helpers.locks import LockHoldTimer
+from orchestra.tests.helpers.locks import run_concurrently
 from orchestra.utils.task_lifecycle import AssignmentPolicyType
 from orchestra.utils.task_lifecycle import assert_new_task_status_valid
 from orchestra.utils.task_lifecycle import assign_task
+from orchestra.utils.task_lifecycle import complete_tasks_assigned_to_worker
 from orchestra.utils.task_lifecycle import create_subsequent_tasks
+from orchestra.utils.prerequisites import PrerequisiteDataLoader
 from orchestra.utils.task_lifecycle import get_next_task_status
+from orchestra.utils.task_lifecycle import get_previously_completed_task_data
 from orchestra.utils.task_lifecycle import get_task_overview_for_worker
 from orchestra.utils.task_lifecycle import is_worker_certified_for_task
+from orchestra.utils.task_lifecycle import patch_task
 from orchestra.utils.task_lifecycle import role_counter_required_for_new_task
 from orchestra.utils.task_lifecycle import submit_task
 from orchestra.utils.task_lifecycle import tasks_assigned_to_worker
@@ -42,10 +55,12 @@ from orchestra.utils.task_lifecycle import worker_has_reviewer_status
 from orchestra.utils.task_lifecycle import end_project
 from orchestra.utils.task_properties import current_assignment
 from orchestra.workflow.defaults import get_default_creation_policy
+from orchestra.workflow.graph import workflow_graphs
 
 MOCK_CURRENT = '2018-01-17T00:00:00Z'
 DEADLINE1_DATETIME = '2018-01-18T00:00:00Z'
 DEADLINE2_DATETIME = '2018-01-19T00:00:00Z'
+NOTIFICATION_SECONDS = 0.5
 
 
 class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
@@ -130,6 +145,92 @@ class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
         self.assertTrue(worker_has_reviewer_status(self.workers[5]))
         self.assertTrue(worker_has_reviewer_status(self.workers[6]))
 
+    def _assign_first_task(self, project):
+        # Worker 4 is also certified for the next step, so the submission
+        # preassigns its task.
+        create_subsequent_tasks(project)
+        return assign_task(self.workers[4].id, project.tasks.first().id)
+
+    def test_submit_task_lock_hold_time(self):
+        task = self._assign_first_task(self.projects['assignment_policy'])
+        notifications = []
+
+        def slow_notify_status_change(task, previous_status, *args):
+            notifications.append(
+                (task.id, previous_status, connection.in_atomic_block))
+            time.sleep(NOTIFICATION_SECONDS)
+
+        with patch('orchestra.utils.task_lifecycle.notify_status_change',
+                   side_effect=slow_notify_status_change), \
+                patch('orchestra.utils.task_lifecycle._is_review_needed',
+                      return_value=False), \
+                LockHoldTimer() as timer:
+            task = submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                               self.workers[4])
+
+        # The next task was created and preassigned in the same
+        # transaction, but workers were only notified after it committed.
+        self.assertEqual(task.status, Task.Status.COMPLETE)
+        next_task = task.project.tasks.get(step__slug='step_1')
+        self.assertTrue(next_task.is_worker_assigned(self.workers[4]))
+        self.assertEqual(
+            sorted(notifications),
+            sorted([(next_task.id, Task.Status.AWAITING_PROCESSING, False),
+                    (task.id, Task.Status.PROCESSING, False)]))
+        self.assertEqual(len(timer.hold_times), 1)
+        self.assertLess(timer.hold_times[0], NOTIFICATION_SECONDS)
+
+    def test_submit_task_defers_notifications(self):
+        task = self._assign_first_task(self.projects['assignment_policy'])
+        with patch('orchestra.utils.task_lifecycle.notify_status_change') \
+                as mock_notify, \
+                patch('orchestra.utils.task_lifecycle.'
+                      'add_worker_to_project_team') as mock_add_worker, \
+                patch('orchestra.utils.task_lifecycle._is_review_needed',
+                      return_value=False):
+            with transaction.atomic():
+                submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                            self.workers[4])
+                # Nothing is sent while the submission holds its locks.
+                mock_notify.assert_not_called()
+                mock_add_worker.assert_not_called()
+            # The submitted task and the preassigned next task notify
+            # once the submission commits.
+            self.assertEqual(mock_notify.call_count, 2)
+            self.assertEqual(mock_add_worker.call_count, 1)
+
+    # SQLite test databases are in memory and only allow one connection,
+    # so this test only runs against a database like PostgreSQL.
+    @skipUnless(connection.features.test_db_allows_multiple_connections,
+                'Concurrent transactions need a database with multiple '
+                'connections.')
+    def test_concurrent_submit_task_lock_hold_times(self):
+        project = self.projects['assignment_policy']
+        tasks = [
+            self._assign_first_task(project),
+            self._assign_first_task(ProjectFactory(
+                workflow_version=project.workflow_version))]
+
+        def submit(task):
+            with LockHoldTimer() as timer:
+                submit_task(task.id, {}, Iteration.Status.REQUESTED_REVIEW,
+                            self.workers[4])
+            return timer.hold_times
+
+        with patch('orchestra.utils.task_lifecycle.notify_status_change',
+                   side_effect=lambda *args: time.sleep(
+                       NOTIFICATION_SECONDS)), \
+                patch('orchestra.utils.task_lifecycle._is_review_needed',
+                      return_value=False):
+            hold_times = run_concurrently(
+                [lambda task=task: submit(task) for task in tasks])
+
+        for task, task_hold_times in zip(tasks, hold_times):
+            task.refresh_from_db()
+            self.assertEqual(task.status, Task.Status.COMPLETE)
+            self.assertEqual(len(task_hold_times), 1)
+            self.assertLess(task_hold_times[0], NOTIFICATION_SECONDS)
+
     def test_role_counter_required_for_new_task(self):
         task = TaskFactory(status=Task.Status.COMPLETE)
         with self.assertRaises(TaskAssignmentError):
@@ -268,6 +369,8 @@ class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
             'step': {'slug': 'step1', 'name': 'The first step'},
             'status': 'Submitted',
             'task': {'data': {'test_key': 'test_value'},
+                     'data_version': task.assignments.get(
+                         worker=self.workers[0]).data_version,
                      'status': 'Pending Review'},
             'task_id': task.id,
             'assignment_id': task.assignments.get(worker=self.workers[0]).id,
@@ -326,6 +429,27 @@ class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
                                           status=0,
                                           in_progress_task_data={})
 
+    def test_stale_assignment_save_bumps_data_version(self):
+        task = self.tasks['awaiting_processing']
+        assign_task(self.workers[0].id, task.id)
+        stale_assignment = task.assignments.get(worker=self.workers[0])
+        data_version = stale_assignment.data_version
+
+        patched_version = patch_task(
+            task.id, [{'op': 'add', 'path': '/title', 'value': 'Draft'}],
+            data_version, self.workers[0])
+        self.assertEqual(patched_version, data_version + 1)
+
+        # Saving an instance loaded before the patch doesn't reissue the
+        # patched version, so clients holding it can't patch data they
+        # haven't seen.
+        stale_assignment.save()
+        self.assertEqual(stale_assignment.data_version, data_version + 2)
+        stale_assignment.refresh_from_db()
+        self.assertEqual(stale_assignment.data_version, data_version + 2)
+        with self.assertRaises(TaskDataVersionError):
+            patch_task(task.id, [], patched_version, self.workers[0])
+
     def test_illegal_get_next_task_status(self):
         task = self.tasks['awaiting_processing']
         illegal_statuses = [
@@ -643,6 +767,91 @@ class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
             create_subsequent_tasks(project)
         mock_schedule.assert_not_called()
 
+    def test_create_subsequent_tasks_for_completed_step(self):
+        workflow_version = self.workflow_versions['crazy_workflow']
+        steps = self.workflow_steps[workflow_version.slug]
+        project = ProjectFactory(workflow_version=workflow_version)
+
+        def complete_task(step_slug):
+            task = project.tasks.get(step__slug=step_slug)
+            TaskAssignmentFactory(
+                task=task, worker=self.workers[0],
+                status=TaskAssignment.Status.SUBMITTED,
+                in_progress_task_data={})
+            task.status = Task.Status.COMPLETE
+            task.save()
+
+        def task_step_slugs():
+            return set(project.tasks.values_list('step__slug', flat=True))
+
+        create_subsequent_tasks(project)
+        self.assertEqual(task_step_slugs(), {'stepA', 'stepB'})
+
+        # Only the steps that depend on the completed step are created.
+        complete_task('stepA')
+        complete_task('stepB')
+        create_subsequent_tasks(project, completed_step=steps['stepA'])
+        self.assertEqual(task_step_slugs(), {'stepA', 'stepB', 'stepC'})
+        create_subsequent_tasks(project, completed_step=steps['stepB'])
+        self.assertEqual(task_step_slugs(),
+                         {'stepA', 'stepB', 'stepC', 'stepD'})
+
+        # A step is created once all of its dependencies are complete.
+        complete_task('stepC')
+        create_subsequent_tasks(project, completed_step=steps['stepC'])
+        self.assertNotIn('stepE', task_step_slugs())
+        complete_task('stepD')
+        create_subsequent_tasks(project, completed_step=steps['stepD'])
+        self.assertIn('stepE', task_step_slugs())
+
+        for step_slug in ('stepE', 'stepF', 'stepG', 'stepH'):
+            complete_task(step_slug)
+            create_subsequent_tasks(project, completed_step=steps[step_slug])
+        self.assertEqual(len(task_step_slugs()), 8)
+        project.refresh_from_db()
+        self.assertEqual(project.status, Project.Status.COMPLETED)
+
+    def test_get_previously_completed_task_data(self):
+        workflow_version = self.workflow_versions['crazy_workflow']
+        steps = self.workflow_steps[workflow_version.slug]
+        project = ProjectFactory(workflow_version=workflow_version)
+        for step_slug in ('stepA', 'stepB', 'stepC', 'stepD'):
+            task = TaskFactory(project=project, step=steps[step_slug],
+                               status=Task.Status.COMPLETE)
+            for counter in range(2):
+                TaskAssignmentFactory(
+                    task=task, worker=self.workers[counter],
+                    assignment_counter=counter,
+                    status=TaskAssignment.Status.SUBMITTED,
+                    in_progress_task_data={'step': step_slug,
+                                           'counter': counter})
+
+        # Prerequisite data is loaded with a query for the tasks and one
+        # for their assignments, and reused by later lookups.
+        loader = PrerequisiteDataLoader(
+            project, workflow_graph=workflow_graphs.get(workflow_version.id))
+        with self.assertNumQueries(2):
+            loader.prefetch([steps['stepC'], steps['stepE']])
+        with self.assertNumQueries(0):
+            prerequisites = get_previously_completed_task_data(
+                steps['stepE'], project, prerequisite_loader=loader)
+        self.assertEqual(prerequisites, {
+            step_slug: {'step': step_slug, 'counter': 1}
+            for step_slug in ('stepA', 'stepB', 'stepC', 'stepD')})
+        # A new loader also reads the workflow graph's stamp.
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                get_previously_completed_task_data(steps['stepC'], project),
+                {'stepA': {'step': 'stepA', 'counter': 1}})
+
+        project.tasks.filter(step__slug='stepD').update(
+            status=Task.Status.PROCESSING)
+        with self.assertRaises(TaskDependencyError):
+            get_previously_completed_task_data(steps['stepE'], project)
+        project.tasks.filter(step__slug='stepD').delete()
+        with self.assertRaises(Task.DoesNotExist):
+            get_previously_completed_task_data(steps['stepE'], project)
+
     def test_next_todo_with_earlier_due_time(self):
         task = self.tasks['next_todo_task']
         task.step = self.step
@@ -715,6 +924,92 @@ class BasicTaskLifeCycleTestCase(OrchestraTransactionTestCase):
                 self.assertEqual(next_todo_start, DEADLINE1_DATETIME)
                 self.assertEqual(t['should_be_active'], False)
 
+    def _add_dashboard_assignments(self, worker, num_projects):
+        for _ in range(num_projects):
+            project = ProjectFactory(workflow_version=self.workflow_version)
+            step = StepFactory(is_human=True,
+                               slug='dashboard-step-{}'.format(project.id),
+                               workflow_version=self.workflow_version)
+            TodoFactory(step=step, project=project,
+                        due_datetime=parse(DEADLINE1_DATETIME))
+            TaskAssignmentFactory(
+                worker=worker,
+                task=TaskFactory(project=project, step=step,
+                                 status=Task.Status.PROCESSING))
+            TaskAssignmentFactory(
+                worker=worker,
+                status=TaskAssignment.Status.SUBMITTED,
+                task=TaskFactory(project=project, step=step,
+                                 status=Task.Status.PENDING_REVIEW))
+            TaskAssignmentFactory(
+                worker=worker,
+                status=TaskAssignment.Status.SUBMITTED,
+                task=TaskFactory(project=project, step=step,
+                                 status=Task.Status.COMPLETE))
+
+    def test_tasks_assigned_to_worker_num_queries(self):
+        worker = self.workers[2]
+        self._add_dashboard_assignments(worker, 2)
+        with self.assertNumQueries(4):
+            tasks_assigned = tasks_assigned_to_worker(worker)
+        self.assertEqual(len(tasks_assigned), 6)
+
+        # The number of queries doesn't grow with the number of
+        # assignments.
+        self._add_dashboard_assignments(worker, 5)
+        with self.assertNumQueries(4):
+            tasks_assigned = tasks_assigned_to_worker(worker)
+        self.assertEqual(len(tasks_assigned), 21)
+        states = [t['state'] for t in tasks_assigned]
+        self.assertEqual(states.count('in_progress'), 7)
+        self.assertEqual(states.count('pending_review'), 7)
+        self.assertEqual(states.count('complete'), 7)
+        for t in tasks_assigned:
+            if t['state'] == 'in_progress':
+                self.assertEqual(t['next_todo_dict']['due_datetime'],
+                                 DEADLINE1_DATETIME)
+                self.assertTrue(t['should_be_active'])
+
+    def test_complete_tasks_assigned_to_worker_pages(self):
+        worker = self.workers[2]
+        start_datetime = parse(MOCK_CURRENT)
+        for priority in (0, 0, 0, 1, 1):
+            # Projects share priorities and start datetimes so that
+            # pages are split on ties.
+            project = ProjectFactory(workflow_version=self.workflow_version,
+                                     priority=priority,
+                                     start_datetime=start_datetime)
+            step = StepFactory(is_human=True,
+                               slug='complete-step-{}'.format(project.id),
+                               workflow_version=self.workflow_version)
+            TaskAssignmentFactory(
+                worker=worker,
+                status=TaskAssignment.Status.SUBMITTED,
+                task=TaskFactory(project=project, step=step,
+                                 status=Task.Status.COMPLETE))
+
+        all_tasks, next_cursor = complete_tasks_assigned_to_worker(worker)
+        self.assertIsNone(next_cursor)
+        self.assertEqual([t['priority'] for t in all_tasks],
+                         [1, 1, 0, 0, 0])
+
+        paged_tasks = []
+        cursor = None
+        num_pages = 0
+        while True:
+            with self.assertNumQueries(1):
+                tasks, cursor = complete_tasks_assigned_to_worker(
+                    worker, cursor=cursor, page_size=2)
+            paged_tasks.extend(tasks)
+            num_pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(num_pages, 3)
+        self.assertEqual(paged_tasks, all_tasks)
+
+        with self.assertRaises(DashboardCursorError):
+            complete_tasks_assigned_to_worker(worker, cursor='not-a-cursor')
+
 
 class EndProjectTestCase(OrchestraTransactionTestCase):
     def setUp(self):
@@ -18,8 +18,11 @@ from rest_framework import status as http_status
 from rest_framework import generics
 from rest_framework import permissions
 
+from orchestra.core.errors import DashboardCursorError
 from orchestra.core.errors import IllegalTaskSubmission
+from orchestra.core.errors import JSONPatchError
 from orchestra.core.errors import TaskAssignmentError
+from orchestra.core.errors import TaskDataVersionError
 from orchestra.core.errors import TaskStatusError
 from orchestra.core.errors import TimerError
 from orchestra.filters import TimeEntryFilter
@@ -32,13 +35,18 @@ from orchestra.models import Worker
 from orchestra.project_api.serializers import TaskTimerSerializer
 from orchestra.project_api.serializers import TimeEntrySerializer
 from orchestra.utils import time_tracking
+from orchestra.utils.dashboard import get_worker_dashboard
+from orchestra.utils.etags import conditional_json_response
 from orchestra.utils.load_json import load_encoded_json
 from orchestra.utils.s3 import upload_editor_image
+from orchestra.utils.task_lifecycle import DASHBOARD_COMPLETE_PAGE_SIZE
+from orchestra.utils.task_lifecycle import DASHBOARD_COMPLETE_TASKS_LIMIT
+from orchestra.utils.task_lifecycle import complete_tasks_assigned_to_worker
+from orchestra.utils.task_lifecycle import get_task_overview_etag
 from orchestra.utils.task_lifecycle import get_task_overview_for_worker
+from orchestra.utils.task_lifecycle import patch_task
 from orchestra.utils.task_lifecycle import save_task
 from orchestra.utils.task_lifecycle import submit_task
-from orchestra.utils.task_lifecycle import tasks_assigned_to_worker
-from orchestra.utils.task_lifecycle import worker_has_reviewer_status
 from orchestra.utils.common_helpers import IsAssociatedWorker
 
 logger = logging.getLogger(__name__)
@@ -101,9 +109,37 @@ def newindex(request):
 @login_required
 def dashboard_tasks(request):
     worker = Worker.objects.get(user=request.user)
-    tasks = tasks_assigned_to_worker(worker)
+    # Clients that page through complete tasks with
+    # `dashboard_complete_tasks` skip reading them here.
+    include_complete = request.GET.get('active_only') != 'true'
+    dashboard = get_worker_dashboard(
+        worker, include_complete=include_complete)
+    tasks = dashboard.tasks
+    if include_complete:
+        tasks = tasks + dashboard.complete_tasks
     return {'tasks': tasks,
-            'reviewerStatus': worker_has_reviewer_status(worker)}
+            'reviewerStatus': dashboard.reviewer_status}
+
+
+@json_view
+@login_required
+def dashboard_complete_tasks(request):
+    worker = Worker.objects.get(user=request.user)
+    try:
+        page_size = int(request.GET.get(
+            'page_size', DASHBOARD_COMPLETE_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('Invalid page size')
+    if not 0 < page_size <= DASHBOARD_COMPLETE_TASKS_LIMIT:
+        raise BadRequest('Page size must be between 1 and {}'.format(
+            DASHBOARD_COMPLETE_TASKS_LIMIT))
+    try:
+        tasks, next_cursor = complete_tasks_assigned_to_worker(
+            worker, cursor=request.GET.get('cursor'), page_size=page_size)
+    except DashboardCursorError as e:
+        raise BadRequest(e)
+    return {'tasks': tasks,
+            'nextCursor': next_cursor}
 
 
 @json_view
@@ -125,9 +161,10 @@ def upload_image(request):
 def task_assignment_information(request):
     try:
         worker = Worker.objects.get(user=request.user)
-        return get_task_overview_for_worker(
-            load_encoded_json(request.body)['task_id'],
-            worker)
+        task_id = load_encoded_json(request.body)['task_id']
+        return conditional_json_response(
+            request, get_task_overview_etag(task_id, worker),
+            lambda: get_task_overview_for_worker(task_id, worker))
     except TaskAssignmentError as e:
         raise BadRequest(e)
     except Task.DoesNotExist as e:
@@ -140,16 +177,39 @@ def save_task_assignment(request):
     assignment_information = load_encoded_json(request.body)
     worker = Worker.objects.get(user=request.user)
     try:
-        save_task(assignment_information['task_id'],
-                  assignment_information['task_data'],
-                  worker)
-        return {}
+        data_version = save_task(assignment_information['task_id'],
+                                 assignment_information['task_data'],
+                                 worker)
+        return {'data_version': data_version}
     except Task.DoesNotExist:
         raise BadRequest('No task for given id')
     except TaskAssignmentError as e:
         raise BadRequest(e)
 
 
+@json_view
+@login_required
+def patch_task_assignment(request):
+    assignment_information = load_encoded_json(request.body)
+    worker = Worker.objects.get(user=request.user)
+    missing = [key for key in ('task_id', 'patch', 'data_version')
+               if key not in assignment_information]
+    if missing:
+        raise BadRequest('Missing parameters: {}'.format(', '.join(missing)))
+    try:
+        data_version = patch_task(assignment_information['task_id'],
+                                  assignment_information['patch'],
+                                  assignment_information['data_version'],
+                                  worker)
+        return {'data_version': data_version}
+    except TaskDataVersionError as e:
+        # The client should reload the task data and send a new patch.
+        return {'error': http_status.HTTP_409_CONFLICT,
+                'message': str(e)}, http_status.HTTP_409_CONFLICT
+    except (TaskAssignmentError, JSONPatchError) as e:
+        raise BadRequest(e)
+
+
 @json_view
 @login_required
 def submit_task_assignment(request):
@@ -0,0 +1,249 @@
+import copy
+import threading
+
+from collections import deque
+from types import MappingProxyType
+
+from django.db.models import F
+
+from orchestra.models import Step
+from orchestra.models import WorkflowVersion
+
+# Steps are cached as the values of these fields, in this order.
+STEP_FIELD_NAMES = tuple(field.attname
+                         for field in Step._meta.concrete_fields)
+
+
+class WorkflowGraph(object):
+    """
+    An immutable snapshot of the steps of a workflow version and the
+    dependencies between them. It only holds plain data, so it can be
+    shared between threads and requests.
+
+    Steps are numbered by their position in `step_rows`, which is
+    ordered by step ID, and every dependency structure refers to steps
+    by that number.
+
+    Attributes:
+        workflow_version_id (int):
+            ID of the compiled workflow version.
+        stamp (int):
+            The workflow version's `graph_stamp` when it was compiled.
+        step_rows (tuple):
+            The values of `STEP_FIELD_NAMES` for each step.
+        step_indexes (mappingproxy):
+            Maps step slugs to their number.
+        creation_dependencies (tuple):
+            For each step, the numbers of the steps it directly depends on
+            for creation.
+        creation_dependents (tuple):
+            For each step, the numbers of the steps that directly depend
+            on it for creation.
+        submission_dependencies (tuple):
+            For each step, the numbers of the steps it directly depends on
+            for submission.
+        creation_prerequisites (tuple):
+            For each step, the numbers of every step it transitively
+            depends on for creation.
+        topological_order (tuple):
+            Step numbers ordered so that every step comes after all of its
+            creation dependencies.
+    """
+
+    def __init__(self, workflow_version_id, stamp, step_rows,
+                 creation_edges, submission_edges):
+        self.workflow_version_id = workflow_version_id
+        self.stamp = stamp
+        self.step_rows = tuple(step_rows)
+        id_index = STEP_FIELD_NAMES.index('id')
+        slug_index = STEP_FIELD_NAMES.index('slug')
+        step_numbers = {row[id_index]: number
+                        for number, row in enumerate(self.step_rows)}
+        self.step_indexes = MappingProxyType({
+            row[slug_index]: number
+            for number, row in enumerate(self.step_rows)})
+        self.creation_dependencies = self._adjacency(
+            (step_numbers[from_id], step_numbers[to_id])
+            for from_id, to_id in creation_edges)
+        self.creation_dependents = self._adjacency(
+            (step_numbers[to_id], step_numbers[from_id])
+            for from_id, to_id in creation_edges)
+        self.submission_dependencies = self._adjacency(
+            (step_numbers[from_id], step_numbers[to_id])
+            for from_id, to_id in submission_edges)
+        self.topological_order = self._sort_topologically()
+        self.creation_prerequisites = self._close_prerequisites()
+
+    def _adjacency(self, edges):
+        adjacency = [[] for _ in self.step_rows]
+        for from_number, to_number in edges:
+            adjacency[from_number].append(to_number)
+        return tuple(tuple(sorted(numbers)) for numbers in adjacency)
+
+    def _sort_topologically(self):
+        num_dependencies = [len(dependencies)
+                            for dependencies in self.creation_dependencies]
+        ready = deque(number for number, count
+                      in enumerate(num_dependencies) if count == 0)
+        order = []
+        while ready:
+            number = ready.popleft()
+            order.append(number)
+            for dependent in self.creation_dependents[number]:
+                num_dependencies[dependent] -= 1
+                if num_dependencies[dependent] == 0:
+                    ready.append(dependent)
+        # Steps on a dependency cycle are never ready, so they are left
+        # out of the order.
+        return tuple(order)
+
+    def _close_prerequisites(self):
+        prerequisites = [None] * len(self.step_rows)
+        for number in self.topological_order:
+            closure = set(self.creation_dependencies[number])
+            for dependency in self.creation_dependencies[number]:
+                closure |= prerequisites[dependency]
+            prerequisites[number] = frozenset(closure)
+        for number, closure in enumerate(prerequisites):
+            if closure is None:
+                prerequisites[number] = self._walk_prerequisites(number)
+        return tuple(prerequisites)
+
+    def _walk_prerequisites(self, number):
+        to_visit = list(self.creation_dependencies[number])
+        closure = set(to_visit)
+        while to_visit:
+            for dependency in self.creation_dependencies[to_visit.pop()]:
+                if dependency not in closure:
+                    closure.add(dependency)
+                    to_visit.append(dependency)
+        return frozenset(closure)
+
+
+class CompiledWorkflowVersion(object):
+    """
+    A workflow version's graph with its own orchestra.models.Step
+    objects, which callers may use like steps loaded from the database.
+    Other attributes are those of the shared
+    orchestra.workflow.graph.WorkflowGraph.
+
+    Attributes:
+        graph (orchestra.workflow.graph.WorkflowGraph):
+            The shared snapshot of the workflow version.
+        steps (tuple):
+            The orchestra.models.Step objects of the workflow version,
+            ordered by step number.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        # Copy the cached values so that changes to a step, e.g., to its
+        # JSON fields, don't leak into other callers' steps.
+        self.steps = tuple(
+            Step.from_db(None, STEP_FIELD_NAMES, copy.deepcopy(row))
+            for row in graph.step_rows)
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def get_step(self, slug):
+        return self.steps[self.step_indexes[slug]]
+
+    def get_creation_dependencies(self, slug):
+        return [self.steps[number] for number
+                in self.creation_dependencies[self.step_indexes[slug]]]
+
+    def get_submission_dependencies(self, slug):
+        return [self.steps[number] for number
+                in self.submission_dependencies[self.step_indexes[slug]]]
+
+    def get_creation_prerequisites(self, slug):
+        return [self.steps[number] for number
+                in sorted(self.creation_prerequisites[
+                    self.step_indexes[slug]])]
+
+
+class WorkflowGraphCache(object):
+    """
+    Keeps a compiled snapshot of each workflow version in the process.
+
+    A snapshot is compiled on first use and kept while its workflow
+    version's `graph_stamp` is unchanged. The stamp is read from the
+    database on every lookup, so a workflow version invalidated by any
+    process is compiled again once the invalidation commits.
+    """
+
+    def __init__(self):
+        self._graphs = {}
+        self._lock = threading.Lock()
+
+    def stamp(self, workflow_version_id):
+        """
+        Return the current `graph_stamp` of a workflow version, which
+        changes whenever its steps or their dependencies do.
+        """
+        return (WorkflowVersion.objects
+                .filter(id=workflow_version_id)
+                .values_list('graph_stamp', flat=True)
+                .first()) or 0
+
+    def invalidate(self, workflow_version_id):
+        """
+        Mark the snapshot of a workflow version as out of date in every
+        process, once the current transaction commits.
+        """
+        WorkflowVersion.objects.filter(id=workflow_version_id).update(
+            graph_stamp=F('graph_stamp') + 1)
+        with self._lock:
+            self._graphs.pop(workflow_version_id, None)
+
+    def _compile(self, workflow_version_id, stamp):
+        step_rows = (
+            Step.objects
+            .filter(workflow_version_id=workflow_version_id)
+            .order_by('id')
+            .values_list(*STEP_FIELD_NAMES))
+        creation_edges = (
+            Step.creation_depends_on.through.objects
+            .filter(from_step__workflow_version_id=workflow_version_id,
+                    to_step__workflow_version_id=workflow_version_id)
+            .values_list('from_step_id', 'to_step_id'))
+        submission_edges = (
+            Step.submission_depends_on.through.objects
+            .filter(from_step__workflow_version_id=workflow_version_id,
+                    to_step__workflow_version_id=workflow_version_id)
+            .values_list('from_step_id', 'to_step_id'))
+        return WorkflowGraph(
+            workflow_version_id, stamp, list(step_rows),
+            list(creation_edges), list(submission_edges))
+
+    def get(self, workflow_version):
+        """
+        Return the compiled snapshot of a workflow version.
+
+        Args:
+            workflow_version (orchestra.models.WorkflowVersion):
+                The workflow version to look up, or its ID.
+
+        Returns:
+            compiled (orchestra.workflow.graph.CompiledWorkflowVersion):
+                The up-to-date snapshot of the workflow version, with
+                step objects of its own.
+        """
+        workflow_version_id = getattr(
+            workflow_version, 'id', workflow_version)
+        # Read the stamp before the steps, so that a snapshot is never
+        # older than the stamp it is kept under.
+        stamp = self.stamp(workflow_version_id)
+        with self._lock:
+            graph = self._graphs.get(workflow_version_id)
+        if graph is None or graph.stamp != stamp:
+            graph = self._compile(workflow_version_id, stamp)
+            with self._lock:
+                cached = self._graphs.get(workflow_version_id)
+                if cached is None or cached.stamp <= stamp:
+                    self._graphs[workflow_version_id] = graph
+        return CompiledWorkflowVersion(graph)
+
+
+workflow_graphs = WorkflowGraphCache()
@@ -14,6 +14,7 @@ from orchestra.workflow.defaults import get_default_assignment_policy
 from orchestra.workflow.defaults import get_default_creation_policy
 from orchestra.workflow.defaults import get_default_review_policy
 from orchestra.workflow.directory import parse_workflow_directory
+from orchestra.workflow.graph import workflow_graphs
 
 logger = logging.getLogger(__name__)
 
@@ -200,6 +201,8 @@ def load_workflow_version(version_data, workflow, force=False):
         _set_step_relations(step, step_data, 'todolist_templates_to_apply',
                             TodoListTemplate)
 
+    workflow_graphs.invalidate(version.id)
+
 
 def _verify_dependencies_not_updated(step_data, dependency_attr,
                                      old_dependencies):